@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from apps.system.counting import EstimatedCountPaginator
 from .models import SecurityAlert
 
 
@@ -9,4 +11,6 @@ class SecurityAlertAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'source_ip', 'destination_ip', 'signature']
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _repair_search_index(using, **kwargs):
+    from django.db import connections
+    from .search import repair_search_index
+
+    repair_search_index(connections[using])
 
 
 class AlertsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.alerts'
 
+    def ready(self):
+        post_migrate.connect(_repair_search_index, sender=self, dispatch_uid='alerts-search-index')
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(choices=[('minute', 'Minute')], default='minute', max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('severity', 'Severity'), ('alert_type', 'Alert Type')], max_length=20)),
+                ('key', models.CharField(blank=True, default='', max_length=64)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'alert_rollups',
+                'ordering': ['-bucket'],
+                'indexes': [models.Index(fields=['grain', 'dimension', 'bucket'], name='alert_rollu_grain_9b5210_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='alertrollup',
+            constraint=models.UniqueConstraint(fields=('grain', 'bucket', 'dimension', 'key'), name='alert_rollup_unique_bucket'),
+        ),
+    ]
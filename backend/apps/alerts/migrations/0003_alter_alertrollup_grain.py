@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0002_alertrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alertrollup',
+            name='grain',
+            field=models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], default='minute', max_length=10),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0003_alter_alertrollup_grain'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='securityalert',
+            index=models.Index(fields=['timestamp', 'id'], name='security_al_timesta_ca4fbf_idx'),
+        ),
+    ]
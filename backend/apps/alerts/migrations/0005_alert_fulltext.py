@@ -0,0 +1,110 @@
+"""
+Full-text index over security alerts, outside the model state.
+
+PostgreSQL gets a ``search_vector`` column kept up to date by a trigger and
+indexed with GIN; SQLite an external-content FTS5 table synced by
+triggers.  ``apps.alerts.search.repair_search_index`` reuses the SQLite
+statements to reinstall triggers that a table rebuild dropped.
+"""
+
+from django.db import migrations
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE security_alerts ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION security_alerts_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.signature, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(host(NEW.source_ip), '') || ' ' ||
+                                            coalesce(host(NEW.destination_ip), '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS security_alerts_search_vector_trigger ON security_alerts",
+    """
+    CREATE TRIGGER security_alerts_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, signature, description, source_ip, destination_ip
+    ON security_alerts
+    FOR EACH ROW EXECUTE FUNCTION security_alerts_search_vector_update()
+    """,
+    # Fires the trigger once for the existing rows.
+    "UPDATE security_alerts SET title = title",
+    "CREATE INDEX IF NOT EXISTS security_alerts_search_vector_idx ON security_alerts USING GIN (search_vector)",
+]
+POSTGRES_REMOVE = [
+    "DROP TRIGGER IF EXISTS security_alerts_search_vector_trigger ON security_alerts",
+    "DROP FUNCTION IF EXISTS security_alerts_search_vector_update()",
+    "DROP INDEX IF EXISTS security_alerts_search_vector_idx",
+    "ALTER TABLE security_alerts DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS security_alerts_fts USING fts5(
+        title, signature, description, source_ip, destination_ip,
+        content='security_alerts', content_rowid='id', tokenize='porter unicode61'
+    )
+"""
+SQLITE_TRIGGERS = {
+    "security_alerts_fts_ai": """
+    CREATE TRIGGER IF NOT EXISTS security_alerts_fts_ai AFTER INSERT ON security_alerts BEGIN
+        INSERT INTO security_alerts_fts(rowid, title, signature, description, source_ip, destination_ip)
+        VALUES (new.id, new.title, new.signature, new.description, new.source_ip, new.destination_ip);
+    END
+    """,
+    "security_alerts_fts_ad": """
+    CREATE TRIGGER IF NOT EXISTS security_alerts_fts_ad AFTER DELETE ON security_alerts BEGIN
+        INSERT INTO security_alerts_fts(security_alerts_fts, rowid, title, signature, description, source_ip, destination_ip)
+        VALUES ('delete', old.id, old.title, old.signature, old.description, old.source_ip, old.destination_ip);
+    END
+    """,
+    "security_alerts_fts_au": """
+    CREATE TRIGGER IF NOT EXISTS security_alerts_fts_au AFTER UPDATE ON security_alerts BEGIN
+        INSERT INTO security_alerts_fts(security_alerts_fts, rowid, title, signature, description, source_ip, destination_ip)
+        VALUES ('delete', old.id, old.title, old.signature, old.description, old.source_ip, old.destination_ip);
+        INSERT INTO security_alerts_fts(rowid, title, signature, description, source_ip, destination_ip)
+        VALUES (new.id, new.title, new.signature, new.description, new.source_ip, new.destination_ip);
+    END
+    """,
+}
+SQLITE_REBUILD = "INSERT INTO security_alerts_fts(security_alerts_fts) VALUES ('rebuild')"
+SQLITE_INSTALL = [SQLITE_TABLE, *SQLITE_TRIGGERS.values(), SQLITE_REBUILD]
+SQLITE_REMOVE = [
+    *(f"DROP TRIGGER IF EXISTS {name}" for name in SQLITE_TRIGGERS),
+    "DROP TABLE IF EXISTS security_alerts_fts",
+]
+
+
+def _execute(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_INSTALL)
+    elif vendor == "sqlite":
+        _execute(schema_editor, SQLITE_INSTALL)
+
+
+def remove(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        _execute(schema_editor, POSTGRES_REMOVE)
+    elif vendor == "sqlite":
+        _execute(schema_editor, SQLITE_REMOVE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0004_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, remove),
+    ]
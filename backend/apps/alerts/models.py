@@ -58,6 +58,7 @@ class SecurityAlert(models.Model):
         db_table = 'security_alerts'
         ordering = ['-timestamp']
         indexes = [
+            models.Index(fields=['timestamp', 'id']),
             models.Index(fields=['severity', 'timestamp']),
             models.Index(fields=['status', 'timestamp']),
             models.Index(fields=['alert_type', 'timestamp']),
@@ -67,3 +68,45 @@ class SecurityAlert(models.Model):
     def __str__(self):
         return f"{self.severity.upper()}: {self.title} ({self.timestamp})"
 
+
+
+class AlertRollup(models.Model):
+    """Pre-aggregated alert counts per time bucket and dimension.
+
+    Same layout as ``TrafficRollup``: one row per
+    ``(grain, bucket, dimension, key)``, with an empty key for ``total``.
+    """
+
+    GRAIN_CHOICES = [
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+    ]
+
+    DIMENSION_CHOICES = [
+        ('total', 'Total'),
+        ('severity', 'Severity'),
+        ('alert_type', 'Alert Type'),
+    ]
+
+    grain = models.CharField(max_length=10, choices=GRAIN_CHOICES, default='minute')
+    bucket = models.DateTimeField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=64, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'alert_rollups'
+        ordering = ['-bucket']
+        indexes = [
+            models.Index(fields=['grain', 'dimension', 'bucket']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['grain', 'bucket', 'dimension', 'key'],
+                name='alert_rollup_unique_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.grain} {self.bucket:%Y-%m-%d %H:%M} {self.dimension}={self.key or '*'}"
@@ -0,0 +1,121 @@
+"""
+Full-text search over security alerts.
+
+``SearchFilter`` turned ``?search=`` into ``icontains`` over five columns,
+scanning every alert.  The alerts table now carries a full-text index kept
+up to date by triggers, so writers (the ORM, ``bulk_create``, raw SQL)
+need no changes:
+
+* PostgreSQL: a ``search_vector tsvector`` column with a GIN index, filled
+  by a ``BEFORE INSERT OR UPDATE`` trigger.  Title and signature weigh
+  most, then the description, then the addresses.
+* SQLite: an external-content FTS5 table, ``security_alerts_fts``, synced
+  by ``AFTER INSERT / UPDATE / DELETE`` triggers.
+
+Neither lives in the model state; the ``0005_alert_fulltext`` migration
+installs them.  SQLite drops a table's triggers when a later migration
+rebuilds it, so ``post_migrate`` reinstalls missing ones and rebuilds the
+index.  ``FullTextSearchFilter`` matches every search term as a prefix and,
+unless ``?ordering=`` is given, orders the results by relevance.
+"""
+
+import re
+from importlib import import_module
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+TABLE = "security_alerts"
+FTS_TABLE = "security_alerts_fts"
+# Must match the text search configuration in the 0005_alert_fulltext trigger.
+SEARCH_CONFIG = "english"
+
+
+def repair_search_index(connection) -> None:
+    """Reinstall SQLite triggers dropped by a table rebuild, then reindex.
+
+    Reuses the DDL of the migration that installed them.
+    """
+    if connection.vendor != "sqlite":
+        return
+    migration = import_module("apps.alerts.migrations.0005_alert_fulltext")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        if cursor.fetchone() is None:
+            return  # not migrated yet
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [TABLE])
+        present = {row[0] for row in cursor.fetchall()}
+        if not set(migration.SQLITE_TRIGGERS) <= present:
+            for sql in migration.SQLITE_INSTALL:
+                cursor.execute(sql)
+
+
+def _terms(text: str) -> list[str]:
+    """Search terms with query-syntax characters removed."""
+    return [t for t in (re.sub(r"[^\w.:@/-]", "", part) for part in text.split()) if t]
+
+
+def tsquery(terms) -> str:
+    """``to_tsquery`` input matching every term as a prefix."""
+    return " & ".join("'{}':*".format(t.replace("'", "")) for t in terms)
+
+
+def fts5_query(terms) -> str:
+    """FTS5 ``MATCH`` input matching every term as a prefix."""
+    return " ".join('"{}"*'.format(t.replace('"', "")) for t in terms)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """``?search=`` over the alerts full-text index, ranked by relevance.
+
+    Place it after ``OrderingFilter``: the results are ordered by
+    ``search_rank`` (higher is better) only when ``?ordering=`` is absent.
+    Backends without an index use ``SearchFilter``'s ``icontains``.
+    """
+
+    def _search(self, queryset, terms):
+        vendor = connections[queryset.db].vendor
+        if vendor == "postgresql":
+            query = tsquery(terms)
+            match = RawSQL(
+                f"{TABLE}.search_vector @@ to_tsquery(%s, %s)",
+                (SEARCH_CONFIG, query),
+                output_field=BooleanField(),
+            )
+            rank = RawSQL(
+                f"ts_rank_cd({TABLE}.search_vector, to_tsquery(%s, %s))",
+                (SEARCH_CONFIG, query),
+                output_field=FloatField(),
+            )
+        elif vendor == "sqlite":
+            query = fts5_query(terms)
+            match = RawSQL(
+                f"{TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+                (query,),
+                output_field=BooleanField(),
+            )
+            # bm25() is lower for better matches; negate so higher ranks first on both backends.
+            rank = RawSQL(
+                f"(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id)",
+                (query,),
+                output_field=FloatField(),
+            )
+        else:
+            return None
+        return queryset.filter(match).annotate(search_rank=rank)
+
+    def filter_queryset(self, request, queryset, view):
+        terms = _terms(request.query_params.get(self.search_param, ""))
+        if not terms:
+            return queryset
+        searched = self._search(queryset, terms)
+        if searched is None:
+            return super().filter_queryset(request, queryset, view)
+        if not request.query_params.get("ordering"):
+            searched = searched.order_by("-search_rank", "-id")
+        return searched
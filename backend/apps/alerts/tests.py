@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.alerts.models import SecurityAlert
+from apps.alerts.search import FullTextSearchFilter
+from apps.alerts.timeline import build_timeline, parse_params
+from apps.system import rollups
+from apps.system.models import RollupWatermark
+
+
+def alert(title, description="", **extra):
+    extra.setdefault("timestamp", timezone.now())
+    return SecurityAlert.objects.create(
+        title=title, description=description, alert_type="intrusion",
+        source_ip="10.0.0.1", **extra,
+    )
+
+
+class FullTextSearchFilterTests(TestCase):
+    def search(self, text, **params):
+        request = Request(APIRequestFactory().get("/api/alerts/", {"search": text, **params}))
+        queryset = SecurityAlert.objects.order_by("-timestamp")
+        return [a.title for a in FullTextSearchFilter().filter_queryset(request, queryset, None)]
+
+    def test_terms_match_as_prefixes(self):
+        alert("SSH brute force", "Repeated logins from one host")
+        alert("Port scan", "SYN sweep")
+
+        self.assertEqual(self.search("brut"), ["SSH brute force"])
+        self.assertEqual(self.search("ssh login"), ["SSH brute force"])
+        self.assertEqual(self.search("ssh sweep"), [])
+
+    def test_addresses_are_searchable(self):
+        alert("Port scan", destination_ip="192.168.1.20")
+
+        self.assertEqual(self.search("192.168.1.20"), ["Port scan"])
+
+    def test_results_are_ranked_unless_ordered(self):
+        alert("Malware beacon", "malware malware malware callback")
+        alert("Outbound callback", "possible malware")
+
+        self.assertEqual(self.search("malware"), ["Malware beacon", "Outbound callback"])
+        self.assertCountEqual(self.search("malware", ordering="title"), ["Malware beacon", "Outbound callback"])
+
+    def test_index_follows_updates_and_deletes(self):
+        renamed = alert("DNS tunnel")
+        deleted = alert("DNS exfiltration")
+
+        renamed.title = "ICMP tunnel"
+        renamed.save()
+        deleted.delete()
+
+        self.assertEqual(self.search("dns"), [])
+        self.assertEqual(self.search("icmp"), ["ICMP tunnel"])
+
+    def test_query_syntax_is_stripped(self):
+        alert("SQL injection", 'payload "OR 1=1"')
+
+        self.assertEqual(self.search('inject* "OR'), ["SQL injection"])
+        self.assertEqual(self.search('"*'), ["SQL injection"])
+
+
+class BuildTimelineTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for minutes, severity in [(0, "critical"), (1, "high"), (2, "high"), (70, "low"), (24 * 60 + 5, "low")]:
+            alert("scan", severity=severity, timestamp=now - timedelta(minutes=minutes))
+
+    def test_buckets_are_zero_filled(self):
+        timeline = build_timeline(3600, 6 * 3600)
+
+        self.assertEqual(timeline["source"], "database")
+        self.assertEqual(len(timeline["buckets"]), 6)
+        times = [bucket["time"] for bucket in timeline["buckets"]]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(times[0], timeline["since"])
+        self.assertTrue(any(bucket["total"] == 0 for bucket in timeline["buckets"]))
+
+    def test_counts_fold_into_the_range(self):
+        buckets = build_timeline(300, 24 * 3600)["buckets"]
+
+        self.assertEqual(len(buckets), 24 * 3600 // 300)
+        self.assertEqual(sum(b["total"] for b in buckets), 4)
+        self.assertEqual(sum(b["high"] for b in buckets), 2)
+        self.assertEqual(sum(b["critical"] for b in buckets), 1)
+        for bucket in buckets:
+            self.assertEqual(bucket["total"], sum(bucket[s] for s in ("critical", "high", "medium", "low")))
+
+    def test_rollups_answer_once_caught_up(self):
+        SecurityAlert.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        rollups.roll_up_new_rows()
+
+        from_rollups = build_timeline(3600, 48 * 3600)
+        self.assertEqual(from_rollups["source"], "rollups")
+        self.assertEqual(sum(b["total"] for b in from_rollups["buckets"]), 5)
+
+        RollupWatermark.objects.update(caught_up_at=None)
+        from_db = build_timeline(3600, 48 * 3600)
+        self.assertEqual(from_db["source"], "database")
+        self.assertEqual(from_db["buckets"], from_rollups["buckets"])
+
+    def test_parse_params(self):
+        self.assertEqual(parse_params({"interval": "5m", "range": "24h"}), (300, 86400, "auto"))
+        for params in ({"interval": "2m"}, {"range": "7w"}, {"interval": "1m", "range": "90d"}, {"source": "x"}):
+            with self.assertRaises(ValidationError):
+                parse_params(params)
@@ -0,0 +1,172 @@
+"""
+Alert counts per time bucket and severity for the alert timeline.
+
+The timeline used to return one object per alert for the last seven days
+and leave the bucketing to the browser.  ``build_timeline`` returns one
+entry per ``interval`` instead, zero-filled, with a count per severity, so
+the payload grows with the number of buckets, not with the alerts:
+
+* the alert rollups when they are caught up (hour rows for whole-hour
+  intervals, minute rows within their retention otherwise);
+* otherwise one ``GROUP BY`` over the truncated timestamp and severity;
+* with ``?source=es``, a ``date_histogram`` over the Suricata alert indices,
+  falling back to the above while Elasticsearch is unavailable.
+
+Rows come back at the base grain (minute, hour or day) and are folded into
+``interval`` buckets aligned to the epoch.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.alerts.models import AlertRollup, SecurityAlert
+from apps.system import rollups
+from apps.system.circuit_breaker import CircuitOpenError
+from apps.system.elasticsearch_client import get_es_router, is_outage
+from apps.system.ingest import map_severity
+
+logger = logging.getLogger(__name__)
+
+SURICATA_INDEX = "security-alerts-*"
+SEVERITIES = ("critical", "high", "medium", "low")
+INTERVALS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "3h": 3 * 3600, "6h": 6 * 3600, "12h": 12 * 3600, "1d": 86400,
+}
+RANGE_UNITS = {"h": 3600, "d": 86400}
+MAX_RANGE_SECS = 90 * 86400
+MAX_BUCKETS = 2000
+SOURCES = ("auto", "es")
+
+
+def parse_params(params) -> tuple[int, int, str]:
+    """``(interval_secs, range_secs, source)`` from ``?interval=&range=&source=``."""
+    interval_name = params.get("interval", "1h")
+    if interval_name not in INTERVALS:
+        raise ValidationError({"interval": [f"Must be one of {', '.join(INTERVALS)}."]})
+    value = params.get("range", "7d").strip().lower()
+    try:
+        range_secs = int(value[:-1]) * RANGE_UNITS[value[-1]]
+    except (KeyError, ValueError, IndexError):
+        raise ValidationError({"range": ["Use hours or days, e.g. 24h or 7d."]})
+    range_secs = max(3600, min(range_secs, MAX_RANGE_SECS))
+    interval = INTERVALS[interval_name]
+    if range_secs // interval > MAX_BUCKETS:
+        raise ValidationError({"interval": [f"Too fine for the range; at most {MAX_BUCKETS} buckets."]})
+    source = params.get("source", "auto")
+    if source not in SOURCES:
+        raise ValidationError({"source": [f"Must be one of {', '.join(SOURCES)}."]})
+    return interval, range_secs, source
+
+
+def _floor(value: datetime, interval: int) -> datetime:
+    seconds = int(value.timestamp()) // interval * interval
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+
+def _fold(rows, since: datetime, until: datetime, interval: int) -> list[dict]:
+    """Sum ``(time, severity, count)`` rows into zero-filled ``interval`` buckets."""
+    counts = defaultdict(lambda: dict.fromkeys(SEVERITIES, 0))
+    for time, severity, count in rows:
+        bucket = _floor(time, interval)
+        if bucket < since:
+            continue
+        slot = counts[bucket]
+        slot[severity] = slot.get(severity, 0) + count
+    series = []
+    bucket = since
+    while bucket <= until:
+        slot = counts.get(bucket) or dict.fromkeys(SEVERITIES, 0)
+        series.append({"time": bucket.isoformat(), "total": sum(slot.values()), **slot})
+        bucket += timedelta(seconds=interval)
+    return series
+
+
+def _base_grain(interval: int):
+    if interval % 86400 == 0:
+        return TruncDay
+    if interval % 3600 == 0:
+        return TruncHour
+    return TruncMinute
+
+
+def _from_rollups(since: datetime, interval: int):
+    """Rollup rows, or ``None`` when the rollups cannot answer."""
+    if not rollups.caught_up(AlertRollup):
+        return None
+    if interval % 3600 == 0:
+        grain = rollups.HOUR
+    elif since >= timezone.now() - rollups.MINUTE_RETENTION:
+        grain = rollups.MINUTE
+    else:
+        return None
+    return [
+        (row["bucket"], row["key"], row["count"])
+        for row in rollups.alerts_series("severity", since, grain)
+    ]
+
+
+def _from_db(since: datetime, interval: int):
+    return [
+        (row["time"], row["severity"], row["count"])
+        for row in SecurityAlert.objects.filter(timestamp__gte=since)
+        .annotate(time=_base_grain(interval)("timestamp", tzinfo=dt_timezone.utc))
+        .values("time", "severity")
+        .annotate(count=Count("id"))
+        .order_by()
+    ]
+
+
+def _from_es(since: datetime, interval: int):
+    body = {
+        "size": 0,
+        "query": {"range": {"@timestamp": {"gte": since.isoformat()}}},
+        "aggs": {
+            "timeline": {
+                "date_histogram": {"field": "@timestamp", "fixed_interval": f"{interval}s"},
+                "aggs": {"severity": {"terms": {"field": "alert.severity", "size": 10}}},
+            }
+        },
+    }
+    resp = get_es_router().call(lambda es: es.search(index=SURICATA_INDEX, body=body))
+    return [
+        (
+            datetime.fromtimestamp(bucket["key"] / 1000, tz=dt_timezone.utc),
+            map_severity(severity["key"]),
+            severity["doc_count"],
+        )
+        for bucket in resp["aggregations"]["timeline"]["buckets"]
+        for severity in bucket["severity"]["buckets"]
+    ]
+
+
+def build_timeline(interval: int, range_secs: int, source: str = "auto") -> dict:
+    until = _floor(timezone.now(), interval)
+    since = until - timedelta(seconds=range_secs - interval)
+    rows, used = None, None
+    if source == "es":
+        try:
+            rows, used = _from_es(since, interval), "elasticsearch"
+        except CircuitOpenError:
+            pass
+        except Exception as exc:
+            if not is_outage(exc):
+                raise
+            logger.warning("Alert timeline fell back to the database: %s", exc)
+    if rows is None:
+        rows = _from_rollups(since, interval)
+        used = "rollups" if rows is not None else None
+    if rows is None:
+        rows, used = _from_db(since, interval), "database"
+    return {
+        "interval": interval,
+        "since": since.isoformat(),
+        "source": used,
+        "buckets": _fold(rows, since, until, interval),
+    }
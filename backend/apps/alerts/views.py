@@ -4,14 +4,26 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as filters
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from apps.system.exports import ExportMixin
+from apps.system.pagination import KeysetPagination
+from apps.system.watermarks import ALERTS, ConditionalListMixin, conditional
 from .models import SecurityAlert
+from .search import FullTextSearchFilter
+from .timeline import INTERVALS, build_timeline, parse_params
 from .serializers import SecurityAlertSerializer
 
 
+# Capped so a change the watermarks missed is not pinned for a whole interval.
+timeline_conditional = conditional(
+    (ALERTS,),
+    bucket_secs=lambda params: min(INTERVALS.get(params.get("interval"), 3600), 300),
+)
+
+
 class SecurityAlertFilter(filters.FilterSet):
     """Filter for security alerts."""
     
@@ -26,17 +38,25 @@ class SecurityAlertFilter(filters.FilterSet):
         fields = ['severity', 'status', 'alert_type', 'source_ip', 'destination_ip']
 
 
-class SecurityAlertViewSet(viewsets.ModelViewSet):
+class SecurityAlertViewSet(ConditionalListMixin, ExportMixin, viewsets.ModelViewSet):
     """ViewSet for security alerts."""
     
     queryset = SecurityAlert.objects.all()
     serializer_class = SecurityAlertSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_class = SecurityAlertFilter
     search_fields = ['title', 'description', 'source_ip', 'destination_ip', 'signature']
     ordering_fields = ['timestamp', 'severity', 'status']
     ordering = ['-timestamp']
+    watermark_datasets = (ALERTS,)
+    export_name = "security-alerts"
+    export_fields = (
+        "id", "timestamp", "title", "severity", "alert_type", "status",
+        "source_ip", "destination_ip", "source_port", "destination_port", "protocol",
+        "signature", "rule_id", "country_code", "acknowledged_at", "resolved_at",
+    )
     
     @action(detail=True, methods=['post'])
     def acknowledge(self, request, pk=None):
@@ -90,19 +110,14 @@ class SecurityAlertViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def timeline(self, request):
-        """Get alert timeline data."""
-        from datetime import timedelta
-        now = timezone.now()
-        last_7d = now - timedelta(days=7)
-        
-        alerts = SecurityAlert.objects.filter(timestamp__gte=last_7d).values('timestamp', 'severity').order_by('timestamp')
-        
-        timeline = []
-        for alert in alerts:
-            timeline.append({
-                'time': alert['timestamp'].isoformat(),
-                'severity': alert['severity'],
-            })
-        
-        return Response(timeline)
+        """
+        Alert counts per severity and time bucket.
+
+        ``?interval=`` (``1m`` .. ``1d``, default ``1h``), ``?range=`` (default
+        ``7d``) and ``?source=es`` to count the Suricata indices instead.
+        """
+        interval, range_secs, source = parse_params(request.query_params)
+        return timeline_conditional.respond(
+            request, lambda request: Response(build_timeline(interval, range_secs, source))
+        )
 
@@ -18,6 +18,7 @@ from django.utils import timezone
 from apps.network.models import NetworkTraffic
 from apps.alerts.models import SecurityAlert
 from apps.threats.models import ThreatIntelligence
+from apps.system import watermarks
 
 logger = logging.getLogger(__name__)
 
@@ -64,7 +65,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         force = options["force"]
 
-        if not force and NetworkTraffic.objects.count() > 10:
+        if not force and NetworkTraffic.objects.all()[:11].count() > 10:
             self.stdout.write(self.style.WARNING(
                 "Data already exists (use --force to re-seed). Skipping."
             ))
@@ -191,6 +192,7 @@ class Command(BaseCommand):
                 country_code=random.choice(COUNTRIES) if random.random() < 0.5 else None,
             ))
         NetworkTraffic.objects.bulk_create(records, batch_size=500)
+        watermarks.touch_model(NetworkTraffic)
         self.stdout.write(self.style.SUCCESS(f"ORM: created {count} traffic records"))
 
     def _seed_orm_alerts(self, count: int):
@@ -217,6 +219,7 @@ class Command(BaseCommand):
                 timestamp=ts,
             ))
         SecurityAlert.objects.bulk_create(records, batch_size=500)
+        watermarks.touch_model(SecurityAlert)
         self.stdout.write(self.style.SUCCESS(f"ORM: created {count} alert records"))
 
     def _seed_orm_threats(self, count: int):
@@ -256,4 +259,5 @@ class Command(BaseCommand):
             ))
 
         ThreatIntelligence.objects.bulk_create(records, batch_size=500, ignore_conflicts=True)
+        watermarks.touch_model(ThreatIntelligence)
         self.stdout.write(self.style.SUCCESS(f"ORM: created {count} threat intel records"))
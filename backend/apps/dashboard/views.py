@@ -3,14 +3,30 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
 from django.utils import timezone
-from django.core.cache import cache
 from datetime import timedelta
 from django.db.models import Count, Sum, Q
-from apps.network.models import NetworkTraffic
-from apps.alerts.models import SecurityAlert
+from apps.network.models import NetworkTraffic, TrafficRollup
+from apps.alerts.models import SecurityAlert, AlertRollup
 from apps.threats.models import ThreatIntelligence
-from apps.system.elasticsearch_client import get_es_client
-import psutil, time
+from apps.system.elasticsearch_client import get_es_router
+from apps.system import rollups
+from apps.system.caching import DEGRADED_TTL, get_or_revalidate, record
+from apps.system.fanout import fan_out
+from apps.system.metrics_sampler import latest_sample
+from apps.system.watermarks import ALERTS, FLOWS, conditional
+import time
+
+
+DASHBOARD_CACHE_KEY = "dashboard_stats"
+DASHBOARD_SOFT_TTL = 60    # seconds before a background refresh is triggered
+DASHBOARD_HARD_TTL = 600   # seconds a stale payload may still be served
+# Per-source budget (seconds) for the concurrent dashboard queries
+SOURCE_TIMEOUTS = {
+    "traffic": 3.0,
+    "active_connections": 2.0,
+    "alerts": 2.0,
+    "recent_alerts": 2.0,
+}
 
 
 class BurstRateThrottle(UserRateThrottle):
@@ -21,196 +37,185 @@ class BurstRateThrottle(UserRateThrottle):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([BurstRateThrottle])
+@conditional((FLOWS, ALERTS), bucket_secs=lambda params: DASHBOARD_SOFT_TTL)
 def dashboard_stats(request):
     """
     Get dashboard statistics and metrics.
     
-    This view uses Redis caching for performance and prefers Elasticsearch 
-    aggregations when ES is reachable, falling back to the database otherwise.
+    The payload is the same for every user, so it is one shared
+    stale-while-revalidate cache entry: fresh for ``DASHBOARD_SOFT_TTL``,
+    then served stale while a single worker recomputes it in the
+    background (see ``apps.system.caching``).  The ``X-Cache`` header tells
+    which case a response hit.  ETag / Last-Modified come from the flow
+    and alert watermarks plus the soft-TTL bucket, so a poll with nothing
+    new gets a 304 without reading the cache entry.
     
-    Cache TTL: 5 minutes
     Rate Limit: 100 requests/minute
     """
-    
-    # Try to get from cache first
-    cache_key = f'dashboard_stats_{request.user.id}'
-    cached_data = cache.get(cache_key)
-    
-    if cached_data:
-        return Response(cached_data)
+    data, state = get_or_revalidate(
+        DASHBOARD_CACHE_KEY,
+        _compute_dashboard_stats,
+        soft_ttl=DASHBOARD_SOFT_TTL,
+        hard_ttl=DASHBOARD_HARD_TTL,
+        ttls=_dashboard_ttls,
+    )
+    record(DASHBOARD_CACHE_KEY, state)
+    response = Response(data)
+    response["X-Cache"] = state
+    return response
 
+
+def _dashboard_ttls(data):
+    """A payload with degraded sources is only fresh for ``DEGRADED_TTL``."""
+    soft_ttl = DEGRADED_TTL if data["degraded_sources"] else DASHBOARD_SOFT_TTL
+    return soft_ttl, DASHBOARD_HARD_TTL
+
+
+def _compute_dashboard_stats():
+    """Build the dashboard payload from Elasticsearch, rollups and the DB.
+
+    The sources are independent, so they are queried concurrently; a source
+    that fails or times out leaves its part empty (traffic falls back to the
+    rollups / raw rows) and is listed in ``degraded_sources``.
+    """
     now = timezone.now()
     last_24h = now - timedelta(hours=24)
 
-    es = get_es_client()
+    tasks = {
+        "active_connections": lambda: _active_connections(now - timedelta(minutes=5)),
+        "alerts": lambda: _alert_counts(last_24h),
+        "recent_alerts": lambda: _recent_alerts(last_24h),
+    }
+    es_router = get_es_router()
+    if es_router.available():
+        tasks["traffic"] = lambda: es_router.call(_traffic_from_es)
+    results, errors = fan_out(tasks, timeouts=SOURCE_TIMEOUTS)
+    if "traffic" not in tasks:
+        # ES circuit open: skip it rather than wait on its timeout
+        errors["traffic"] = "elasticsearch unavailable"
 
-    total_traffic_24h = 0
-    active_connections = 0
-    traffic_timeline = []
-    top_source_ips = []
-    alerts_count = 0
-    alerts_by_severity = []
-    recent_alerts_payload = []
+    if "traffic" in results:
+        total_traffic_24h, traffic_timeline, top_source_ips = results["traffic"]
+    elif rollups.rollups_cover(TrafficRollup, last_24h):
+        # Fallback to the rollup tables, or raw rows if they don't cover 24h
+        total_traffic_24h, traffic_timeline, top_source_ips = _traffic_from_rollups(last_24h)
+    else:
+        total_traffic_24h, traffic_timeline, top_source_ips = _traffic_from_orm(last_24h)
 
-    try:
-        # Total traffic and active connections from Elasticsearch
-        # ES 8.x uses query parameter instead of body
-        query_body = {
-            "query": {
-                "range": {
-                    "@timestamp": {"gte": "now-24h"}
-                }
+    alerts_count, alerts_by_severity = results.get("alerts", (0, []))
+
+    return {
+        "metrics": {
+            "total_traffic_24h": total_traffic_24h,
+            "active_connections": results.get("active_connections", 0),
+            "alerts_count": alerts_count,
+            "system_health": _system_health(),
+        },
+        "traffic_timeline": traffic_timeline,
+        "top_source_ips": top_source_ips,
+        "alerts_by_severity": alerts_by_severity,
+        "recent_alerts": results.get("recent_alerts", []),
+        "degraded_sources": sorted(errors),
+    }
+
+
+def _traffic_from_es(es):
+    """24h total, hourly timeline and top talkers from ``network-flows-*``."""
+    es = es.options(request_timeout=SOURCE_TIMEOUTS["traffic"])
+    query_body = {
+        "query": {
+            "range": {
+                "@timestamp": {"gte": "now-24h"}
+            }
+        },
+        "aggs": {
+            "total_bytes": {
+                "sum": {"field": "bytes"}
             },
-            "aggs": {
-                "total_bytes": {
-                    "sum": {
-                        "script": {
-                            "source": """
-                                if (doc.containsKey('bytes') && !doc['bytes'].empty) {
-                                    return doc['bytes'].value;
-                                } else {
-                                    long orig = doc.containsKey('orig_bytes') && !doc['orig_bytes'].empty ? doc['orig_bytes'].value : 0;
-                                    long resp = doc.containsKey('resp_bytes') && !doc['resp_bytes'].empty ? doc['resp_bytes'].value : 0;
-                                    return orig + resp;
-                                }
-                            """,
-                            "lang": "painless"
-                        }
+            "by_source_ip": {
+                "terms": {
+                    "field": "source_ip",
+                    "size": 5,
+                },
+                "aggs": {
+                    "total_bytes": {
+                        "sum": {"field": "bytes"}
                     }
                 },
-                "by_source_ip": {
-                    "terms": {
-                        "field": "source_ip",
-                        "size": 5,
-                        "missing": "unknown"
-                    },
-                    "aggs": {
-                        "total_bytes": {
-                            "sum": {
-                                "script": {
-                                    "source": """
-                                        if (doc.containsKey('bytes') && !doc['bytes'].empty) {
-                                            return doc['bytes'].value;
-                                        } else {
-                                            long orig = doc.containsKey('orig_bytes') && !doc['orig_bytes'].empty ? doc['orig_bytes'].value : 0;
-                                            long resp = doc.containsKey('resp_bytes') && !doc['resp_bytes'].empty ? doc['resp_bytes'].value : 0;
-                                            return orig + resp;
-                                        }
-                                    """,
-                                    "lang": "painless"
-                                }
-                            }
-                        }
-                    },
+            },
+            "timeline": {
+                "date_histogram": {
+                    "field": "@timestamp",
+                    "fixed_interval": "1h",
+                    "min_doc_count": 0,
                 },
-                "timeline": {
-                    "date_histogram": {
-                        "field": "@timestamp",
-                        "fixed_interval": "1h",
-                        "min_doc_count": 0,
-                    },
-                    "aggs": {
-                        "bytes": {
-                            "sum": {
-                                "script": {
-                                    "source": """
-                                        if (doc.containsKey('bytes') && !doc['bytes'].empty) {
-                                            return doc['bytes'].value;
-                                        } else {
-                                            long orig = doc.containsKey('orig_bytes') && !doc['orig_bytes'].empty ? doc['orig_bytes'].value : 0;
-                                            long resp = doc.containsKey('resp_bytes') && !doc['resp_bytes'].empty ? doc['resp_bytes'].value : 0;
-                                            return orig + resp;
-                                        }
-                                    """,
-                                    "lang": "painless"
-                                }
-                            }
-                        }
-                    },
+                "aggs": {
+                    "bytes": {
+                        "sum": {"field": "bytes"}
+                    }
                 },
             },
+        },
+    }
+
+    es_resp = es.search(index="network-flows-*", size=0, body=query_body)
+
+    total = int(es_resp["aggregations"]["total_bytes"]["value"] or 0)
+    top_source_ips = [
+        {
+            "source_ip": b["key"],
+            "total_bytes": int(b.get("total_bytes", {}).get("value", 0) or 0),
+            "count": b["doc_count"],
         }
-        
-        es_resp = es.search(index="network-flows-*", size=0, body=query_body)
+        for b in es_resp["aggregations"]["by_source_ip"]["buckets"]
+    ]
+    timeline = [
+        {
+            "time": b["key_as_string"],
+            "bytes": int(b["bytes"]["value"] or 0),
+        }
+        for b in es_resp["aggregations"]["timeline"]["buckets"]
+    ]
+    return total, timeline, top_source_ips
 
-        total_traffic_24h = int(es_resp["aggregations"]["total_bytes"]["value"] or 0)
-        top_source_ips = [
-            {
-                "source_ip": b["key"],
-                "total_bytes": int(b.get("total_bytes", {}).get("value", 0) or 0),
-                "count": b["doc_count"],
-            }
-            for b in es_resp["aggregations"]["by_source_ip"]["buckets"]
-        ]
 
-        traffic_timeline = [
-            {
-                "time": b["key_as_string"],
-                "bytes": int(b["bytes"]["value"] or 0),
-            }
-            for b in es_resp["aggregations"]["timeline"]["buckets"]
-        ]
-    except Exception as e:
-        # Log the error for debugging
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Elasticsearch query failed: {type(e).__name__}: {e}", exc_info=True)
-        
-        # Fallback to ORM if ES is unavailable
-        from django.db.models import F
-
-        orm_agg = NetworkTraffic.objects.filter(timestamp__gte=last_24h).aggregate(
-            total_bytes=Sum(F("bytes_sent") + F("bytes_received"))
+def _active_connections(since):
+    """ESTABLISHED flows since ``since``, always from the database."""
+    if rollups.rollups_cover(TrafficRollup, since):
+        return sum(
+            row["flows"]
+            for row in rollups.traffic_by("connection_state", since)
+            if row["key"] == "ESTABLISHED"
         )
-        total_traffic_24h = orm_agg["total_bytes"] or 0
-
-        for i in range(24):
-            hour_start = last_24h + timedelta(hours=i)
-            hour_end = hour_start + timedelta(hours=1)
-            from django.db.models import F
-
-            hour_traffic = (
-                NetworkTraffic.objects.filter(
-                    timestamp__gte=hour_start,
-                    timestamp__lt=hour_end,
-                ).aggregate(bytes=Sum(F("bytes_sent") + F("bytes_received")))["bytes"]
-                or 0
-            )
-            traffic_timeline.append(
-                {
-                    "time": hour_start.isoformat(),
-                    "bytes": hour_traffic,
-                }
-            )
-
-        top_source_ips = list(
-            NetworkTraffic.objects.filter(timestamp__gte=last_24h)
-            .values("source_ip")
-            .annotate(
-                count=Count("id"),
-                total_bytes=Sum(F("bytes_sent") + F("bytes_received")),
-            )
-            .order_by("-count")[:5]
-        )
-
-    # Always compute active connections from the database so the metric
-    # is accurate even when Elasticsearch is available.
-    active_connections = NetworkTraffic.objects.filter(
-        timestamp__gte=now - timedelta(minutes=5),
+    return NetworkTraffic.objects.filter(
+        timestamp__gte=since,
         connection_state="ESTABLISHED",
     ).count()
 
-    # Alerts via ORM for now (they may also be populated from Kafka consumer)
-    alerts_count = SecurityAlert.objects.filter(timestamp__gte=last_24h).count()
-    alerts_by_severity = list(
-        SecurityAlert.objects.filter(timestamp__gte=last_24h)
+
+def _alert_counts(since):
+    """Alert total and per-severity counts, from the rollups when they cover the window."""
+    if rollups.rollups_cover(AlertRollup, since):
+        total = sum(row["count"] for row in rollups.alerts_by("total", since))
+        by_severity = [
+            {"severity": row["key"], "count": row["count"]}
+            for row in rollups.alerts_by("severity", since)
+        ]
+        return total, by_severity
+    total = SecurityAlert.objects.filter(timestamp__gte=since).count()
+    by_severity = list(
+        SecurityAlert.objects.filter(timestamp__gte=since)
         .values("severity")
         .annotate(count=Count("id"))
     )
+    return total, by_severity
+
+
+def _recent_alerts(since):
     recent_alerts = SecurityAlert.objects.filter(
-        timestamp__gte=last_24h
+        timestamp__gte=since
     ).order_by("-timestamp")[:10]
-    recent_alerts_payload = [
+    return [
         {
             "id": alert.id,
             "title": alert.title,
@@ -221,18 +226,18 @@ def dashboard_stats(request):
         for alert in recent_alerts
     ]
 
+
+def _system_health():
     try:
-        cpu = psutil.cpu_percent(interval=0.3)
-        mem = psutil.virtual_memory().percent
-        disk = psutil.disk_usage("/").percent
-        boot = psutil.boot_time()
+        sample = latest_sample()
+        cpu, mem, disk, boot = sample["cpu"], sample["memory"], sample["disk"], sample["boot_time"]
         uptime_hours = (time.time() - boot) / 3600
         net_uptime = min(99.99, 100.0 - (0.01 * max(0, 720 - uptime_hours)))
         status = "critical" if cpu > 90 or mem > 95 else ("warning" if cpu > 75 or mem > 85 else "healthy")
     except Exception:
         cpu, mem, disk, net_uptime, status = 0, 0, 0, 99.9, "unknown"
 
-    system_health = {
+    return {
         "status": status,
         "cpu_usage": round(cpu, 1),
         "memory_usage": round(mem, 1),
@@ -240,20 +245,63 @@ def dashboard_stats(request):
         "network_uptime": round(net_uptime, 2),
     }
 
-    response_data = {
-        "metrics": {
-            "total_traffic_24h": total_traffic_24h,
-            "active_connections": active_connections,
-            "alerts_count": alerts_count,
-            "system_health": system_health,
-        },
-        "traffic_timeline": traffic_timeline,
-        "top_source_ips": top_source_ips,
-        "alerts_by_severity": alerts_by_severity,
-        "recent_alerts": recent_alerts_payload,
-    }
-    
-    # Cache the response
-    cache.set(cache_key, response_data, 300)  # 5 minutes
 
-    return Response(response_data)
+def _traffic_from_rollups(since):
+    """24h total, hourly timeline and top talkers from ``traffic_rollups``."""
+    total = sum(row["bytes"] or 0 for row in rollups.traffic_by("total", since))
+
+    by_hour = {row["hour"]: row["bytes"] or 0 for row in rollups.traffic_hourly(since)}
+    start = since.replace(minute=0, second=0, microsecond=0)
+    timeline = [
+        {"time": hour.isoformat(), "bytes": by_hour.get(hour, 0)}
+        for hour in (start + timedelta(hours=i) for i in range(25))
+        if hour <= timezone.now()
+    ]
+
+    top = sorted(
+        rollups.traffic_by("source_ip", since), key=lambda row: row["flows"], reverse=True
+    )[:5]
+    top_source_ips = [
+        {"source_ip": row["key"], "count": row["flows"], "total_bytes": row["bytes"]}
+        for row in top
+    ]
+    return total, timeline, top_source_ips
+
+
+def _traffic_from_orm(since):
+    """Same figures as ``_traffic_from_rollups`` computed from raw rows."""
+    from django.db.models import F
+
+    orm_agg = NetworkTraffic.objects.filter(timestamp__gte=since).aggregate(
+        total_bytes=Sum(F("bytes_sent") + F("bytes_received"))
+    )
+    total = orm_agg["total_bytes"] or 0
+
+    timeline = []
+    for i in range(24):
+        hour_start = since + timedelta(hours=i)
+        hour_end = hour_start + timedelta(hours=1)
+        hour_traffic = (
+            NetworkTraffic.objects.filter(
+                timestamp__gte=hour_start,
+                timestamp__lt=hour_end,
+            ).aggregate(bytes=Sum(F("bytes_sent") + F("bytes_received")))["bytes"]
+            or 0
+        )
+        timeline.append(
+            {
+                "time": hour_start.isoformat(),
+                "bytes": hour_traffic,
+            }
+        )
+
+    top_source_ips = list(
+        NetworkTraffic.objects.filter(timestamp__gte=since)
+        .values("source_ip")
+        .annotate(
+            count=Count("id"),
+            total_bytes=Sum(F("bytes_sent") + F("bytes_received")),
+        )
+        .order_by("-count")[:5]
+    )
+    return total, timeline, top_source_ips
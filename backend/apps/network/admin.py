@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from apps.system.counting import EstimatedCountPaginator
 from .models import NetworkTraffic
 
 
@@ -9,4 +11,6 @@ class NetworkTrafficAdmin(admin.ModelAdmin):
     search_fields = ['source_ip', 'destination_ip', 'application']
     readonly_fields = ['created_at']
     date_hierarchy = 'timestamp'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
@@ -26,6 +26,8 @@ from django.utils import timezone
 
 from apps.network.models import NetworkTraffic
 from apps.alerts.models import SecurityAlert
+from apps.system.ingest import single_writer_enabled, with_db_id
+from apps.system import watermarks
 
 
 def _delivery_report(err, msg):
@@ -125,6 +127,7 @@ class Command(BaseCommand):
         self._flows = {}
         self._flow_lock = threading.Lock()
         self._local_ip = None
+        self._direct_writes = True
         # Anomaly detection state — sliding window (never cleared automatically)
         self._anomaly_lock = threading.Lock()
         self._port_tracker = defaultdict(set)   # src_ip -> set of dst_ports
@@ -147,8 +150,11 @@ class Command(BaseCommand):
         bpf = options["bpf"]
 
         self._detect_local_ip(iface)
-        es = self._connect_es()
         producer = self._connect_kafka()
+        # In single-writer mode consume_kafka owns the ES and DB writes; this
+        # command only writes them itself when it has no Kafka producer.
+        self._direct_writes = not (producer and single_writer_enabled())
+        es = self._connect_es() if self._direct_writes else None
 
         signal.signal(signal.SIGINT, lambda *_: self._stop())
         signal.signal(signal.SIGTERM, lambda *_: self._stop())
@@ -415,7 +421,7 @@ class Command(BaseCommand):
         idx_date = datetime.utcnow().strftime("%Y.%m.%d")
         es_index = f"network-flows-{idx_date}"
 
-        es_actions = []
+        es_docs = []
         kafka_payloads = []
         orm_objects = []
 
@@ -457,7 +463,7 @@ class Command(BaseCommand):
                 "direction": direction,
             }
 
-            es_actions.append({"_index": es_index, "_source": es_doc})
+            es_docs.append(es_doc)
             kafka_payloads.append(json.dumps(es_doc).encode())
 
             orm_objects.append(NetworkTraffic(
@@ -476,9 +482,21 @@ class Command(BaseCommand):
                 application=flow.proto if flow.proto not in PROTO_MAP.values() else None,
             ))
 
-        if es and es_actions:
+        # Rows first, so the documents can carry their db_id.
+        if self._direct_writes:
+            try:
+                NetworkTraffic.objects.bulk_create(orm_objects)
+                watermarks.touch_model(NetworkTraffic)
+            except Exception as exc:
+                logger.debug("ORM bulk_create error: %s", exc)
+
+        if es and es_docs:
             try:
                 from elasticsearch.helpers import bulk
+                es_actions = [
+                    {"_index": es_index, "_source": with_db_id(doc, obj)}
+                    for doc, obj in zip(es_docs, orm_objects)
+                ]
                 bulk(es, es_actions, raise_on_error=False)
             except Exception as exc:
                 logger.debug("ES bulk index error: %s", exc)
@@ -493,10 +511,6 @@ class Command(BaseCommand):
                     logger.debug("Kafka produce error: %s", exc)
             producer.flush()
 
-        try:
-            NetworkTraffic.objects.bulk_create(orm_objects, ignore_conflicts=True)
-        except Exception as exc:
-            logger.debug("ORM bulk_create error: %s", exc)
 
         # --- Push live snapshot to WebSocket dashboard ---
         try:
@@ -581,22 +595,23 @@ class Command(BaseCommand):
         category = alert_info.get("category", "")
         severity_str = severity_map.get(alert_info.get("severity"), "medium")
 
-        try:
-            SecurityAlert.objects.create(
-                title=alert_info.get("signature", "Alert"),
-                description=category or "N/A",
-                severity=severity_str,
-                alert_type=CATEGORY_MAP.get(category, "suspicious_traffic"),
-                status="new",
-                source_ip=src_ip,
-                destination_ip=event.get("destination_ip"),
-                protocol="TCP",
-                signature=alert_info.get("signature"),
-                rule_id=str(alert_info.get("signature_id", "")),
-                timestamp=timezone.now(),
-            )
-        except Exception as exc:
-            logger.debug("ORM alert error: %s", exc)
+        if self._direct_writes:
+            try:
+                SecurityAlert.objects.create(
+                    title=alert_info.get("signature", "Alert"),
+                    description=category or "N/A",
+                    severity=severity_str,
+                    alert_type=CATEGORY_MAP.get(category, "suspicious_traffic"),
+                    status="new",
+                    source_ip=src_ip,
+                    destination_ip=event.get("destination_ip"),
+                    protocol="TCP",
+                    signature=alert_info.get("signature"),
+                    rule_id=str(alert_info.get("signature_id", "")),
+                    timestamp=timezone.now(),
+                )
+            except Exception as exc:
+                logger.debug("ORM alert error: %s", exc)
 
         # Upsert a ThreatIntelligence record so the Threat Intel page shows real data
         THREAT_MAP = {
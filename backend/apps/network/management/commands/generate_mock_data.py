@@ -1,10 +1,24 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Max
 from django.utils import timezone
 from datetime import timedelta
 import random
 from apps.network.models import NetworkTraffic
 from apps.alerts.models import SecurityAlert
 from apps.threats.models import ThreatIntelligence
+from apps.system import watermarks
+
+
+def bulk_insert(model, records):
+    """``bulk_create`` ignoring conflicts; returns how many rows were inserted.
+
+    Counts the rows above the previous highest id, an index range scan over
+    the new rows, rather than ``COUNT(*)`` of the whole table twice.
+    """
+    last_id = model.objects.aggregate(last=Max('id'))['last'] or 0
+    model.objects.bulk_create(records, batch_size=500, ignore_conflicts=True)
+    watermarks.touch_model(model)
+    return model.objects.filter(id__gt=last_id).count()
 
 
 class Command(BaseCommand):
@@ -64,10 +78,7 @@ class Command(BaseCommand):
                 country_code=random.choice(['US', 'RU', 'CN', 'DE', 'GB', 'FR', None]),
             ))
 
-        before_count = NetworkTraffic.objects.count()
-        NetworkTraffic.objects.bulk_create(traffic_records, batch_size=500, ignore_conflicts=True)
-        after_count = NetworkTraffic.objects.count()
-        created = after_count - before_count
+        created = bulk_insert(NetworkTraffic, traffic_records)
         skipped = len(traffic_records) - created
         self.stdout.write(self.style.SUCCESS(
             f'Created {created} network traffic records ({skipped} skipped due to conflicts)'
@@ -113,10 +124,7 @@ class Command(BaseCommand):
                 timestamp=timestamp,
             ))
 
-        before_count = SecurityAlert.objects.count()
-        SecurityAlert.objects.bulk_create(alert_records, batch_size=500, ignore_conflicts=True)
-        after_count = SecurityAlert.objects.count()
-        created = after_count - before_count
+        created = bulk_insert(SecurityAlert, alert_records)
         skipped = len(alert_records) - created
         self.stdout.write(self.style.SUCCESS(
             f'Created {created} security alerts ({skipped} skipped due to conflicts)'
@@ -163,10 +171,7 @@ class Command(BaseCommand):
                 is_active=random.choice([True, True, True, False]),  # 75% active
             ))
 
-        before_count = ThreatIntelligence.objects.count()
-        ThreatIntelligence.objects.bulk_create(threat_records, batch_size=500, ignore_conflicts=True)
-        after_count = ThreatIntelligence.objects.count()
-        created = after_count - before_count
+        created = bulk_insert(ThreatIntelligence, threat_records)
         skipped = len(threat_records) - created
         self.stdout.write(self.style.SUCCESS(
             f'Created {created} threat intelligence records ({skipped} skipped due to conflicts)'
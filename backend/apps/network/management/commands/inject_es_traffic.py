@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from apps.system.elasticsearch_client import get_es_client
+from apps.system import watermarks
 import random
 from datetime import datetime, timedelta
 
@@ -82,6 +83,7 @@ class Command(BaseCommand):
             ]
 
             success, failed = bulk(es, actions, raise_on_error=False)
+            watermarks.touch(watermarks.FLOWS)
             self.stdout.write(
                 self.style.SUCCESS(
                     f"Successfully indexed {success} events to {index_name}"
@@ -22,6 +22,7 @@ from django.utils import timezone
 
 from apps.network.models import NetworkTraffic
 from apps.alerts.models import SecurityAlert
+from apps.system.ingest import single_writer_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -76,8 +77,11 @@ class Command(BaseCommand):
         alert_ratio = options["alert_ratio"]
         duration = options["duration"]
 
-        es = self._connect_es()
         producer = self._connect_kafka()
+        # In single-writer mode consume_kafka owns the ES and DB writes; this
+        # command only writes them itself when it has no Kafka producer.
+        self._direct_writes = not (producer and single_writer_enabled())
+        es = self._connect_es() if self._direct_writes else None
 
         interval = 1.0 / max(rate, 0.1)
         end_time = time.time() + duration * 60 if duration > 0 else None
@@ -192,25 +196,26 @@ class Command(BaseCommand):
             except Exception as exc:
                 logger.debug("Kafka flow produce error: %s", exc)
 
-        try:
-            NetworkTraffic.objects.create(
-                timestamp=timezone.now(),
-                source_ip=event["source_ip"],
-                destination_ip=event["destination_ip"],
-                source_port=event["source_port"],
-                destination_port=event["destination_port"],
-                protocol=event["proto"],
-                bytes_sent=event.get("orig_bytes", 0),
-                bytes_received=event.get("resp_bytes", 0),
-                packets_sent=event.get("packets_sent", 0),
-                packets_received=event.get("packets_received", 0),
-                connection_state=event.get("conn_state", "ESTABLISHED"),
-                duration=event.get("duration", 0.0),
-                application=event.get("service"),
-                country_code=random.choice(COUNTRIES) if random.random() < 0.3 else None,
-            )
-        except Exception as exc:
-            logger.debug("ORM flow create error: %s", exc)
+        if self._direct_writes:
+            try:
+                NetworkTraffic.objects.create(
+                    timestamp=timezone.now(),
+                    source_ip=event["source_ip"],
+                    destination_ip=event["destination_ip"],
+                    source_port=event["source_port"],
+                    destination_port=event["destination_port"],
+                    protocol=event["proto"],
+                    bytes_sent=event.get("orig_bytes", 0),
+                    bytes_received=event.get("resp_bytes", 0),
+                    packets_sent=event.get("packets_sent", 0),
+                    packets_received=event.get("packets_received", 0),
+                    connection_state=event.get("conn_state", "ESTABLISHED"),
+                    duration=event.get("duration", 0.0),
+                    application=event.get("service"),
+                    country_code=random.choice(COUNTRIES) if random.random() < 0.3 else None,
+                )
+            except Exception as exc:
+                logger.debug("ORM flow create error: %s", exc)
 
     def _push_alert(self, event: dict, es, producer):
         idx = f"security-alerts-{datetime.utcnow().strftime('%Y.%m.%d')}"
@@ -237,25 +242,26 @@ class Command(BaseCommand):
         }
         alert_info = event.get("alert", {})
         category = alert_info.get("category", "")
-        try:
-            SecurityAlert.objects.create(
-                title=alert_info.get("signature", "Security Alert"),
-                description=category or "N/A",
-                severity=_severity_label(alert_info.get("severity", 3)),
-                alert_type=CATEGORY_MAP.get(category, "intrusion"),
-                status="new",
-                source_ip=event.get("source_ip"),
-                destination_ip=event.get("destination_ip"),
-                source_port=event.get("source_port"),
-                destination_port=event.get("destination_port"),
-                protocol=event.get("proto"),
-                signature=alert_info.get("signature"),
-                rule_id=str(alert_info.get("signature_id", "")),
-                country_code=random.choice(COUNTRIES) if random.random() < 0.5 else None,
-                timestamp=timezone.now(),
-            )
-        except Exception as exc:
-            logger.debug("ORM alert create error: %s", exc)
+        if self._direct_writes:
+            try:
+                SecurityAlert.objects.create(
+                    title=alert_info.get("signature", "Security Alert"),
+                    description=category or "N/A",
+                    severity=_severity_label(alert_info.get("severity", 3)),
+                    alert_type=CATEGORY_MAP.get(category, "intrusion"),
+                    status="new",
+                    source_ip=event.get("source_ip"),
+                    destination_ip=event.get("destination_ip"),
+                    source_port=event.get("source_port"),
+                    destination_port=event.get("destination_port"),
+                    protocol=event.get("proto"),
+                    signature=alert_info.get("signature"),
+                    rule_id=str(alert_info.get("signature_id", "")),
+                    country_code=random.choice(COUNTRIES) if random.random() < 0.5 else None,
+                    timestamp=timezone.now(),
+                )
+            except Exception as exc:
+                logger.debug("ORM alert create error: %s", exc)
 
     # -- Connections ----------------------------------------------------------
 
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrafficRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(choices=[('minute', 'Minute')], default='minute', max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('dimension', models.CharField(choices=[('total', 'Total'), ('protocol', 'Protocol'), ('source_ip', 'Source IP'), ('direction', 'Direction'), ('connection_state', 'Connection State')], max_length=20)),
+                ('key', models.CharField(blank=True, default='', max_length=64)),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('packets', models.BigIntegerField(default=0)),
+                ('flows', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'traffic_rollups',
+                'ordering': ['-bucket'],
+                'indexes': [models.Index(fields=['grain', 'dimension', 'bucket'], name='traffic_rol_grain_aa9eeb_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trafficrollup',
+            constraint=models.UniqueConstraint(fields=('grain', 'bucket', 'dimension', 'key'), name='traffic_rollup_unique_bucket'),
+        ),
+    ]
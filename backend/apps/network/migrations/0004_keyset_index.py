@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('network', '0003_alter_trafficrollup_grain'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='networktraffic',
+            index=models.Index(fields=['timestamp', 'id'], name='network_tra_timesta_5afcb7_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='networktraffic',
+            name='network_tra_timesta_27a714_idx',
+        ),
+    ]
@@ -47,7 +47,9 @@ class NetworkTraffic(models.Model):
         db_table = 'network_traffic'
         ordering = ['-timestamp']
         indexes = [
-            models.Index(fields=['timestamp']),
+            # Keyset pagination seeks on (timestamp, id); also serves
+            # plain timestamp ranges.
+            models.Index(fields=['timestamp', 'id']),
             models.Index(fields=['source_ip', 'timestamp']),
             models.Index(fields=['destination_ip', 'timestamp']),
             models.Index(fields=['protocol', 'timestamp']),
@@ -64,3 +66,53 @@ class NetworkTraffic(models.Model):
     def total_packets(self):
         return self.packets_sent + self.packets_received
 
+
+
+class TrafficRollup(models.Model):
+    """Pre-aggregated traffic counters per time bucket and dimension.
+
+    One row per ``(grain, bucket, dimension, key)``, e.g. the bytes, packets
+    and flows seen for protocol ``HTTPS`` in the minute starting at
+    ``bucket``.  The ``total`` dimension has an empty key.  Every raw row is
+    counted at both minute and hour grain; ``update_rollups`` (or
+    ``consume_kafka``) folds new rows in from a high-water mark, see
+    ``apps.system.rollups``.
+    """
+
+    GRAIN_CHOICES = [
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+    ]
+
+    DIMENSION_CHOICES = [
+        ('total', 'Total'),
+        ('protocol', 'Protocol'),
+        ('source_ip', 'Source IP'),
+        ('direction', 'Direction'),
+        ('connection_state', 'Connection State'),
+    ]
+
+    grain = models.CharField(max_length=10, choices=GRAIN_CHOICES, default='minute')
+    bucket = models.DateTimeField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=64, blank=True, default='')
+    bytes = models.BigIntegerField(default=0)
+    packets = models.BigIntegerField(default=0)
+    flows = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'traffic_rollups'
+        ordering = ['-bucket']
+        indexes = [
+            models.Index(fields=['grain', 'dimension', 'bucket']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['grain', 'bucket', 'dimension', 'key'],
+                name='traffic_rollup_unique_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.grain} {self.bucket:%Y-%m-%d %H:%M} {self.dimension}={self.key or '*'}"
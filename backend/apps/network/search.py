@@ -0,0 +1,307 @@
+"""
+Elasticsearch search backend for the traffic list.
+
+``?search=`` and the list filters used to become ``icontains`` OR-clauses
+and column filters over ``network_traffic``, scanning the table.  When any
+of them is present the list is answered from ``network-flows-*`` instead,
+with the same semantics as the ORM fallback (``FlowSearchFilter`` and the
+viewset's filterset), so a query returns the same rows either way:
+
+* ``?search=`` with an IP matches either address exactly; an IPv4 CIDR or a
+  dotted prefix such as ``10.20.`` matches addresses inside it; other text
+  is a case-insensitive prefix of the application, protocol or connection
+  state.
+* ``source_ip`` / ``destination_ip`` match one address exactly.
+* ``protocol`` / ``connection_state`` match case-insensitively.
+
+The page is loaded from the database by the ``db_id`` each document was
+indexed with, in hit order, so ids match the ORM path.  Documents without
+a database row (shipped by Logstash) are built from ``_source``, with a
+null ``id`` and their Elasticsearch id as ``es_id``.  Later pages are
+walked through a point-in-time with ``search_after``, opened only when a
+first page has more results and closed with the last page.
+
+Only an Elasticsearch outage (open circuit, connection error, 5xx) falls
+back to the ORM filter backends; the plain unfiltered list always uses the
+ORM keyset pagination.
+"""
+
+import base64
+import binascii
+import ipaddress
+import json
+import logging
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from elasticsearch import NotFoundError
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import SearchFilter
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from apps.system.circuit_breaker import CircuitOpenError
+from apps.system.elasticsearch_client import is_outage, get_es_router
+from apps.system.networks import ipv4_network_q
+from .models import NetworkTraffic
+
+logger = logging.getLogger(__name__)
+
+FLOWS_INDEX = "network-flows-*"
+KEEP_ALIVE = "1m"
+# Exact totals beyond this are not worth counting; the count is then flagged approximate.
+TRACK_TOTAL_HITS = 10_000
+
+IP_FIELDS = ("source_ip", "destination_ip")
+# Flow document keyword field -> NetworkTraffic field, for ?search= text
+KEYWORD_FIELDS = {
+    "service": "application",
+    "proto": "protocol",
+    "conn_state": "connection_state",
+}
+# List filter param -> flow document field
+TERM_FILTERS = {
+    "protocol": "proto",
+    "connection_state": "conn_state",
+}
+# ?ordering= field -> flow document field
+SORT_FIELDS = {
+    "timestamp": "@timestamp",
+    "bytes_sent": "orig_bytes",
+    "bytes_received": "resp_bytes",
+}
+
+
+def _ip_query(value: str, field: str) -> dict:
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        raise ValidationError({field: ["Enter a valid IPv4 or IPv6 address."]})
+    return {"term": {field: value}}
+
+
+def _as_network(text: str):
+    """``text`` as an address or IPv4 network, a dotted prefix as the network it spans."""
+    try:
+        network = ipaddress.ip_network(text, strict=False)
+    except ValueError:
+        octets = text.rstrip(".").split(".")
+        if not (1 <= len(octets) < 4 and all(o.isdigit() and int(o) <= 255 for o in octets)):
+            return None
+        padded = octets + ["0"] * (4 - len(octets))
+        return ipaddress.ip_network(f"{'.'.join(padded)}/{8 * len(octets)}")
+    if network.num_addresses > 1 and network.version != 4:
+        return None  # IPv6 text forms share no reliable prefix for the ORM side
+    return network
+
+
+def search_query(text: str) -> dict:
+    network = _as_network(text)
+    if network is not None:
+        clauses = [{"term": {field: str(network)}} for field in IP_FIELDS]
+    else:
+        clauses = [
+            {"prefix": {field: {"value": text, "case_insensitive": True}}}
+            for field in KEYWORD_FIELDS
+        ]
+    return {"bool": {"should": clauses, "minimum_should_match": 1}}
+
+
+def search_q(text: str) -> Q:
+    """The ORM equivalent of ``search_query``."""
+    network = _as_network(text)
+    condition = Q()
+    if network is None:
+        for field in KEYWORD_FIELDS.values():
+            condition |= Q(**{f"{field}__istartswith": text})
+    elif network.num_addresses == 1:
+        for field in IP_FIELDS:
+            condition |= Q(**{field: str(network.network_address)})
+    else:
+        for field in IP_FIELDS:
+            condition |= ipv4_network_q(network, field)
+    return condition
+
+
+class FlowSearchFilter(SearchFilter):
+    """``?search=`` with ``search_q``, the semantics of the Elasticsearch path."""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        return queryset.filter(search_q(text))
+
+
+def _date(params, name: str):
+    value = parse_datetime(params[name])
+    if value is None:
+        raise ValidationError({name: ["Enter a valid date/time."]})
+    return value.isoformat()
+
+
+def _from_source(hit: dict) -> NetworkTraffic:
+    """An unsaved row for a document that has no database row."""
+    doc = hit["_source"]
+    return NetworkTraffic(
+        timestamp=parse_datetime(doc.get("@timestamp") or ""),
+        source_ip=doc.get("source_ip"),
+        destination_ip=doc.get("destination_ip"),
+        source_port=doc.get("source_port") or 0,
+        destination_port=doc.get("destination_port") or 0,
+        protocol=doc.get("proto") or "",
+        bytes_sent=doc.get("orig_bytes") or 0,
+        bytes_received=doc.get("resp_bytes") or 0,
+        packets_sent=doc.get("packets_sent") or 0,
+        packets_received=doc.get("packets_received") or 0,
+        connection_state=doc.get("conn_state") or "",
+        duration=doc.get("duration") or 0.0,
+        application=doc.get("service"),
+        country_code=(doc.get("geoip") or {}).get("country_code2"),
+    )
+
+
+def load_page(hits) -> list[NetworkTraffic]:
+    """The database rows behind ``hits``, in hit order."""
+    ids = [hit["_source"].get("db_id") for hit in hits]
+    rows = NetworkTraffic.objects.in_bulk([i for i in ids if i is not None])
+    return [rows.get(i) or _from_source(hit) for i, hit in zip(ids, hits)]
+
+
+class EsFlowSearch:
+    """Answers filtered / searched traffic list requests from Elasticsearch."""
+
+    search_param = "search"
+    filter_params = ("search", "source_ip", "destination_ip", *TERM_FILTERS, "date_from", "date_to")
+    cursor_query_param = "cursor"
+
+    def applies(self, request) -> bool:
+        return any(request.query_params.get(p) for p in self.filter_params)
+
+    def build_query(self, params) -> dict:
+        filters = []
+        if params.get(self.search_param):
+            filters.append(search_query(params[self.search_param].strip()))
+        for field in IP_FIELDS:
+            if params.get(field):
+                filters.append(_ip_query(params[field], field))
+        for param, field in TERM_FILTERS.items():
+            if params.get(param):
+                filters.append({"term": {field: {"value": params[param], "case_insensitive": True}}})
+        time_range = {}
+        if params.get("date_from"):
+            time_range["gte"] = _date(params, "date_from")
+        if params.get("date_to"):
+            time_range["lte"] = _date(params, "date_to")
+        if time_range:
+            filters.append({"range": {"@timestamp": time_range}})
+        return {"bool": {"filter": filters}}
+
+    def sort(self, params) -> list[dict]:
+        ordering = (params.get("ordering") or "").split(",")[0].strip()
+        field = SORT_FIELDS.get(ordering.lstrip("-"), "@timestamp")
+        order = "asc" if ordering and ordering in SORT_FIELDS else "desc"
+        unmapped = "date" if field == "@timestamp" else "long"
+        return [{field: {"order": order, "unmapped_type": unmapped}}]
+
+    def _decode(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return data["pit"], data["after"]
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise NotFound("Invalid cursor")
+
+    def _encode(self, pit_id: str, after) -> str:
+        data = {"pit": pit_id, "after": after}
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+    def _query(self, router, query, sort, size, pit_id=None, after=None) -> dict:
+        kwargs = {"search_after": after} if after else {}
+        if pit_id is None:
+            kwargs["index"] = FLOWS_INDEX
+        else:
+            kwargs["pit"] = {"id": pit_id, "keep_alive": KEEP_ALIVE}
+        return router.call(lambda es: es.search(
+            query=query, sort=sort, size=size + 1, track_total_hits=TRACK_TOTAL_HITS, **kwargs
+        ))
+
+    def _close(self, router, pit_id: str) -> None:
+        try:
+            router.call(lambda es: es.close_point_in_time(id=pit_id))
+        except Exception as exc:
+            # It lapses after KEEP_ALIVE anyway.
+            logger.debug("Closing point-in-time failed: %s", exc)
+
+    def search(self, request, view) -> Response:
+        params = request.query_params
+        query = self.build_query(params)
+        sort = self.sort(params)
+        size = view.paginator.get_page_size(request)
+        pit_id, after = self._decode(request)
+        router = get_es_router()
+        if pit_id is None:
+            resp = self._query(router, query, sort, size)
+            if len(resp["hits"]["hits"]) > size:
+                # More pages: rerun the first one in a point-in-time so the
+                # cursor pages through one consistent snapshot.
+                pit_id = router.call(
+                    lambda es: es.open_point_in_time(index=FLOWS_INDEX, keep_alive=KEEP_ALIVE)
+                )["id"]
+                resp = self._query(router, query, sort, size, pit_id)
+        else:
+            try:
+                resp = self._query(router, query, sort, size, pit_id, after)
+            except NotFoundError:
+                # The point-in-time behind a cursor lapses after KEEP_ALIVE
+                raise NotFound("Cursor expired, start the search again")
+        pit_id = resp.get("pit_id", pit_id)
+        hits = resp["hits"]["hits"]
+        page = hits[:size]
+        total = resp["hits"]["total"]
+
+        data = view.get_serializer(load_page(page), many=True).data
+        for row, hit in zip(data, page):
+            if row["id"] is None:
+                row["es_id"] = hit["_id"]
+
+        next_link = None
+        if len(hits) > size:
+            cursor = self._encode(pit_id, page[-1]["sort"])
+            next_link = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, cursor
+            )
+        elif pit_id is not None:
+            self._close(router, pit_id)
+        return Response({
+            "count": total["value"],
+            "approximate": total["relation"] != "eq",
+            "next": next_link,
+            "previous": None,
+            "results": data,
+        })
+
+
+class SearchBackendMixin:
+    """Route filtered ``list`` requests through ``search_backend`` when it applies.
+
+    Falls back to the viewset's own filter backends only while the search
+    backend's store is unavailable.
+    """
+
+    search_backend = None
+
+    def list(self, request, *args, **kwargs):
+        backend = self.search_backend
+        if backend is not None and backend.applies(request):
+            try:
+                return backend.search(request, self)
+            except CircuitOpenError:
+                pass
+            except Exception as exc:
+                if not is_outage(exc):
+                    raise
+                logger.warning("Traffic search fell back to the database: %s", exc)
+        return super().list(request, *args, **kwargs)
@@ -1,12 +1,25 @@
 from rest_framework import serializers
 from .models import NetworkTraffic
-from apps.threats.services import check_ip_reputation
+from apps.threats.services import check_ip_reputation, check_ip_reputation_batch
+
+
+class NetworkTrafficListSerializer(serializers.ListSerializer):
+    """Resolves the reputation of a page's destination IPs in one batch."""
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        if 'reputation' in self.child.fields:
+            self.child.reputations = check_ip_reputation_batch(
+                row.destination_ip for row in rows if row.destination_ip
+            )
+        return super().to_representation(rows)
 
 
 class NetworkTrafficSerializer(serializers.ModelSerializer):
     """Serializer for network traffic data with optional reputation enrichment.
 
-    Pass ``?include_reputation=true`` to enable the per-row IP reputation lookup.
+    Pass ``?include_reputation=true`` to enable the IP reputation lookup;
+    lists look up all of a page's destination IPs together.
     """
 
     total_bytes = serializers.ReadOnlyField()
@@ -15,9 +28,11 @@ class NetworkTrafficSerializer(serializers.ModelSerializer):
     class Meta:
         model = NetworkTraffic
         fields = '__all__'
+        list_serializer_class = NetworkTrafficListSerializer
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.reputations = None
         request = self.context.get('request')
         if request and request.query_params.get('include_reputation') == 'true':
             self.fields['reputation'] = serializers.SerializerMethodField()
@@ -26,7 +41,10 @@ class NetworkTrafficSerializer(serializers.ModelSerializer):
         """Return abuse reputation + country for the destination IP."""
         if not obj.destination_ip:
             return None
-        data = check_ip_reputation(obj.destination_ip)
+        if self.reputations is not None and obj.destination_ip in self.reputations:
+            data = self.reputations[obj.destination_ip]
+        else:
+            data = check_ip_reputation(obj.destination_ip)
         return {
             "score": data.get("abuse_confidence_score", 0),
             "country_code": data.get("country_code", ""),
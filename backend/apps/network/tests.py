@@ -0,0 +1,55 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.network.models import NetworkTraffic
+from apps.network.search import search_q, search_query
+
+
+class SearchSemanticsTests(TestCase):
+    """``?search=`` finds the same flows in the database as in Elasticsearch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        flows = [
+            ("10.0.0.1", "8.8.8.8", "UDP", "dns"),
+            ("10.0.0.12", "192.168.1.5", "TCP", "https"),
+            ("10.0.1.7", "192.168.1.130", "TCP", "ssh"),
+            ("172.16.0.1", "10.0.0.1", "ICMP", None),
+        ]
+        NetworkTraffic.objects.bulk_create([
+            NetworkTraffic(
+                timestamp=timezone.now(), source_ip=source, destination_ip=destination,
+                source_port=1, destination_port=2, protocol=protocol, application=application,
+            )
+            for source, destination, protocol, application in flows
+        ])
+
+    def search(self, text):
+        return sorted(
+            NetworkTraffic.objects.filter(search_q(text)).values_list("source_ip", "destination_ip")
+        )
+
+    def test_an_address_matches_exactly(self):
+        self.assertEqual(self.search("10.0.0.1"), [("10.0.0.1", "8.8.8.8"), ("172.16.0.1", "10.0.0.1")])
+
+    def test_dotted_prefix_is_a_network(self):
+        self.assertEqual(len(self.search("10.0.0")), 3)
+        self.assertEqual(len(self.search("10.0.0.")), 3)
+        self.assertEqual(self.search("192.168"), [("10.0.0.12", "192.168.1.5"), ("10.0.1.7", "192.168.1.130")])
+
+    def test_cidr_networks(self):
+        self.assertEqual(self.search("192.168.1.128/25"), [("10.0.1.7", "192.168.1.130")])
+        self.assertEqual(len(self.search("10.0.0.0/23")), 4)
+        self.assertEqual(self.search("10.0.0.0/31"), [("10.0.0.1", "8.8.8.8"), ("172.16.0.1", "10.0.0.1")])
+
+    def test_text_is_a_case_insensitive_prefix(self):
+        self.assertEqual(self.search("HTTP"), [("10.0.0.12", "192.168.1.5")])
+        self.assertEqual(len(self.search("tc")), 2)
+        self.assertEqual(self.search("established"), self.search("ESTAB"))
+
+    def test_es_query_uses_the_same_split(self):
+        network = search_query("10.0.0")["bool"]["should"]
+        text = search_query("tc")["bool"]["should"]
+
+        self.assertEqual(network[0], {"term": {"source_ip": "10.0.0.0/24"}})
+        self.assertEqual(text[0], {"prefix": {"service": {"value": "tc", "case_insensitive": True}}})
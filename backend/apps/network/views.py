@@ -6,7 +6,12 @@ from django_filters import rest_framework as dj_filters
 from django.db.models import Sum, Count
 from django.utils import timezone
 from datetime import timedelta
-from .models import NetworkTraffic
+from apps.system import rollups
+from apps.system.exports import ExportMixin
+from apps.system.pagination import KeysetPagination
+from apps.system.watermarks import FLOWS, ConditionalListMixin
+from .models import NetworkTraffic, TrafficRollup
+from .search import EsFlowSearch, FlowSearchFilter, SearchBackendMixin
 from .serializers import NetworkTrafficSerializer
 
 
@@ -18,27 +23,62 @@ class NetworkTrafficFilter(dj_filters.FilterSet):
 
     date_from = dj_filters.DateTimeFilter(field_name="timestamp", lookup_expr="gte")
     date_to = dj_filters.DateTimeFilter(field_name="timestamp", lookup_expr="lte")
+    # Case-insensitive, like the Elasticsearch path's term queries.
+    protocol = dj_filters.CharFilter(field_name="protocol", lookup_expr="iexact")
+    connection_state = dj_filters.CharFilter(field_name="connection_state", lookup_expr="iexact")
 
     class Meta:
         model = NetworkTraffic
         fields = ["protocol", "source_ip", "destination_ip", "connection_state", "date_from", "date_to"]
 
 
-class NetworkTrafficViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for network traffic data."""
+class NetworkTrafficViewSet(
+    ConditionalListMixin, SearchBackendMixin, ExportMixin, viewsets.ReadOnlyModelViewSet
+):
+    """ViewSet for network traffic data.
+
+    Searched or filtered lists are answered from Elasticsearch
+    (``EsFlowSearch``) and from these filter backends only while it is
+    down; both apply the same semantics:
+
+    * ``?search=``: an IP matches either address exactly, an IPv4 CIDR or
+      dotted prefix (``10.20.``) the addresses inside it, and other text is
+      a case-insensitive prefix of ``application``, ``protocol`` or
+      ``connection_state``.
+    * ``source_ip`` / ``destination_ip``: one exact address.
+    * ``protocol`` / ``connection_state``: case-insensitive exact match.
+    * ``date_from`` / ``date_to``: inclusive timestamp bounds.
+    """
 
     queryset = NetworkTraffic.objects.all()
     serializer_class = NetworkTrafficSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    search_backend = EsFlowSearch()
+    filter_backends = [DjangoFilterBackend, FlowSearchFilter, filters.OrderingFilter]
     filterset_class = NetworkTrafficFilter
-    search_fields = ["source_ip", "destination_ip", "application"]
     ordering_fields = ["timestamp", "bytes_sent", "bytes_received"]
     ordering = ["-timestamp"]
+    watermark_datasets = (FLOWS,)
+    export_name = "network-traffic"
+    export_fields = (
+        "id", "timestamp", "source_ip", "destination_ip", "source_port", "destination_port",
+        "protocol", "bytes_sent", "bytes_received", "packets_sent", "packets_received",
+        "connection_state", "duration", "application", "country_code",
+    )
     
     @action(detail=False, methods=['get'])
     def protocols(self, request):
         """Get protocol distribution."""
         last_24h = timezone.now() - timedelta(hours=24)
+        if rollups.rollups_cover(TrafficRollup, last_24h):
+            rows = sorted(
+                rollups.traffic_by('protocol', last_24h), key=lambda r: r['bytes'], reverse=True
+            )
+            return Response([
+                {'protocol': r['key'], 'count': r['flows'], 'total_bytes': r['bytes']}
+                for r in rows
+            ])
+
         from django.db.models import F
         protocols = NetworkTraffic.objects.filter(
             timestamp__gte=last_24h
@@ -53,7 +93,20 @@ class NetworkTrafficViewSet(viewsets.ReadOnlyModelViewSet):
         """Get connection statistics."""
         now = timezone.now()
         last_24h = now - timedelta(hours=24)
-        
+        last_5m = now - timedelta(minutes=5)
+
+        if rollups.rollups_cover(TrafficRollup, last_24h):
+            return Response({
+                'by_state': [
+                    {'connection_state': r['key'], 'count': r['flows']}
+                    for r in rollups.traffic_by('connection_state', last_24h)
+                ],
+                'active': sum(
+                    r['flows'] for r in rollups.traffic_by('connection_state', last_5m)
+                    if r['key'] == 'ESTABLISHED'
+                ),
+            })
+
         connections = NetworkTraffic.objects.filter(
             timestamp__gte=last_24h
         ).values('connection_state').annotate(
@@ -63,7 +116,7 @@ class NetworkTrafficViewSet(viewsets.ReadOnlyModelViewSet):
         return Response({
             'by_state': list(connections),
             'active': NetworkTraffic.objects.filter(
-                timestamp__gte=now - timedelta(minutes=5),
+                timestamp__gte=last_5m,
                 connection_state='ESTABLISHED'
             ).count(),
         })
@@ -0,0 +1,104 @@
+"""
+Database answers for the stats panels while Elasticsearch is unavailable.
+
+Each function returns the same shape as its panel's Elasticsearch parser,
+reading the rollups when they cover the range (``rollups.rollups_cover``)
+and the raw ``network_traffic`` / ``security_alerts`` rows otherwise.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from apps.alerts.models import SecurityAlert
+from apps.network.models import NetworkTraffic, TrafficRollup
+from apps.system import rollups
+from apps.system.ingest import map_severity
+
+FLOW_BYTES = F("bytes_sent") + F("bytes_received")
+
+
+def _trunc(hours: int):
+    return TruncHour if hours <= 7 * 24 else TruncDay
+
+
+def protocols(hours: int) -> list[dict]:
+    since = timezone.now() - timedelta(hours=hours)
+    if rollups.rollups_cover(TrafficRollup, since):
+        rows = [
+            {"protocol": r["key"] or "OTHER", "count": r["flows"], "total_bytes": r["bytes"]}
+            for r in rollups.traffic_by("protocol", since)
+        ]
+    else:
+        rows = [
+            {"protocol": r["protocol"] or "OTHER", "count": r["count"], "total_bytes": r["total_bytes"] or 0}
+            for r in NetworkTraffic.objects.filter(timestamp__gte=since)
+            .values("protocol")
+            .annotate(count=Count("id"), total_bytes=Sum(FLOW_BYTES))
+            .order_by()
+        ]
+    return sorted(rows, key=lambda r: r["count"], reverse=True)[:20]
+
+
+def traffic(hours: int) -> list[dict]:
+    since = timezone.now() - timedelta(hours=hours)
+    if hours <= 7 * 24 and rollups.rollups_cover(TrafficRollup, since):
+        return [
+            {"time": r["hour"].isoformat(), "bytes": r["bytes"], "count": r["flows"]}
+            for r in rollups.traffic_hourly(since)
+        ]
+    return [
+        {"time": r["time"].isoformat(), "bytes": r["bytes"] or 0, "count": r["count"]}
+        for r in NetworkTraffic.objects.filter(timestamp__gte=since)
+        .annotate(time=_trunc(hours)("timestamp"))
+        .values("time")
+        .annotate(bytes=Sum(FLOW_BYTES), count=Count("id"))
+        .order_by("time")
+    ]
+
+
+def alert_trends(hours: int) -> dict:
+    since = timezone.now() - timedelta(hours=hours)
+    alerts = SecurityAlert.objects.filter(timestamp__gte=since)
+    return {
+        "by_severity": [
+            {"severity": r["severity"], "count": r["count"]}
+            for r in alerts.values("severity").annotate(count=Count("id")).order_by("-count")
+        ],
+        "by_category": [
+            {"category": r["alert_type"], "count": r["count"]}
+            for r in alerts.values("alert_type").annotate(count=Count("id")).order_by("-count")[:20]
+        ],
+        "timeline": [
+            {"time": r["time"].isoformat(), "count": r["count"]}
+            for r in alerts.annotate(time=_trunc(hours)("timestamp"))
+            .values("time")
+            .annotate(count=Count("id"))
+            .order_by("time")
+        ],
+    }
+
+
+def alerts(limit: int, severity: str | None) -> list[dict]:
+    qs = SecurityAlert.objects.filter(timestamp__gte=timezone.now() - timedelta(days=7))
+    if severity:
+        # The ES endpoint filters on Suricata's numeric severity
+        qs = qs.filter(severity=map_severity(severity) if severity.isdigit() else severity)
+    return [
+        {
+            "id": a.id,
+            "timestamp": a.timestamp.isoformat(),
+            "source_ip": a.source_ip,
+            "destination_ip": a.destination_ip,
+            "source_port": a.source_port,
+            "destination_port": a.destination_port,
+            "protocol": a.protocol,
+            "signature": a.signature,
+            "signature_id": a.rule_id,
+            "severity": a.severity,
+            "category": a.alert_type,
+        }
+        for a in qs.order_by("-timestamp")[:limit]
+    ]
@@ -5,8 +5,12 @@ urlpatterns = [
     path("protocols/", views.protocol_stats, name="stats_protocols"),
     path("traffic/", views.traffic_stats, name="stats_traffic"),
     path("alerts/", views.alerts_from_es, name="stats_alerts"),
+    path("alerts/trends/", views.alert_trends, name="stats_alert_trends"),
+    path("bundle/", views.stats_bundle, name="stats_bundle"),
+    path("export/", views.export_documents, name="stats_export"),
     path("siem/overview/", views.siem_overview, name="siem_overview"),
     path("siem/alerts/", views.siem_alerts, name="siem_alerts"),
     path("siem/mitre/", views.siem_mitre, name="siem_mitre"),
     path("siem/fim/", views.siem_fim, name="siem_fim"),
+    path("siem/bundle/", views.siem_bundle, name="siem_bundle"),
 ]
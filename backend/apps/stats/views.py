@@ -3,164 +3,253 @@ Elasticsearch-backed statistics endpoints.
 
 These views aggregate Zeek / Suricata data stored in Elasticsearch
 and expose them as lightweight JSON responses for the dashboard.
+Responses are cached per time bucket (``TIME_BUCKETS``) and query, so
+identical requests within a bucket share one backend query, and carry
+ETag / Last-Modified validators from the ingest watermarks so unchanged
+polls get a 304.  The Wazuh data is written outside this application, so
+the SIEM views are only bucket-cached.
 """
 
 import logging
 from datetime import timedelta
-
-from decouple import config
+from typing import Callable, NamedTuple
 
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.system.elasticsearch_client import get_es_client
+from apps.stats import fallbacks
+from apps.system.caching import mark_degraded, time_bucketed
+from apps.system.circuit_breaker import CircuitOpenError
+from apps.system.watermarks import ALERTS, FLOWS, conditional
+from apps.system.elasticsearch_client import get_es_client, get_es_router
+from apps.system.exports import FORMATS, es_rows, export_filename, export_options, export_response
+from apps.system.es_transforms import ALERTS_SUMMARY_INDEX, FLOWS_SUMMARY_INDEX, use_summary
+from apps.system.wazuh_client import WAZUH_INDEX, get_wazuh_client
 
 logger = logging.getLogger(__name__)
 
-import requests as http_requests
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
-
-http_requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
-
 ZEEK_INDEX = "network-flows-*"
 SURICATA_INDEX = "security-alerts-*"
 
-WAZUH_INDEXER = config("WAZUH_INDEXER_URL", default="https://host.docker.internal:9201")
-WAZUH_AUTH = (config("WAZUH_INDEXER_USER", default="admin"),
-              config("WAZUH_INDEXER_PASS", default="SecretPassword"))
-WAZUH_INDEX = "wazuh-alerts-4.x-*"
-
-BYTES_SCRIPT = """
-    if (doc.containsKey('bytes') && !doc['bytes'].empty) {
-        return doc['bytes'].value;
-    } else {
-        long orig = doc.containsKey('orig_bytes') && !doc['orig_bytes'].empty ? doc['orig_bytes'].value : 0;
-        long resp = doc.containsKey('resp_bytes') && !doc['resp_bytes'].empty ? doc['resp_bytes'].value : 0;
-        return orig + resp;
-    }
-"""
 
+RANGE_UNITS = {"h": 1, "d": 24}
+MAX_RANGE_HOURS = 90 * 24
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def protocol_stats(request):
-    """
-    GET /api/stats/protocols
 
-    Aggregate Zeek logs to show protocol distribution over the last 24 hours.
-    Returns: [{protocol, count, total_bytes}, ...]
-    """
-    es = get_es_client()
+def _range_hours(params, default: str = "24h") -> int:
+    """Parse ``?range=`` (``24h``, ``7d``, ``30d`` ...) into hours, capped at 90 days."""
+    value = params.get("range", default).strip().lower()
     try:
-        body = {
-            "size": 0,
-            "query": {"range": {"@timestamp": {"gte": "now-24h"}}},
-            "aggs": {
-                "by_protocol": {
-                    "terms": {"field": "proto", "size": 20, "missing": "OTHER"},
-                    "aggs": {
-                        "total_bytes": {
-                            "sum": {"script": {"source": BYTES_SCRIPT, "lang": "painless"}}
-                        }
-                    },
-                }
-            },
-        }
-        resp = es.search(index=ZEEK_INDEX, body=body)
-        buckets = resp["aggregations"]["by_protocol"]["buckets"]
-        data = [
+        hours = int(value[:-1]) * RANGE_UNITS[value[-1]]
+    except (KeyError, ValueError, IndexError):
+        hours = 24
+    return max(1, min(hours, MAX_RANGE_HOURS))
+
+
+def _histogram_interval(hours: int) -> str:
+    return "1h" if hours <= 7 * 24 else "1d"
+
+
+# (longest range in hours, ES date-math rounding, cache seconds).  Ranges
+# start on a rounded boundary so every request in a bucket sends the same
+# query; long ranges round to the hour but are cached for five minutes, as
+# the hourly summaries move that often.
+TIME_BUCKETS = ((48, "m", 60), (MAX_RANGE_HOURS, "h", 300))
+
+
+def _time_bucket(hours: int) -> tuple[str, int]:
+    for limit, unit, secs in TIME_BUCKETS:
+        if hours <= limit:
+            return unit, secs
+    return TIME_BUCKETS[-1][1:]
+
+
+def _since(hours: int) -> str:
+    return f"now-{hours}h/{_time_bucket(hours)[0]}"
+
+
+def _query_key(query) -> dict:
+    """Query parameters as a cache key: stripped, with ``panels`` order-free."""
+    params = {k: query.get(k, "").strip() for k in query}
+    if "panels" in params:
+        params["panels"] = ",".join(sorted({p.strip() for p in params["panels"].split(",") if p.strip()}))
+    return params
+
+
+def _range_key(default: str):
+    """Like ``_query_key`` with ``range`` normalised to hours (``1d`` == ``24h``)."""
+    def key_params(query) -> dict:
+        params = _query_key(query)
+        params["range"] = _range_hours(query, default)
+        return params
+    return key_params
+
+
+def _range_bucket_secs(params: dict) -> int:
+    return _time_bucket(params["range"])[1]
+
+
+def _minute_bucket(params: dict) -> int:
+    return 60
+
+
+class Panel(NamedTuple):
+    """One Elasticsearch search and how to turn its response into JSON.
+
+    ``fallback`` answers the panel from the database when Elasticsearch is
+    unavailable; panels without one return ``empty``.
+    """
+    index: str
+    body: dict
+    parse: Callable[[dict], object]
+    empty: object
+    fallback: Callable[[], object] | None = None
+
+
+def _protocols_panel(params) -> Panel:
+    hours = _range_hours(params)
+    summary = use_summary(hours)
+    aggs = {"total_bytes": {"sum": {"field": "bytes"}}}
+    if summary:
+        aggs["flows"] = {"sum": {"field": "flows"}}
+    body = {
+        "size": 0,
+        "query": {"range": {"hour" if summary else "@timestamp": {"gte": _since(hours)}}},
+        "aggs": {
+            "by_protocol": {
+                "terms": {"field": "proto", "size": 20, "missing": "OTHER"},
+                "aggs": aggs,
+            }
+        },
+    }
+
+    def parse(resp):
+        return [
             {
                 "protocol": b["key"],
-                "count": b["doc_count"],
+                "count": int(b["flows"]["value"] or 0) if summary else b["doc_count"],
                 "total_bytes": int(b["total_bytes"]["value"] or 0),
             }
-            for b in buckets
+            for b in resp["aggregations"]["by_protocol"]["buckets"]
         ]
-        return Response(data)
-    except Exception as exc:
-        logger.error("ES protocol_stats failed: %s", exc, exc_info=True)
-        return Response([], status=200)
 
+    return Panel(
+        FLOWS_SUMMARY_INDEX if summary else ZEEK_INDEX, body, parse, [],
+        fallback=lambda: fallbacks.protocols(hours),
+    )
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def traffic_stats(request):
-    """
-    GET /api/stats/traffic
 
-    Time-series data for bandwidth usage over the last 24 hours,
-    bucketed in 1-hour intervals.
-    Returns: [{time, bytes, count}, ...]
-    """
-    es = get_es_client()
-    try:
-        body = {
-            "size": 0,
-            "query": {"range": {"@timestamp": {"gte": "now-24h"}}},
-            "aggs": {
-                "timeline": {
-                    "date_histogram": {
-                        "field": "@timestamp",
-                        "fixed_interval": "1h",
-                        "min_doc_count": 0,
-                        "extended_bounds": {
-                            "min": "now-24h",
-                            "max": "now",
-                        },
+def _traffic_panel(params) -> Panel:
+    hours = _range_hours(params)
+    summary = use_summary(hours)
+    aggs = {"bytes": {"sum": {"field": "bytes"}}}
+    if summary:
+        aggs["flows"] = {"sum": {"field": "flows"}}
+    time_field = "hour" if summary else "@timestamp"
+    body = {
+        "size": 0,
+        "query": {"range": {time_field: {"gte": _since(hours)}}},
+        "aggs": {
+            "timeline": {
+                "date_histogram": {
+                    "field": time_field,
+                    "fixed_interval": _histogram_interval(hours),
+                    "min_doc_count": 0,
+                    "extended_bounds": {
+                        "min": _since(hours),
+                        "max": "now",
                     },
-                    "aggs": {
-                        "bytes": {
-                            "sum": {"script": {"source": BYTES_SCRIPT, "lang": "painless"}}
-                        }
-                    },
-                }
-            },
-        }
-        resp = es.search(index=ZEEK_INDEX, body=body)
-        buckets = resp["aggregations"]["timeline"]["buckets"]
-        data = [
+                },
+                "aggs": aggs,
+            }
+        },
+    }
+
+    def parse(resp):
+        return [
             {
                 "time": b["key_as_string"],
                 "bytes": int(b["bytes"]["value"] or 0),
-                "count": b["doc_count"],
+                "count": int(b["flows"]["value"] or 0) if summary else b["doc_count"],
             }
-            for b in buckets
+            for b in resp["aggregations"]["timeline"]["buckets"]
         ]
-        return Response(data)
-    except Exception as exc:
-        logger.error("ES traffic_stats failed: %s", exc, exc_info=True)
-        return Response([], status=200)
 
+    return Panel(
+        FLOWS_SUMMARY_INDEX if summary else ZEEK_INDEX, body, parse, [],
+        fallback=lambda: fallbacks.traffic(hours),
+    )
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def alerts_from_es(request):
-    """
-    GET /api/stats/alerts
 
-    Fetches the latest Suricata security alerts from Elasticsearch.
-    Supports query params: severity, limit (default 50).
-    """
-    es = get_es_client()
-    limit = int(request.query_params.get("limit", 50))
-    severity_filter = request.query_params.get("severity")
+def _alert_trends_panel(params) -> Panel:
+    hours = _range_hours(params, default="7d")
+    summary = use_summary(hours)
+    if summary:
+        time_field, severity_field, category_field = "hour", "severity", "category"
+        count = {"count": {"sum": {"field": "count"}}}
+    else:
+        time_field, severity_field, category_field = "@timestamp", "alert.severity", "alert.category"
+        count = {}
+
+    def _count(bucket) -> int:
+        return int(bucket["count"]["value"] or 0) if summary else bucket["doc_count"]
+
+    body = {
+        "size": 0,
+        "query": {"range": {time_field: {"gte": _since(hours)}}},
+        "aggs": {
+            "by_severity": {"terms": {"field": severity_field, "size": 10}, "aggs": count},
+            "by_category": {"terms": {"field": category_field, "size": 20}, "aggs": count},
+            "timeline": {
+                "date_histogram": {
+                    "field": time_field,
+                    "fixed_interval": _histogram_interval(hours),
+                    "min_doc_count": 0,
+                    "extended_bounds": {"min": _since(hours), "max": "now"},
+                },
+                "aggs": count,
+            },
+        },
+    }
 
-    try:
-        must = [{"range": {"@timestamp": {"gte": "now-7d"}}}]
-        if severity_filter:
-            must.append({"term": {"alert.severity": severity_filter}})
-
-        body = {
-            "size": limit,
-            "query": {"bool": {"must": must}},
-            "sort": [{"@timestamp": {"order": "desc"}}],
+    def parse(resp):
+        aggs = resp["aggregations"]
+        return {
+            "by_severity": [
+                {"severity": b["key"], "count": _count(b)} for b in aggs["by_severity"]["buckets"]
+            ],
+            "by_category": [
+                {"category": b["key"], "count": _count(b)} for b in aggs["by_category"]["buckets"]
+            ],
+            "timeline": [
+                {"time": b["key_as_string"], "count": _count(b)} for b in aggs["timeline"]["buckets"]
+            ],
         }
-        resp = es.search(index=SURICATA_INDEX, body=body)
-        hits = resp.get("hits", {}).get("hits", [])
+
+    empty = {"by_severity": [], "by_category": [], "timeline": []}
+    return Panel(
+        ALERTS_SUMMARY_INDEX if summary else SURICATA_INDEX, body, parse, empty,
+        fallback=lambda: fallbacks.alert_trends(hours),
+    )
+
+
+def _alerts_panel(params) -> Panel:
+    limit = int(params.get("limit", 50))
+    severity_filter = params.get("severity")
+    must = [{"range": {"@timestamp": {"gte": "now-7d/m"}}}]
+    if severity_filter:
+        must.append({"term": {"alert.severity": severity_filter}})
+    body = {
+        "size": limit,
+        "query": {"bool": {"must": must}},
+        "sort": [{"@timestamp": {"order": "desc"}}],
+    }
+
+    def parse(resp):
         data = []
-        for hit in hits:
+        for hit in resp.get("hits", {}).get("hits", []):
             src = hit["_source"]
             alert_info = src.get("alert", {})
             data.append(
@@ -178,133 +267,331 @@ def alerts_from_es(request):
                     "category": alert_info.get("category"),
                 }
             )
-        return Response(data)
+        return data
+
+    return Panel(
+        SURICATA_INDEX, body, parse, [],
+        fallback=lambda: fallbacks.alerts(limit, severity_filter),
+    )
+
+
+PANELS = {
+    "protocols": _protocols_panel,
+    "traffic": _traffic_panel,
+    "alert_trends": _alert_trends_panel,
+    "alerts": _alerts_panel,
+}
+
+
+def _fallback(name: str, panel: Panel):
+    if panel.fallback is None:
+        return panel.empty
+    try:
+        return panel.fallback()
     except Exception as exc:
-        logger.error("ES alerts_from_es failed: %s", exc, exc_info=True)
-        return Response([], status=200)
+        logger.error("Fallback for %s failed: %s", name, exc, exc_info=True)
+        return panel.empty
 
 
-# ---------------------------------------------------------------------------
-# Wazuh SIEM endpoints — proxy data from the Wazuh Indexer (OpenSearch)
-# ---------------------------------------------------------------------------
+def _panel_response(name: str, request) -> Response:
+    """Run one panel on its own, falling back to the database if ES is unavailable."""
+    try:
+        panel = PANELS[name](request.query_params)
+    except Exception as exc:
+        logger.error("ES %s stats failed: %s", name, exc, exc_info=True)
+        return mark_degraded(Response([], status=200))
+    try:
+        resp = get_es_router().call(lambda es: es.search(index=panel.index, body=panel.body))
+        return Response(panel.parse(resp))
+    except CircuitOpenError:
+        pass
+    except Exception as exc:
+        logger.error("ES %s stats failed: %s", name, exc, exc_info=True)
+    return mark_degraded(Response(_fallback(name, panel), status=200))
 
-def _wazuh_query(body: dict, index: str = WAZUH_INDEX) -> dict:
-    """Run an ES query against the Wazuh Indexer and return the raw response."""
-    r = http_requests.post(
-        f"{WAZUH_INDEXER}/{index}/_search",
-        auth=WAZUH_AUTH,
-        json=body,
-        verify=False,
-        timeout=10,
-    )
-    r.raise_for_status()
-    return r.json()
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional((FLOWS,), _range_key("24h"), _range_bucket_secs)
+@time_bucketed("stats_protocols", _range_key("24h"), _range_bucket_secs)
+def protocol_stats(request):
+    """
+    GET /api/stats/protocols?range=24h
+
+    Aggregate Zeek logs to show protocol distribution over ``range``
+    (default 24h).  Ranges beyond ``ES_SUMMARY_HORIZON_HOURS`` are read from
+    the hourly summary index.
+    Returns: [{protocol, count, total_bytes}, ...]
+    """
+    return _panel_response("protocols", request)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def siem_overview(request):
+@conditional((FLOWS,), _range_key("24h"), _range_bucket_secs)
+@time_bucketed("stats_traffic", _range_key("24h"), _range_bucket_secs)
+def traffic_stats(request):
     """
-    GET /api/stats/siem/overview/
+    GET /api/stats/traffic?range=24h
 
-    Returns summary counts and a timeline for the Wazuh SIEM dashboard card.
+    Time-series data for bandwidth usage over ``range`` (default 24h),
+    bucketed hourly up to 7 days and daily beyond.  Ranges beyond
+    ``ES_SUMMARY_HORIZON_HOURS`` are read from the hourly summary index.
+    Returns: [{time, bytes, count}, ...]
     """
-    try:
-        body = {
-            "size": 0,
-            "query": {"range": {"@timestamp": {"gte": "now-24h"}}},
-            "aggs": {
-                "total": {"value_count": {"field": "@timestamp"}},
-                "critical": {
-                    "filter": {"range": {"rule.level": {"gte": 12}}}
-                },
-                "auth_fail": {
-                    "filter": {"terms": {"rule.groups": ["authentication_failed"]}}
-                },
-                "syscheck": {
-                    "filter": {"terms": {"rule.groups": ["syscheck"]}}
-                },
-                "timeline": {
-                    "date_histogram": {
-                        "field": "@timestamp",
-                        "fixed_interval": "1h",
-                        "min_doc_count": 0,
-                        "extended_bounds": {"min": "now-24h", "max": "now"},
-                    }
-                },
-                "by_level": {
-                    "range": {
-                        "field": "rule.level",
-                        "ranges": [
-                            {"key": "low", "from": 0, "to": 4},
-                            {"key": "medium", "from": 4, "to": 8},
-                            {"key": "high", "from": 8, "to": 12},
-                            {"key": "critical", "from": 12},
-                        ],
-                    }
-                },
-                "top_rules": {
-                    "terms": {"field": "rule.description", "size": 5}
-                },
-            },
-        }
-        resp = _wazuh_query(body)
-        aggs = resp.get("aggregations", {})
+    return _panel_response("traffic", request)
 
-        timeline = [
-            {"time": b["key_as_string"], "count": b["doc_count"]}
-            for b in aggs.get("timeline", {}).get("buckets", [])
-        ]
-        severity = {
-            b["key"]: b["doc_count"]
-            for b in aggs.get("by_level", {}).get("buckets", [])
-        }
-        top_rules = [
-            {"rule": b["key"], "count": b["doc_count"]}
-            for b in aggs.get("top_rules", {}).get("buckets", [])
-        ]
 
-        return Response({
-            "total_alerts": aggs.get("total", {}).get("value", 0),
-            "critical_alerts": aggs.get("critical", {}).get("doc_count", 0),
-            "auth_failures": aggs.get("auth_fail", {}).get("doc_count", 0),
-            "file_integrity": aggs.get("syscheck", {}).get("doc_count", 0),
-            "timeline": timeline,
-            "severity": severity,
-            "top_rules": top_rules,
-        })
-    except Exception as exc:
-        logger.error("siem_overview failed: %s", exc, exc_info=True)
-        return Response({"total_alerts": 0, "critical_alerts": 0,
-                         "auth_failures": 0, "file_integrity": 0,
-                         "timeline": [], "severity": {}, "top_rules": []})
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional((ALERTS,), _range_key("7d"), _range_bucket_secs)
+@time_bucketed("stats_alert_trends", _range_key("7d"), _range_bucket_secs)
+def alert_trends(request):
+    """
+    GET /api/stats/alerts/trends/?range=7d
+
+    Suricata alert counts by severity and category plus a timeline over
+    ``range`` (default 7d), from the hourly summary index when the range is
+    beyond ``ES_SUMMARY_HORIZON_HOURS``.
+    Returns: {by_severity: [{severity, count}], by_category: [{category, count}],
+              timeline: [{time, count}]}
+    """
+    return _panel_response("alert_trends", request)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def siem_alerts(request):
+@conditional((ALERTS,), _query_key, _minute_bucket)
+@time_bucketed("stats_alerts", _query_key, _minute_bucket)
+def alerts_from_es(request):
     """
-    GET /api/stats/siem/alerts/?limit=50&level=10
+    GET /api/stats/alerts
 
-    Recent Wazuh alerts, optionally filtered by minimum rule level.
+    Fetches the latest Suricata security alerts from Elasticsearch.
+    Supports query params: severity, limit (default 50).
     """
-    limit = int(request.query_params.get("limit", 50))
-    min_level = request.query_params.get("level")
+    return _panel_response("alerts", request)
 
-    try:
-        must = [{"range": {"@timestamp": {"gte": "now-24h"}}}]
-        if min_level:
-            must.append({"range": {"rule.level": {"gte": int(min_level)}}})
-
-        body = {
-            "size": limit,
-            "query": {"bool": {"must": must}},
-            "sort": [{"@timestamp": {"order": "desc"}}],
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@conditional((FLOWS, ALERTS), _range_key("24h"), _range_bucket_secs)
+@time_bucketed("stats_bundle", _range_key("24h"), _range_bucket_secs)
+def stats_bundle(request):
+    """
+    GET /api/stats/bundle/?panels=protocols,traffic,alerts&range=24h
+
+    Several stats panels in one response, fetched with a single ``_msearch``.
+    Panel names are the keys of ``PANELS``; the query parameters of the
+    individual endpoints (``range``, ``limit``, ``severity``) apply to every
+    panel that takes them.  Defaults to all panels.  Panels whose search
+    fails, or all of them while the ES circuit is open, are answered from
+    the database.
+    Returns: {panels: {name: data}, errors: {name: message}, fallback: [name]}
+    """
+    return _bundle_response(request, PANELS, _es_msearch)
+
+
+def _es_msearch(searches: list[tuple[str, dict]]) -> list[dict]:
+    body = []
+    for index, query in searches:
+        body.extend([{"index": index}, query])
+    return get_es_router().call(lambda es: es.msearch(searches=body))["responses"]
+
+
+def _bundle_response(request, registry: dict, msearch) -> Response:
+    """Answer ``?panels=`` from ``registry`` with one ``msearch`` call.
+
+    Returns {panels: {name: data}, errors: {name: message}, fallback: [name]}.
+    A failed panel is answered by its database fallback when it has one
+    (listed in ``fallback``), otherwise it is reported in ``errors`` and
+    still appears in ``panels`` with its empty value.
+    """
+    requested = request.query_params.get("panels")
+    names = [n.strip() for n in requested.split(",") if n.strip()] if requested else list(registry)
+    names = list(dict.fromkeys(names))
+
+    data, errors, used_fallback, planned = {}, {}, [], []
+    for name in names:
+        if name not in registry:
+            errors[name] = "unknown panel"
+            continue
+        try:
+            planned.append((name, registry[name](request.query_params)))
+        except Exception as exc:
+            errors[name] = str(exc)
+            data[name] = []
+
+    if planned:
+        try:
+            responses = msearch([(panel.index, panel.body) for _, panel in planned])
+        except Exception as exc:
+            if not isinstance(exc, CircuitOpenError):
+                logger.error("Bundled search failed: %s", exc, exc_info=True)
+            responses = [{"error": {"reason": str(exc)}}] * len(planned)
+
+        for (name, panel), resp in zip(planned, responses):
+            if "error" not in resp:
+                try:
+                    data[name] = panel.parse(resp)
+                    continue
+                except Exception as exc:
+                    logger.error("Bundled panel %s failed: %s", name, exc, exc_info=True)
+                    resp = {"error": {"reason": str(exc)}}
+            if panel.fallback is not None:
+                data[name] = _fallback(name, panel)
+                used_fallback.append(name)
+                continue
+            error = resp["error"]
+            errors[name] = error.get("reason", str(error)) if isinstance(error, dict) else str(error)
+            data[name] = panel.empty
+
+    response = Response({"panels": data, "errors": errors, "fallback": used_fallback})
+    return mark_degraded(response) if errors or used_fallback else response
+
+
+# Per dataset: index pattern, CSV columns, and ``?param`` -> ES field filters
+EXPORTS = {
+    "flows": (
+        ZEEK_INDEX,
+        ("@timestamp", "source_ip", "source_port", "destination_ip", "destination_port",
+         "proto", "service", "conn_state", "duration", "bytes", "orig_bytes", "resp_bytes",
+         "packets_sent", "packets_received", "direction"),
+        {"source_ip": "source_ip", "destination_ip": "destination_ip", "protocol": "proto"},
+    ),
+    "alerts": (
+        SURICATA_INDEX,
+        ("@timestamp", "source_ip", "source_port", "destination_ip", "destination_port",
+         "proto", "alert.signature", "alert.signature_id", "alert.severity", "alert.category"),
+        {"source_ip": "source_ip", "destination_ip": "destination_ip", "protocol": "proto",
+         "severity": "alert.severity"},
+    ),
+}
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_documents(request):
+    """
+    GET /api/stats/export/?dataset=flows&range=24h&fmt=csv&gzip=1
+
+    Streams every Elasticsearch document of ``dataset`` (``flows`` or
+    ``alerts``) in ``range`` as NDJSON (default) or CSV, oldest first,
+    through a point-in-time with ``search_after``.  ``source_ip``,
+    ``destination_ip``, ``protocol`` and, for alerts, ``severity`` filter
+    exactly.  ``date_from`` / ``date_to`` (ISO) override ``range``.
+    """
+    dataset = request.query_params.get("dataset", "flows")
+    fmt, compress = export_options(request)
+    if dataset not in EXPORTS or fmt not in FORMATS:
+        return Response(
+            {"error": f"dataset must be one of {', '.join(EXPORTS)}; fmt one of {', '.join(FORMATS)}"},
+            status=400,
+        )
+    if not get_es_router().available():
+        return Response({"error": "Elasticsearch is unavailable"}, status=503)
+
+    index, fields, filters = EXPORTS[dataset]
+    params = request.query_params
+    time_range = {"gte": params.get("date_from") or f"now-{_range_hours(params)}h"}
+    if params.get("date_to"):
+        time_range["lte"] = params["date_to"]
+    query_filters = [{"range": {"@timestamp": time_range}}]
+    for param, field in filters.items():
+        if params.get(param):
+            query_filters.append({"term": {field: params[param]}})
+
+    es = get_es_client().options(request_timeout=30)
+    rows = es_rows(es, index, {"bool": {"filter": query_filters}})
+    return export_response(request, rows, fmt, fields, export_filename(f"{dataset}-es"), compress)
+
+
+# ---------------------------------------------------------------------------
+# Wazuh SIEM endpoints — proxy data from the Wazuh Indexer (OpenSearch)
+# ---------------------------------------------------------------------------
+
+def _siem_overview_panel(params) -> Panel:
+    body = {
+        "size": 0,
+        "query": {"range": {"@timestamp": {"gte": "now-24h/m"}}},
+        "aggs": {
+            "total": {"value_count": {"field": "@timestamp"}},
+            "critical": {
+                "filter": {"range": {"rule.level": {"gte": 12}}}
+            },
+            "auth_fail": {
+                "filter": {"terms": {"rule.groups": ["authentication_failed"]}}
+            },
+            "syscheck": {
+                "filter": {"terms": {"rule.groups": ["syscheck"]}}
+            },
+            "timeline": {
+                "date_histogram": {
+                    "field": "@timestamp",
+                    "fixed_interval": "1h",
+                    "min_doc_count": 0,
+                    "extended_bounds": {"min": "now-24h/m", "max": "now"},
+                }
+            },
+            "by_level": {
+                "range": {
+                    "field": "rule.level",
+                    "ranges": [
+                        {"key": "low", "from": 0, "to": 4},
+                        {"key": "medium", "from": 4, "to": 8},
+                        {"key": "high", "from": 8, "to": 12},
+                        {"key": "critical", "from": 12},
+                    ],
+                }
+            },
+            "top_rules": {
+                "terms": {"field": "rule.description", "size": 5}
+            },
+        },
+    }
+
+    def parse(resp):
+        aggs = resp.get("aggregations", {})
+        return {
+            "total_alerts": aggs.get("total", {}).get("value", 0),
+            "critical_alerts": aggs.get("critical", {}).get("doc_count", 0),
+            "auth_failures": aggs.get("auth_fail", {}).get("doc_count", 0),
+            "file_integrity": aggs.get("syscheck", {}).get("doc_count", 0),
+            "timeline": [
+                {"time": b["key_as_string"], "count": b["doc_count"]}
+                for b in aggs.get("timeline", {}).get("buckets", [])
+            ],
+            "severity": {
+                b["key"]: b["doc_count"]
+                for b in aggs.get("by_level", {}).get("buckets", [])
+            },
+            "top_rules": [
+                {"rule": b["key"], "count": b["doc_count"]}
+                for b in aggs.get("top_rules", {}).get("buckets", [])
+            ],
         }
-        resp = _wazuh_query(body)
-        hits = resp.get("hits", {}).get("hits", [])
+
+    empty = {"total_alerts": 0, "critical_alerts": 0,
+             "auth_failures": 0, "file_integrity": 0,
+             "timeline": [], "severity": {}, "top_rules": []}
+    return Panel(WAZUH_INDEX, body, parse, empty)
+
+
+def _siem_alerts_panel(params) -> Panel:
+    limit = int(params.get("limit", 50))
+    min_level = params.get("level")
+    must = [{"range": {"@timestamp": {"gte": "now-24h/m"}}}]
+    if min_level:
+        must.append({"range": {"rule.level": {"gte": int(min_level)}}})
+    body = {
+        "size": limit,
+        "query": {"bool": {"must": must}},
+        "sort": [{"@timestamp": {"order": "desc"}}],
+    }
+
+    def parse(resp):
         data = []
-        for h in hits:
+        for h in resp.get("hits", {}).get("hits", []):
             src = h["_source"]
             rule = src.get("rule", {})
             agent = src.get("agent", {})
@@ -324,42 +611,33 @@ def siem_alerts(request):
                 "src_ip": src.get("data", {}).get("srcip"),
                 "location": src.get("location"),
             })
-        return Response(data)
-    except Exception as exc:
-        logger.error("siem_alerts failed: %s", exc, exc_info=True)
-        return Response([])
+        return data
 
+    return Panel(WAZUH_INDEX, body, parse, [])
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def siem_mitre(request):
-    """
-    GET /api/stats/siem/mitre/
 
-    MITRE ATT&CK tactic/technique aggregation from Wazuh alerts.
-    """
-    try:
-        body = {
-            "size": 0,
-            "query": {
-                "bool": {
-                    "must": [{"range": {"@timestamp": {"gte": "now-24h"}}}],
-                    "filter": [{"exists": {"field": "rule.mitre.id"}}],
-                }
+def _siem_mitre_panel(params) -> Panel:
+    body = {
+        "size": 0,
+        "query": {
+            "bool": {
+                "must": [{"range": {"@timestamp": {"gte": "now-24h/m"}}}],
+                "filter": [{"exists": {"field": "rule.mitre.id"}}],
+            }
+        },
+        "aggs": {
+            "tactics": {
+                "terms": {"field": "rule.mitre.tactic", "size": 20}
             },
-            "aggs": {
-                "tactics": {
-                    "terms": {"field": "rule.mitre.tactic", "size": 20}
-                },
-                "techniques": {
-                    "terms": {"field": "rule.mitre.technique", "size": 20}
-                },
+            "techniques": {
+                "terms": {"field": "rule.mitre.technique", "size": 20}
             },
-        }
-        resp = _wazuh_query(body)
-        aggs = resp.get("aggregations", {})
+        },
+    }
 
-        return Response({
+    def parse(resp):
+        aggs = resp.get("aggregations", {})
+        return {
             "tactics": [
                 {"tactic": b["key"], "count": b["doc_count"]}
                 for b in aggs.get("tactics", {}).get("buckets", [])
@@ -368,49 +646,40 @@ def siem_mitre(request):
                 {"technique": b["key"], "count": b["doc_count"]}
                 for b in aggs.get("techniques", {}).get("buckets", [])
             ],
-        })
-    except Exception as exc:
-        logger.error("siem_mitre failed: %s", exc, exc_info=True)
-        return Response({"tactics": [], "techniques": []})
+        }
 
+    return Panel(WAZUH_INDEX, body, parse, {"tactics": [], "techniques": []})
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def siem_fim(request):
-    """
-    GET /api/stats/siem/fim/
 
-    File Integrity Monitoring summary from Wazuh alerts.
-    """
-    try:
-        body = {
-            "size": 0,
-            "query": {
-                "bool": {
-                    "must": [{"range": {"@timestamp": {"gte": "now-24h"}}}],
-                    "filter": [{"terms": {"rule.groups": ["syscheck"]}}],
-                }
+def _siem_fim_panel(params) -> Panel:
+    body = {
+        "size": 0,
+        "query": {
+            "bool": {
+                "must": [{"range": {"@timestamp": {"gte": "now-24h/m"}}}],
+                "filter": [{"terms": {"rule.groups": ["syscheck"]}}],
+            }
+        },
+        "aggs": {
+            "by_event": {
+                "terms": {"field": "syscheck.event", "size": 10}
             },
-            "aggs": {
-                "by_event": {
-                    "terms": {"field": "syscheck.event", "size": 10}
-                },
-                "top_files": {
-                    "terms": {"field": "syscheck.path", "size": 10}
-                },
-                "timeline": {
-                    "date_histogram": {
-                        "field": "@timestamp",
-                        "fixed_interval": "1h",
-                        "min_doc_count": 0,
-                    }
-                },
+            "top_files": {
+                "terms": {"field": "syscheck.path", "size": 10}
             },
-        }
-        resp = _wazuh_query(body)
-        aggs = resp.get("aggregations", {})
+            "timeline": {
+                "date_histogram": {
+                    "field": "@timestamp",
+                    "fixed_interval": "1h",
+                    "min_doc_count": 0,
+                }
+            },
+        },
+    }
 
-        return Response({
+    def parse(resp):
+        aggs = resp.get("aggregations", {})
+        return {
             "by_event": [
                 {"event": b["key"], "count": b["doc_count"]}
                 for b in aggs.get("by_event", {}).get("buckets", [])
@@ -423,7 +692,87 @@ def siem_fim(request):
                 {"time": b["key_as_string"], "count": b["doc_count"]}
                 for b in aggs.get("timeline", {}).get("buckets", [])
             ],
-        })
+        }
+
+    return Panel(WAZUH_INDEX, body, parse, {"by_event": [], "top_files": [], "timeline": []})
+
+
+SIEM_PANELS = {
+    "overview": _siem_overview_panel,
+    "alerts": _siem_alerts_panel,
+    "mitre": _siem_mitre_panel,
+    "fim": _siem_fim_panel,
+}
+
+
+def _siem_response(name: str, request) -> Response:
+    """Run one SIEM panel through the pooled, cached Wazuh client."""
+    panel = None
+    try:
+        panel = SIEM_PANELS[name](request.query_params)
+        return Response(panel.parse(get_wazuh_client().search(panel.body, panel.index)))
     except Exception as exc:
-        logger.error("siem_fim failed: %s", exc, exc_info=True)
-        return Response({"by_event": [], "top_files": [], "timeline": []})
+        logger.error("siem_%s failed: %s", name, exc, exc_info=True)
+        return mark_degraded(Response(panel.empty if panel else []))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@time_bucketed("siem_overview", _query_key, _minute_bucket)
+def siem_overview(request):
+    """
+    GET /api/stats/siem/overview/
+
+    Returns summary counts and a timeline for the Wazuh SIEM dashboard card.
+    """
+    return _siem_response("overview", request)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@time_bucketed("siem_alerts", _query_key, _minute_bucket)
+def siem_alerts(request):
+    """
+    GET /api/stats/siem/alerts/?limit=50&level=10
+
+    Recent Wazuh alerts, optionally filtered by minimum rule level.
+    """
+    return _siem_response("alerts", request)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@time_bucketed("siem_mitre", _query_key, _minute_bucket)
+def siem_mitre(request):
+    """
+    GET /api/stats/siem/mitre/
+
+    MITRE ATT&CK tactic/technique aggregation from Wazuh alerts.
+    """
+    return _siem_response("mitre", request)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@time_bucketed("siem_fim", _query_key, _minute_bucket)
+def siem_fim(request):
+    """
+    GET /api/stats/siem/fim/
+
+    File Integrity Monitoring summary from Wazuh alerts.
+    """
+    return _siem_response("fim", request)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@time_bucketed("siem_bundle", _query_key, _minute_bucket)
+def siem_bundle(request):
+    """
+    GET /api/stats/siem/bundle/?panels=overview,mitre,fim
+
+    Several SIEM panels in one ``_msearch`` to the Wazuh Indexer.  Defaults
+    to all panels; ``limit`` and ``level`` apply to ``alerts``.
+    Returns: {panels: {name: data}, errors: {name: message}, fallback: []}
+    """
+    return _bundle_response(request, SIEM_PANELS, get_wazuh_client().msearch)
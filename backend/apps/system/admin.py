@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SystemSettings
+from .models import RateLimitWindow, RollupWatermark, SystemSettings
 
 
 @admin.register(SystemSettings)
@@ -9,3 +9,14 @@ class SystemSettingsAdmin(admin.ModelAdmin):
     search_fields = ['key', 'value', 'description']
     readonly_fields = ['updated_at']
 
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ['source', 'last_id', 'caught_up_at', 'updated_at']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(RateLimitWindow)
+class RateLimitWindowAdmin(admin.ModelAdmin):
+    list_display = ['name', 'period', 'window', 'used', 'paused_until']
@@ -5,3 +5,9 @@ class SystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.system'
 
+    def ready(self):
+        from . import checks  # noqa: F401  (registers system checks)
+        from .watermarks import connect_signals
+
+        connect_signals()
+
@@ -0,0 +1,227 @@
+"""
+Asyncio ingest pipeline used by ``consume_kafka --async``.
+
+Fetching, decoding, DB writes and WebSocket fan-out run as separate tasks
+connected by bounded queues, so a slow Redis ``group_send`` or a slow DB
+flush overlaps with the next Kafka fetch instead of adding to it.  A full
+queue blocks the stage in front of it, which is the pipeline's backpressure.
+
+DB writes go through Django's async ORM boundary (``sync_to_async``) on a
+single dedicated thread, reusing ``BatchWriter`` for retry and
+dead-lettering.  Kafka offsets are committed by the writer stage only after
+the records behind them have been persisted or delivered to the DLQ.
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from apps.system.ingest import ALERTS_TOPIC, FLOWS_TOPIC, map_severity
+from apps.system import rollups
+from apps.system.rollups import FLUSH_INTERVAL_SECS as ROLLUP_FLUSH_SECS
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 8
+
+_STOP = object()
+
+
+class AsyncIngestPipeline:
+    """Kafka -> decode -> batch write -> WebSocket fan-out."""
+
+    def __init__(
+        self,
+        bootstrap_servers: str,
+        group_id: str,
+        writer,
+        channel_layer,
+        batch_size: int,
+        batch_timeout: float,
+        queue_size: int = QUEUE_SIZE,
+        on_flush=None,
+        rollups: bool = False,
+    ):
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+        self.writer = writer
+        self.channel_layer = channel_layer
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.on_flush = on_flush
+        self.rollups = rollups
+        self.raw_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.write_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.fanout_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size * 4)
+        self._stopping = asyncio.Event()
+        self._write_batch = sync_to_async(self.writer.write, thread_sensitive=True)
+        self._flush_rollups = sync_to_async(self._flush_rollups_sync, thread_sensitive=True)
+        self._ensure_dead_letters = sync_to_async(self.writer.dead_letters.ensure_delivered, thread_sensitive=False)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        from aiokafka import AIOKafkaConsumer
+
+        self.consumer = AIOKafkaConsumer(
+            FLOWS_TOPIC,
+            ALERTS_TOPIC,
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=self.group_id,
+            auto_offset_reset="latest",
+            enable_auto_commit=False,
+        )
+        await self.consumer.start()
+        try:
+            await asyncio.gather(
+                self._fetch(),
+                self._decode(),
+                self._write(),
+                self._fanout(),
+            )
+        finally:
+            await self.consumer.stop()
+
+    # -- Stages --------------------------------------------------------------
+
+    async def _fetch(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                records = await self.consumer.getmany(
+                    timeout_ms=int(self.batch_timeout * 1000) // 2 or 100,
+                    max_records=self.batch_size,
+                )
+                for tp_records in records.values():
+                    if tp_records:
+                        await self.raw_q.put(tp_records)
+        finally:
+            await self.raw_q.put(_STOP)
+
+    async def _decode(self) -> None:
+        """Decode records and cut them into write batches by size or age."""
+        flows, alerts, offsets = [], [], {}
+        deadline = time.monotonic() + self.batch_timeout
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(self.raw_q.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _STOP:
+                if flows or alerts:
+                    await self.write_q.put((flows, alerts, offsets))
+                await self.write_q.put(_STOP)
+                return
+
+            for record in item or ():
+                offsets[(record.topic, record.partition)] = record.offset + 1
+                try:
+                    payload = json.loads(record.value.decode("utf-8"))
+                except Exception as exc:
+                    self.writer.dead_letters.publish(
+                        record.topic, record.value.decode("utf-8", errors="replace"), exc, attempts=0
+                    )
+                    continue
+                if record.topic == FLOWS_TOPIC:
+                    flows.append(payload)
+                elif record.topic == ALERTS_TOPIC:
+                    alerts.append(payload)
+
+            full = len(flows) + len(alerts) >= self.batch_size
+            if full or time.monotonic() >= deadline:
+                if flows or alerts or offsets:
+                    await self.write_q.put((flows, alerts, offsets))
+                flows, alerts, offsets = [], [], {}
+                deadline = time.monotonic() + self.batch_timeout
+
+    def _flush_rollups_sync(self) -> None:
+        try:
+            rollups.roll_up_new_rows(max_rows=rollups.BATCH_SIZE)
+        except Exception as exc:
+            logger.warning("Rollup update failed: %s", exc)
+
+    async def _write(self) -> None:
+        from aiokafka.structs import TopicPartition
+
+        last_rollup_flush = time.monotonic()
+        while True:
+            item = await self.write_q.get()
+            if item is _STOP:
+                if self.rollups:
+                    await self._flush_rollups()
+                await self.fanout_q.put(_STOP)
+                return
+            flows, alerts, offsets = item
+
+            t0 = time.monotonic()
+            written_flows = await self._write_batch(FLOWS_TOPIC, flows) if flows else 0
+            written_alerts = await self._write_batch(ALERTS_TOPIC, alerts) if alerts else 0
+            write_secs = time.monotonic() - t0
+
+            if offsets:
+                # Raises DeadLetterDeliveryError, stopping the pipeline with
+                # these offsets uncommitted; see consume_kafka._commit.
+                await self._ensure_dead_letters()
+                try:
+                    await self.consumer.commit(
+                        {TopicPartition(t, p): o for (t, p), o in offsets.items()}
+                    )
+                except Exception as exc:
+                    logger.debug("Kafka offset commit skipped: %s", exc)
+
+            if self.on_flush is not None:
+                self.on_flush(written_flows, written_alerts, write_secs)
+            if self.rollups and time.monotonic() - last_rollup_flush >= ROLLUP_FLUSH_SECS:
+                # Same DB thread as the writes, so rollup updates never
+                # contend with this process's own batch inserts.
+                await self._flush_rollups()
+                last_rollup_flush = time.monotonic()
+            if flows or alerts:
+                await self.fanout_q.put((written_flows, written_alerts, alerts[:10]))
+
+    async def _fanout(self) -> None:
+        while True:
+            item = await self.fanout_q.get()
+            if item is _STOP:
+                return
+            written_flows, written_alerts, sample = item
+            now = str(timezone.now())
+            sends = []
+            if written_flows:
+                sends.append(self.channel_layer.group_send(
+                    "network_updates",
+                    {
+                        "type": "network_update",
+                        "data": {"event": "batch_update", "count": written_flows, "timestamp": now},
+                    },
+                ))
+            if written_alerts:
+                sends.append(self.channel_layer.group_send(
+                    "alert_updates",
+                    {
+                        "type": "alert_notification",
+                        "data": {
+                            "event": "batch_alerts",
+                            "count": written_alerts,
+                            "alerts": [
+                                {
+                                    "title": d.get("alert", {}).get("signature", "Alert"),
+                                    "severity": map_severity(d.get("alert", {}).get("severity")),
+                                    "source_ip": d.get("source_ip"),
+                                }
+                                for d in sample
+                            ],
+                            "timestamp": now,
+                        },
+                    },
+                ))
+            for result in await asyncio.gather(*sends, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.warning("WS push failed: %s", result)
@@ -0,0 +1,217 @@
+"""
+Shared stale-while-revalidate cache entries with single-flight recompute.
+
+An entry is stored for ``hard_ttl`` seconds together with the time it stops
+being fresh (``soft_ttl``).  Between the two, readers get the stale value
+immediately and at most one of them, the holder of a short cache lock,
+recomputes it in a background thread.  Only a cold or hard-expired key
+makes a reader wait, and even then a single process computes while the
+others poll for its result.
+
+The lock is a ``cache.add`` (``SET NX`` on Redis), so it is shared by every
+worker that uses the same cache backend.
+
+``time_bucketed`` builds on it for read-only API views whose time ranges
+are rounded to a bucket: the response is cached per bucket and normalised
+query, so every identical request within a bucket costs one backend query.
+Error responses are not cached, and responses a view marked degraded
+(``mark_degraded``: a database fallback or empty panels after an
+Elasticsearch error) are fresh for ``DEGRADED_TTL`` seconds only, so a
+blip is not served for the rest of the bucket.  Hits and misses per view
+are counted in the cache (``hit_rates``).
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+FRESH, STALE, SHARED, MISS = "fresh", "stale", "shared", "miss"
+
+LOCK_TTL = 30
+WAIT_POLL_SECS = 0.1
+DEGRADED_TTL = 5
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+def _acquire(key: str, ttl: int) -> str | None:
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(key), token, ttl) else None
+
+
+def _release(key: str, token: str) -> None:
+    # Not atomic, but the lock also expires on its own; at worst another
+    # holder's lock is dropped a little early and one extra recompute runs.
+    if cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def _store(key: str, value, soft_ttl: int, hard_ttl: int, ttls=None) -> None:
+    if ttls is not None:
+        chosen = ttls(value)
+        if chosen is None:
+            return
+        soft_ttl, hard_ttl = chosen
+    cache.set(key, {"value": value, "fresh_until": time.time() + soft_ttl}, hard_ttl)
+
+
+def _refresh(key: str, compute, soft_ttl: int, hard_ttl: int, token: str, ttls=None) -> None:
+    try:
+        _store(key, compute(), soft_ttl, hard_ttl, ttls)
+    except Exception as exc:
+        # Keep serving the stale entry; the next reader after the lock
+        # expires will try again.
+        logger.warning("Background refresh of %s failed: %s", key, exc)
+    finally:
+        _release(key, token)
+        connections.close_all()
+
+
+def get_or_revalidate(
+    key: str,
+    compute,
+    soft_ttl: int,
+    hard_ttl: int,
+    lock_ttl: int = LOCK_TTL,
+    ttls=None,
+) -> tuple[object, str]:
+    """Return ``(value, state)`` for ``key``, computing it at most once at a time.
+
+    ``compute`` takes no arguments and must return a picklable value.
+    ``ttls(value)``, if given, returns the ``(soft_ttl, hard_ttl)`` to store
+    that value with, or ``None`` to return it without storing it.
+    ``state`` is ``"fresh"``, ``"stale"`` (a background refresh may be
+    running), ``"shared"`` (awaited another caller's computation) or
+    ``"miss"`` (computed in this call).
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        if time.time() < entry["fresh_until"]:
+            return entry["value"], FRESH
+        token = _acquire(key, lock_ttl)
+        if token is not None:
+            threading.Thread(
+                target=_refresh,
+                args=(key, compute, soft_ttl, hard_ttl, token, ttls),
+                name=f"swr-refresh:{key}",
+                daemon=True,
+            ).start()
+        return entry["value"], STALE
+
+    token = _acquire(key, lock_ttl)
+    if token is None:
+        # Someone else is computing; wait for their result rather than
+        # stampeding the backends, but never longer than their lock.
+        deadline = time.monotonic() + lock_ttl
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_POLL_SECS)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry["value"], SHARED
+            if cache.get(_lock_key(key)) is None:
+                break  # finished without storing a value; compute our own
+        token = _acquire(key, lock_ttl)
+
+    try:
+        value = compute()
+        _store(key, value, soft_ttl, hard_ttl, ttls)
+        return value, MISS
+    finally:
+        if token is not None:
+            _release(key, token)
+
+
+STATS_KEY = "cache_stats:{name}:{state}"
+_tracked: set[str] = set()
+
+
+def record(name: str, state: str) -> None:
+    """Count one ``state`` lookup for ``name``; shared by every worker on Redis."""
+    _tracked.add(name)
+    key = STATS_KEY.format(name=name, state=state)
+    try:
+        cache.add(key, 0, None)
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr; losing one count is fine.
+        pass
+
+
+def hit_rates() -> dict[str, dict]:
+    """``{name: {fresh, stale, shared, miss, hit_rate}}`` for every tracked view.
+
+    Everything but ``miss`` was answered without a backend query.
+    """
+    rates = {}
+    for name in sorted(_tracked):
+        counts = {
+            state: cache.get(STATS_KEY.format(name=name, state=state), 0)
+            for state in (FRESH, STALE, SHARED, MISS)
+        }
+        total = sum(counts.values())
+        counts["hit_rate"] = round((total - counts[MISS]) / total, 3) if total else None
+        rates[name] = counts
+    return rates
+
+
+def mark_degraded(response):
+    """Flag ``response`` as a fallback answer for ``time_bucketed``."""
+    response.degraded = True
+    return response
+
+
+def time_bucketed(name: str, key_params, bucket_secs):
+    """Cache a DRF view's response per time bucket and normalised query.
+
+    ``key_params(query_params)`` returns the parameters that identify the
+    result (e.g. ``range=1d`` and ``range=24h`` both as ``24``), and
+    ``bucket_secs(params)`` the bucket width for them, which is also the
+    TTL.  The view must round its own time ranges to that bucket so every
+    request in it would get the same answer; concurrent misses for a key
+    are computed once (``get_or_revalidate``).  Only 2xx responses are
+    cached; degraded ones (``mark_degraded``) go stale after
+    ``DEGRADED_TTL`` so the next request recomputes them in the background.
+    """
+    _tracked.add(name)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            params = key_params(request.query_params)
+            width = bucket_secs(params)
+            digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+            key = f"bucketed:{name}:{width}:{int(time.time() // width)}:{digest}"
+
+            def compute():
+                response = view(request, *args, **kwargs)
+                return response.status_code, response.data, getattr(response, "degraded", False)
+
+            def ttls(value):
+                status, _, degraded = value
+                if not 200 <= status < 300:
+                    return None
+                return (min(DEGRADED_TTL, width) if degraded else width), width
+
+            (status, data, _), state = get_or_revalidate(
+                key, compute, soft_ttl=width, hard_ttl=width, ttls=ttls
+            )
+            record(name, state)
+            response = Response(data, status=status)
+            response["X-Cache"] = state
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,25 @@
+"""
+System checks for the ingest topology.
+
+Run on every management command start-up (including ``consume_kafka`` and
+``capture_traffic``) and by ``python manage.py check``.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register('ingest')
+def ingest_writer_check(app_configs, **kwargs):
+    """Warn when sensors and the Kafka consumer both write the same events."""
+    if getattr(settings, 'INGEST_SINGLE_WRITER', False):
+        return []
+    return [
+        Warning(
+            'Sensors write flows and alerts to the database and Elasticsearch '
+            'directly and also publish them to Kafka, where consume_kafka '
+            'writes them again: every event is stored twice.',
+            hint='Set INGEST_SINGLE_WRITER=True so consume_kafka is the only '
+                 'writer, or silence system.W001 if no Kafka consumer is deployed.',
+            id='system.W001',
+        )
+    ]
@@ -0,0 +1,86 @@
+"""
+Process-local circuit breaker for calls to external services.
+
+After ``failure_threshold`` consecutive failures the breaker opens and
+callers fail fast with ``CircuitOpenError`` instead of waiting on a dead
+backend.  Once ``reset_timeout`` seconds have passed a single trial call is
+let through (half-open); its outcome closes the breaker or re-opens it.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """True if a call may go ahead now; a half-open breaker admits one trial."""
+        with self._lock:
+            state = self._state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit %s closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._state() != OPEN:
+                    logger.warning(
+                        "Circuit %s open after %d failures; failing fast for %ss",
+                        self.name, self._failures, self.reset_timeout,
+                    )
+                self._opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn`` through the breaker; any exception counts as a failure."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
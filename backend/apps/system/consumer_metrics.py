@@ -0,0 +1,63 @@
+"""
+Prometheus metrics for the Kafka consumer process.
+
+The consumer runs outside the web process, so it serves its own
+``/metrics`` endpoint when started with ``--metrics-port``.  When
+``prometheus_client`` is not installed every call here is a no-op.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import Counter, Gauge, start_http_server
+    PROMETHEUS_ENABLED = True
+except ImportError:  # prometheus_client not installed
+    PROMETHEUS_ENABLED = False
+
+
+if PROMETHEUS_ENABLED:
+    BATCH_SIZE = Gauge(
+        "campus_consumer_batch_size", "Current adaptive batch size"
+    )
+    BATCH_TIMEOUT = Gauge(
+        "campus_consumer_batch_timeout_seconds", "Current adaptive batch timeout"
+    )
+    WRITE_LATENCY = Gauge(
+        "campus_consumer_write_latency_seconds", "DB write latency of the last flush"
+    )
+    PARTITION_LAG = Gauge(
+        "campus_consumer_partition_lag", "Records behind the high watermark",
+        ["topic", "partition"],
+    )
+    DECISIONS = Counter(
+        "campus_consumer_batch_decisions", "Adaptive batch controller decisions",
+        ["decision"],
+    )
+
+
+def start_metrics_server(port: int) -> bool:
+    """Expose ``/metrics`` on ``port``; return False when unavailable."""
+    if not PROMETHEUS_ENABLED:
+        logger.warning("prometheus_client not installed; consumer metrics disabled")
+        return False
+    start_http_server(port)
+    return True
+
+
+def record_batch_decision(decision: str, batch_size: int, timeout: float, write_latency: float) -> None:
+    if not PROMETHEUS_ENABLED:
+        return
+    DECISIONS.labels(decision=decision).inc()
+    BATCH_SIZE.set(batch_size)
+    BATCH_TIMEOUT.set(timeout)
+    WRITE_LATENCY.set(write_latency)
+
+
+def record_partition_lag(lag: dict) -> None:
+    """``lag`` maps ``(topic, partition)`` to the number of records behind."""
+    if not PROMETHEUS_ENABLED:
+        return
+    for (topic, partition), value in lag.items():
+        PARTITION_LAG.labels(topic=topic, partition=str(partition)).set(value)
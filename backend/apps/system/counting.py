@@ -0,0 +1,93 @@
+"""
+Row counts that do not scan the table.
+
+On PostgreSQL ``count_rows`` asks the catalogue (``pg_class.reltuples``) for
+an unfiltered table, or the planner (``EXPLAIN``) for a filtered queryset,
+how many rows there are; both cost the same for a thousand rows or a few
+hundred million.  Estimates below ``COUNT_EXACT_THRESHOLD`` are replaced by
+an exact ``COUNT(*)``, which is cheap at that size, so small results are
+never shown as approximate.  Other backends always count exactly.
+"""
+
+import json
+import logging
+from typing import NamedTuple
+
+from decouple import config
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+COUNT_EXACT_THRESHOLD = config("COUNT_EXACT_THRESHOLD", default=100_000, cast=int)
+
+
+class RowCount(NamedTuple):
+    value: int
+    approximate: bool
+
+
+def table_estimate(model, using: str = "default") -> int | None:
+    """``pg_class.reltuples`` for ``model``'s table, ``None`` if unknown.
+
+    ``reltuples`` is -1 for a table that has never been vacuumed or analysed.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def _explain_rows(queryset) -> int:
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimate(queryset) -> int | None:
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    try:
+        if not queryset.query.where and not queryset.query.is_sliced and not queryset.query.distinct:
+            estimate = table_estimate(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        return _explain_rows(queryset)
+    except Exception as exc:
+        logger.debug("Count estimate for %s failed: %s", queryset.model._meta.label, exc)
+        return None
+
+
+def count_rows(queryset, threshold: int = COUNT_EXACT_THRESHOLD) -> RowCount:
+    """Estimated count of ``queryset`` above ``threshold`` rows, exact below."""
+    estimate = _estimate(queryset)
+    if estimate is not None and estimate >= threshold:
+        return RowCount(estimate, True)
+    return RowCount(queryset.count(), False)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin changelist paginator counting with ``count_rows``.
+
+    Use with ``show_full_result_count = False`` so the changelist does not
+    run its own unfiltered ``COUNT(*)`` as well.
+    """
+
+    @cached_property
+    def count(self):
+        if hasattr(self.object_list, "query"):
+            return count_rows(self.object_list).value
+        return super().count
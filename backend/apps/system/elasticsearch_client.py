@@ -1,7 +1,14 @@
 import functools
+import logging
+import threading
+import time
 
 from decouple import config
-from elasticsearch import Elasticsearch
+from elasticsearch import ApiError, Elasticsearch, TransportError
+
+from apps.system.circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
 
 
 @functools.lru_cache(maxsize=1)
@@ -14,3 +21,97 @@ def get_es_client() -> Elasticsearch:
     """
     host = config("ELASTICSEARCH_HOST", default="http://localhost:9200")
     return Elasticsearch(hosts=[host])
+
+
+def is_outage(exc: Exception) -> bool:
+    """Connection errors, timeouts and 5xx/429 mean ES is unhealthy; a bad query does not."""
+    if isinstance(exc, TransportError):
+        return True
+    if isinstance(exc, ApiError):
+        return exc.meta.status >= 500 or exc.meta.status == 429
+    return False
+
+
+class EsRouter:
+    """Health-aware gate for Elasticsearch queries on the request path.
+
+    Queries get ``request_timeout`` instead of the client's default.  Errors
+    and calls slower than ``slow_secs`` count as failures; after
+    ``failure_threshold`` in a row the circuit opens and ``call`` raises
+    ``CircuitOpenError`` at once, so views go straight to their rollup / ORM
+    fallback.  The circuit stays open until a background probe (``ping``
+    every ``probe_interval`` seconds) succeeds; requests never pay for the
+    trial call themselves.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        slow_secs: float = 2.0,
+        probe_interval: float = 5.0,
+        request_timeout: float = 5.0,
+    ):
+        # Only the probe closes the breaker, never a half-open request.
+        self.breaker = CircuitBreaker(
+            "elasticsearch", failure_threshold=failure_threshold, reset_timeout=float("inf")
+        )
+        self.slow_secs = slow_secs
+        self.probe_interval = probe_interval
+        self.request_timeout = request_timeout
+        self._probe = None
+        self._probe_lock = threading.Lock()
+
+    def available(self) -> bool:
+        return self.breaker.state == CLOSED
+
+    def call(self, fn):
+        """Return ``fn(es)``, or raise ``CircuitOpenError`` while ES is marked down."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("elasticsearch circuit is open")
+        started = time.monotonic()
+        try:
+            result = fn(get_es_client().options(request_timeout=self.request_timeout))
+        except Exception as exc:
+            if is_outage(exc):
+                self._failed()
+            raise
+        elapsed = time.monotonic() - started
+        if elapsed > self.slow_secs:
+            logger.warning("Elasticsearch query took %.1fs", elapsed)
+            self._failed()
+        else:
+            self.breaker.record_success()
+        return result
+
+    def _failed(self) -> None:
+        self.breaker.record_failure()
+        if not self.available():
+            self._start_probe()
+
+    def _start_probe(self) -> None:
+        with self._probe_lock:
+            if self._probe is not None and self._probe.is_alive():
+                return
+            self._probe = threading.Thread(target=self._run_probe, name="es-probe", daemon=True)
+            self._probe.start()
+
+    def _run_probe(self) -> None:
+        es = get_es_client().options(request_timeout=self.slow_secs)
+        while not self.available():
+            time.sleep(self.probe_interval)
+            try:
+                if es.ping():
+                    self.breaker.record_success()
+            except Exception as exc:
+                logger.debug("Elasticsearch probe failed: %s", exc)
+
+
+@functools.lru_cache(maxsize=1)
+def get_es_router() -> EsRouter:
+    """Process-wide ``EsRouter`` shared by the dashboard and stats views."""
+    return EsRouter(
+        failure_threshold=config("ES_BREAKER_FAILURES", default=3, cast=int),
+        slow_secs=config("ES_SLOW_QUERY_SECS", default=2.0, cast=float),
+        probe_interval=config("ES_PROBE_INTERVAL", default=5.0, cast=float),
+        request_timeout=config("ES_REQUEST_TIMEOUT", default=5.0, cast=float),
+    )
@@ -0,0 +1,160 @@
+"""
+Index templates and ingest pipeline for the flow and alert indices.
+
+Without explicit mappings Elasticsearch guesses field types from the first
+document of each daily index, so ``source_ip`` ends up as ``text`` and byte
+counts can arrive as strings.  The templates pin the types, and the
+``network-flows-bytes`` default pipeline guarantees every flow document has
+a numeric ``bytes`` field, whichever writer sent it.  Aggregations can then
+use a plain ``sum`` on ``bytes`` instead of a per-document script.
+
+Indices created before the templates keep their old mappings until
+``reindex_es_indices`` rewrites them.
+"""
+
+FLOW_BYTES_PIPELINE = "network-flows-bytes"
+
+_IP = {"type": "ip", "ignore_malformed": True}
+_PORT = {"type": "integer", "ignore_malformed": True}
+
+FLOW_BYTES_PIPELINE_BODY = {
+    "description": "Normalise orig/resp byte counts and derive the total 'bytes' field",
+    "processors": [
+        *[
+            {
+                "convert": {
+                    "field": field,
+                    "type": "long",
+                    "ignore_missing": True,
+                    # Zeek writes "-" for unknown byte counts
+                    "on_failure": [{"set": {"field": field, "value": 0}}],
+                }
+            }
+            for field in ("orig_bytes", "resp_bytes", "bytes")
+        ],
+        {
+            "script": {
+                "lang": "painless",
+                "source": "if (ctx.bytes == null) { "
+                          "ctx.bytes = (ctx.orig_bytes ?: 0L) + (ctx.resp_bytes ?: 0L); }",
+            }
+        },
+    ],
+}
+
+INDEX_TEMPLATES = {
+    "network-flows": {
+        "index_patterns": ["network-flows-*"],
+        "priority": 200,
+        "template": {
+            "settings": {"index.default_pipeline": FLOW_BYTES_PIPELINE},
+            "mappings": {
+                "properties": {
+                    "@timestamp": {"type": "date"},
+                    "source_ip": _IP,
+                    "destination_ip": _IP,
+                    "source_port": _PORT,
+                    "destination_port": _PORT,
+                    "proto": {"type": "keyword"},
+                    "service": {"type": "keyword"},
+                    "conn_state": {"type": "keyword"},
+                    "direction": {"type": "keyword"},
+                    "uid": {"type": "keyword"},
+                    "tags": {"type": "keyword"},
+                    "db_id": {"type": "long"},
+                    "orig_bytes": {"type": "long"},
+                    "resp_bytes": {"type": "long"},
+                    "bytes": {"type": "long"},
+                    "packets_sent": {"type": "long"},
+                    "packets_received": {"type": "long"},
+                    "duration": {"type": "float"},
+                    "geoip": {"properties": {"location": {"type": "geo_point"}}},
+                }
+            },
+        },
+    },
+    "security-alerts": {
+        "index_patterns": ["security-alerts-*"],
+        "priority": 200,
+        "template": {
+            "mappings": {
+                "properties": {
+                    "@timestamp": {"type": "date"},
+                    "event_type": {"type": "keyword"},
+                    "source_ip": _IP,
+                    "destination_ip": _IP,
+                    "source_port": _PORT,
+                    "destination_port": _PORT,
+                    "proto": {"type": "keyword"},
+                    "tags": {"type": "keyword"},
+                    "alert": {
+                        "properties": {
+                            "signature": {
+                                "type": "keyword",
+                                "fields": {"text": {"type": "text"}},
+                            },
+                            "signature_id": {"type": "long"},
+                            "severity": {"type": "integer"},
+                            "category": {"type": "keyword"},
+                        }
+                    },
+                    "geoip": {"properties": {"location": {"type": "geo_point"}}},
+                }
+            },
+        },
+    },
+}
+
+# Fields whose mapped type tells an index apart from one created by the templates.
+EXPECTED_TYPES = {
+    "network-flows": {"bytes": "long", "source_ip": "ip", "proto": "keyword"},
+    "security-alerts": {"source_ip": "ip", "alert.category": "keyword"},
+}
+# Fields that must be present; the others may be unmapped in a sparse index.
+REQUIRED_FIELDS = {"bytes"}
+
+
+def install_index_templates(es) -> list[str]:
+    """Create or update the ingest pipeline and index templates; return their names."""
+    es.ingest.put_pipeline(id=FLOW_BYTES_PIPELINE, **FLOW_BYTES_PIPELINE_BODY)
+    installed = [FLOW_BYTES_PIPELINE]
+    for name, body in INDEX_TEMPLATES.items():
+        es.indices.put_index_template(name=name, **body)
+        installed.append(name)
+    return installed
+
+
+def template_for(index: str) -> str | None:
+    """Name of the template whose pattern covers ``index``."""
+    for name in INDEX_TEMPLATES:
+        if index.startswith(f"{name}-"):
+            return name
+    return None
+
+
+def _field_type(properties: dict, dotted: str) -> str | None:
+    *parents, leaf = dotted.split(".")
+    for part in parents:
+        properties = properties.get(part, {}).get("properties", {})
+    return properties.get(leaf, {}).get("type")
+
+
+def outdated_indices(es, pattern: str) -> dict[str, dict[str, str | None]]:
+    """Indices matching ``pattern`` whose mappings differ from the templates.
+
+    Returns ``{index: {field: actual_type}}`` for the mismatching fields.
+    """
+    outdated = {}
+    for index, mapping in es.indices.get_mapping(index=pattern).items():
+        name = template_for(index)
+        if name is None:
+            continue
+        properties = mapping.get("mappings", {}).get("properties", {})
+        wrong = {}
+        for field, expected in EXPECTED_TYPES[name].items():
+            actual = _field_type(properties, field)
+            if actual != expected and (actual is not None or field in REQUIRED_FIELDS):
+                wrong[field] = actual
+        if wrong:
+            outdated[index] = wrong
+    return outdated
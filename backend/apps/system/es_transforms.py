@@ -0,0 +1,131 @@
+"""
+Continuous Elasticsearch transforms that keep hourly summary indices.
+
+``network-flows-*`` is pivoted into one document per hour, protocol, source
+IP and direction; ``security-alerts-*`` into one per hour, severity and
+category.  Queries over a week or a month then aggregate a few thousand
+summary documents instead of millions of raw ones.
+
+The summary index names deliberately fall outside the ``network-flows-*`` /
+``security-alerts-*`` patterns so raw searches never count them.
+"""
+
+from django.conf import settings
+
+FLOWS_SUMMARY_INDEX = "summary-network-flows-hourly"
+ALERTS_SUMMARY_INDEX = "summary-security-alerts-hourly"
+
+# Late documents (sensor clock skew, Kafka lag) are still picked up if they
+# arrive within this delay.
+SYNC_DELAY = "120s"
+FREQUENCY = "5m"
+
+_HOUR = {"date_histogram": {"field": "@timestamp", "calendar_interval": "1h"}}
+
+
+def _terms(field: str) -> dict:
+    return {"terms": {"field": field, "missing_bucket": True}}
+
+
+TRANSFORMS = {
+    "network-flows-hourly": {
+        "source": {"index": ["network-flows-*"]},
+        "dest": {"index": FLOWS_SUMMARY_INDEX},
+        "pivot": {
+            "group_by": {
+                "hour": _HOUR,
+                "proto": _terms("proto"),
+                "source_ip": _terms("source_ip"),
+                "direction": _terms("direction"),
+            },
+            "aggregations": {
+                "bytes": {"sum": {"field": "bytes"}},
+                "packets_sent": {"sum": {"field": "packets_sent"}},
+                "packets_received": {"sum": {"field": "packets_received"}},
+                "flows": {"value_count": {"field": "@timestamp"}},
+            },
+        },
+        "sync": {"time": {"field": "@timestamp", "delay": SYNC_DELAY}},
+        "frequency": FREQUENCY,
+        "description": "Hourly flow totals by protocol, source IP and direction",
+    },
+    "security-alerts-hourly": {
+        "source": {"index": ["security-alerts-*"]},
+        "dest": {"index": ALERTS_SUMMARY_INDEX},
+        "pivot": {
+            "group_by": {
+                "hour": _HOUR,
+                "severity": _terms("alert.severity"),
+                "category": _terms("alert.category"),
+            },
+            "aggregations": {
+                "count": {"value_count": {"field": "@timestamp"}},
+            },
+        },
+        "sync": {"time": {"field": "@timestamp", "delay": SYNC_DELAY}},
+        "frequency": FREQUENCY,
+        "description": "Hourly alert counts by severity and category",
+    },
+}
+
+
+def use_summary(hours: float) -> bool:
+    """True when a ``hours``-long range should be answered from the summaries."""
+    return hours > settings.ES_SUMMARY_HORIZON_HOURS
+
+
+def ensure_transforms(es) -> dict[str, str]:
+    """Create missing transforms and start them; return ``{id: action}``."""
+    existing = {
+        t["id"] for t in es.transform.get_transform(transform_id="_all", size=100)["transforms"]
+    }
+    actions = {}
+    for transform_id, body in TRANSFORMS.items():
+        if transform_id in existing:
+            action = "exists"
+        else:
+            # Deferred so setup works before the first daily index exists.
+            es.transform.put_transform(transform_id=transform_id, defer_validation=True, **body)
+            action = "created"
+        try:
+            # 409: already started
+            es.options(ignore_status=409).transform.start_transform(transform_id=transform_id)
+            actions[transform_id] = f"{action}, started"
+        except Exception as exc:
+            actions[transform_id] = f"{action}, not started ({exc})"
+    return actions
+
+
+def transform_status(es) -> list[dict]:
+    """State, checkpoint and document counts for each managed transform."""
+    stats = es.options(ignore_status=404).transform.get_transform_stats(
+        transform_id=",".join(TRANSFORMS), allow_no_match=True
+    )
+    rows = []
+    for t in stats.get("transforms", []):
+        checkpoint = t.get("checkpointing", {}).get("last", {})
+        rows.append({
+            "id": t["id"],
+            "state": t.get("state"),
+            "checkpoint": checkpoint.get("checkpoint"),
+            "processed": t.get("stats", {}).get("documents_processed"),
+            "indexed": t.get("stats", {}).get("documents_indexed"),
+            "reason": t.get("reason"),
+        })
+    return rows
+
+
+def stop_transforms(es) -> None:
+    for transform_id in TRANSFORMS:
+        es.options(ignore_status=404).transform.stop_transform(
+            transform_id=transform_id, wait_for_completion=True
+        )
+
+
+def delete_transforms(es, delete_dest: bool = False) -> None:
+    """Stop and delete the transforms, and optionally their summary indices."""
+    stop_transforms(es)
+    for transform_id, body in TRANSFORMS.items():
+        es.options(ignore_status=404).transform.delete_transform(transform_id=transform_id)
+        if delete_dest:
+            es.options(ignore_status=404).indices.delete(index=body["dest"]["index"])
@@ -0,0 +1,209 @@
+"""
+Streaming NDJSON / CSV exports from the ORM and from Elasticsearch.
+
+Rows come from ``QuerySet.iterator(chunk_size=...)`` or from an ES
+point-in-time walked with ``search_after``, are encoded line by line,
+optionally gzipped, and leave as ``StreamingHttpResponse`` chunks of about
+``CHUNK_BYTES``, so memory stays constant however many rows are exported.
+
+Under ASGI (daphne) Django buffers a synchronous iterator completely before
+sending it, so there the chunks are handed over through an async iterator
+that pulls them one at a time with ``sync_to_async``.
+"""
+
+import csv
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CHUNK_BYTES = 64 * 1024
+ORM_CHUNK_SIZE = 2000
+ES_PAGE_SIZE = 2000
+ES_KEEP_ALIVE = "2m"
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def orm_rows(queryset, fields, chunk_size: int = ORM_CHUNK_SIZE):
+    """``values(*fields)`` dicts, fetched ``chunk_size`` rows at a time."""
+    return queryset.values(*fields).iterator(chunk_size=chunk_size)
+
+
+def es_rows(es, index: str, query: dict, sort=None, page_size: int = ES_PAGE_SIZE):
+    """``_source`` of every hit, paged with a point-in-time and ``search_after``.
+
+    The point-in-time keeps pages consistent while new documents arrive and
+    is closed when the generator finishes or is closed by the response.
+    """
+    pit_id = es.open_point_in_time(index=index, keep_alive=ES_KEEP_ALIVE)["id"]
+    try:
+        search_after = None
+        while True:
+            kwargs = {"search_after": search_after} if search_after else {}
+            resp = es.search(
+                pit={"id": pit_id, "keep_alive": ES_KEEP_ALIVE},
+                query=query,
+                sort=sort or [{"@timestamp": "asc"}],
+                size=page_size,
+                track_total_hits=False,
+                **kwargs,
+            )
+            pit_id = resp.get("pit_id", pit_id)
+            hits = resp["hits"]["hits"]
+            if not hits:
+                return
+            for hit in hits:
+                yield hit["_source"]
+            search_after = hits[-1]["sort"]
+    finally:
+        try:
+            es.close_point_in_time(id=pit_id)
+        except Exception as exc:
+            logger.debug("Closing point-in-time failed: %s", exc)
+
+
+def _flatten(row: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+class _Line:
+    """File-like target for ``csv.writer`` that hands back each line."""
+
+    def write(self, value):
+        return value
+
+
+def encode(rows, fmt: str, fields):
+    """Yield one encoded line (bytes) per row, after a CSV header."""
+    if fmt == "csv":
+        writer = csv.writer(_Line())
+        yield writer.writerow(fields).encode()
+        for row in rows:
+            flat = _flatten(row)
+            yield writer.writerow([_csv_value(flat.get(f)) for f in fields]).encode()
+    else:
+        for row in rows:
+            yield (json.dumps(row, default=_default) + "\n").encode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _chunked(lines, compress: bool):
+    """Group lines into ~``CHUNK_BYTES`` chunks, gzip-compressed if asked."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            data = b"".join(buffer)
+            buffer, size = [], 0
+            data = gz.compress(data) if gz else data
+            if data:
+                yield data
+    data = b"".join(buffer)
+    if gz:
+        data = gz.compress(data) + gz.flush()
+    if data:
+        yield data
+
+
+async def _async_chunks(chunks):
+    iterator = iter(chunks)
+    done = object()
+    try:
+        while True:
+            chunk = await sync_to_async(next, thread_sensitive=True)(iterator, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def export_response(request, rows, fmt: str, fields, filename: str, compress: bool = False):
+    """``StreamingHttpResponse`` of ``rows`` as ``fmt``, as an attachment."""
+    chunks = _chunked(encode(rows, fmt, fields), compress)
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = _async_chunks(chunks)
+    filename = f"{filename}.{fmt}" + (".gz" if compress else "")
+    response = StreamingHttpResponse(
+        chunks, content_type="application/gzip" if compress else FORMATS[fmt]
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def export_options(request) -> tuple[str, bool]:
+    """``(fmt, gzip)`` from ``?fmt=ndjson|csv`` and ``?gzip=1``.
+
+    ``fmt`` rather than ``format``, which DRF reserves for renderer choice.
+    """
+    fmt = request.query_params.get("fmt", "ndjson").lower()
+    compress = request.query_params.get("gzip", "").lower() in ("1", "true", "yes")
+    return fmt, compress
+
+
+def export_filename(name: str) -> str:
+    return f"{name}-{timezone.now():%Y%m%dT%H%M%SZ}"
+
+
+class ExportMixin:
+    """``GET <list>/export/`` streaming the filtered queryset.
+
+    The viewset's filter, search and ordering backends apply exactly as on
+    the list endpoint, without pagination.  Set ``export_fields``.
+    """
+
+    export_fields: tuple[str, ...] = ()
+    export_name = "export"
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Stream the filtered rows as NDJSON or CSV (``?fmt=csv&gzip=1``)."""
+        fmt, compress = export_options(request)
+        if fmt not in FORMATS:
+            return Response({"error": f"fmt must be one of {', '.join(FORMATS)}"}, status=400)
+        rows = orm_rows(self.filter_queryset(self.get_queryset()), self.export_fields)
+        return export_response(
+            request, rows, fmt, self.export_fields, export_filename(self.export_name), compress
+        )
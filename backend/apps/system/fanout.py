@@ -0,0 +1,71 @@
+"""
+Run independent data-source queries concurrently with per-source timeouts.
+
+Views that combine Elasticsearch, ORM and Wazuh queries submit each one to a
+shared thread pool and wait for all of them together, so their latency is
+the slowest source rather than the sum.  A source that fails or misses its
+timeout is reported in ``errors`` and the caller falls back or leaves that
+part of the payload empty; the others are still returned.
+
+DRF 3.14 has no async views and the ES/Wazuh clients here are synchronous,
+so threads are the concurrency unit: the blocking calls release the GIL
+while they wait on the network.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 16
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="fanout")
+
+
+def _run(fn):
+    try:
+        return fn()
+    finally:
+        # Pool threads outlive the request, so release their DB connection
+        # the way the request cycle would.
+        close_old_connections()
+
+
+def fan_out(tasks: dict, timeouts: dict, default_timeout: float = 5.0) -> tuple[dict, dict]:
+    """Run ``{name: callable}`` concurrently; return ``(results, errors)``.
+
+    ``timeouts`` maps names to seconds.  A timed-out task is left to finish
+    in the background; its result is discarded.
+    """
+    started = time.monotonic()
+    futures = {name: _executor.submit(_run, fn) for name, fn in tasks.items()}
+    deadline = {name: started + timeouts.get(name, default_timeout) for name in tasks}
+
+    results, errors = {}, {}
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        for name in [n for n in pending if deadline[n] <= now and not futures[n].done()]:
+            pending.discard(name)
+            errors[name] = TimeoutError(f"{name} timed out after {timeouts.get(name, default_timeout)}s")
+        if not pending:
+            break
+        wait(
+            [futures[n] for n in pending],
+            timeout=max(0.0, min(deadline[n] for n in pending) - now),
+            return_when="FIRST_COMPLETED",
+        )
+        for name in [n for n in pending if futures[n].done()]:
+            pending.discard(name)
+            exc = futures[name].exception()
+            if exc is None:
+                results[name] = futures[name].result()
+            else:
+                errors[name] = exc
+
+    for name, exc in errors.items():
+        logger.warning("Fan-out source %s failed: %s", name, exc)
+    return results, errors
@@ -89,20 +89,24 @@ def check_cache():
 
 
 def check_elasticsearch():
-    """Check Elasticsearch connectivity."""
+    """Check Elasticsearch connectivity and the request-path circuit state."""
+    circuit = None
     try:
-        from apps.system.elasticsearch_client import get_es_client
+        from apps.system.elasticsearch_client import get_es_client, get_es_router
+        circuit = get_es_router().breaker.state
         es = get_es_client()
         info = es.info()
         return {
             'status': 'healthy',
             'message': 'Elasticsearch connection successful',
-            'version': info.get('version', {}).get('number', 'unknown')
+            'version': info.get('version', {}).get('number', 'unknown'),
+            'circuit': circuit,
         }
     except Exception as e:
         return {
             'status': 'unhealthy',
-            'message': f'Elasticsearch error: {str(e)}'
+            'message': f'Elasticsearch error: {str(e)}',
+            'circuit': circuit,
         }
 
 
@@ -0,0 +1,427 @@
+"""
+Kafka ingest helpers shared by ``consume_kafka`` and ``replay_dlq``.
+
+Normalized Zeek / Suricata events are mapped onto Django models and written
+with bounded retries.  Transient database errors are retried with exponential
+backoff; any other failure splits the batch in half until the offending
+record is isolated.  Records that still cannot be written are published to a
+``<topic>_dlq`` dead-letter topic together with error metadata.
+
+``AdaptiveBatchController`` sizes those batches from consumer lag and
+observed write latency.  In single-writer mode (``INGEST_SINGLE_WRITER``)
+``EsIndexer`` also makes the consumer the only Elasticsearch writer.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections, transaction
+from django.utils import timezone
+
+from apps.alerts.models import SecurityAlert
+from apps.network.models import NetworkTraffic
+from apps.system import watermarks
+
+logger = logging.getLogger(__name__)
+
+FLOWS_TOPIC = "network_flows"
+ALERTS_TOPIC = "security_alerts"
+DLQ_SUFFIX = "_dlq"
+
+MAX_RETRIES = 3
+BACKOFF_BASE_SECS = 0.5
+BACKOFF_MAX_SECS = 8.0
+
+# Errors that say "the database is unhappy", not "this record is bad".
+TRANSIENT_DB_ERRORS = (OperationalError, InterfaceError)
+
+CATEGORY_TO_TYPE = {
+    "Attempted Information Leak": "port_scan",
+    "Potentially Bad Traffic": "suspicious_traffic",
+    "A Network Trojan was Detected": "malware",
+    "Attempted Administrator Privilege Gain": "brute_force",
+    "Web Application Attack": "intrusion",
+    "Attempted Denial of Service": "ddos",
+    "Misc activity": "suspicious_traffic",
+}
+
+
+def dlq_topic(topic: str) -> str:
+    """Return the dead-letter topic name for ``topic``."""
+    return f"{topic}{DLQ_SUFFIX}"
+
+
+def map_severity(suricata_severity) -> str:
+    if suricata_severity is None:
+        return "medium"
+    try:
+        level = int(suricata_severity)
+    except (TypeError, ValueError):
+        return "medium"
+    if level == 1:
+        return "critical"
+    if level == 2:
+        return "high"
+    if level == 3:
+        return "medium"
+    return "low"
+
+
+def flow_to_model(data: dict) -> NetworkTraffic:
+    return NetworkTraffic(
+        timestamp=data.get("@timestamp", timezone.now()),
+        source_ip=data.get("source_ip"),
+        destination_ip=data.get("destination_ip"),
+        source_port=data.get("source_port") or 0,
+        destination_port=data.get("destination_port") or 0,
+        protocol=data.get("proto", "TCP"),
+        bytes_sent=data.get("orig_bytes", 0),
+        bytes_received=data.get("resp_bytes", 0),
+        packets_sent=data.get("packets_sent", 0),
+        packets_received=data.get("packets_received", 0),
+        connection_state=data.get("conn_state", "ESTABLISHED"),
+        duration=data.get("duration", 0.0),
+        application=data.get("service"),
+        country_code=data.get("geoip", {}).get("country_code2"),
+    )
+
+
+def alert_to_model(data: dict) -> SecurityAlert:
+    alert = data.get("alert", {})
+    category = alert.get("category", "")
+    alert_type = CATEGORY_TO_TYPE.get(category, "intrusion")
+
+    return SecurityAlert(
+        title=alert.get("signature", "Security Alert"),
+        description=category or "N/A",
+        severity=map_severity(alert.get("severity")),
+        alert_type=alert_type,
+        status="new",
+        source_ip=data.get("source_ip"),
+        destination_ip=data.get("destination_ip"),
+        source_port=data.get("source_port"),
+        destination_port=data.get("destination_port"),
+        protocol=data.get("proto"),
+        signature=alert.get("signature"),
+        rule_id=str(alert.get("signature_id", "")),
+        country_code=data.get("geoip", {}).get("country_code2"),
+        timestamp=data.get("@timestamp", timezone.now()),
+    )
+
+
+MODEL_BUILDERS = {
+    FLOWS_TOPIC: (NetworkTraffic, flow_to_model),
+    ALERTS_TOPIC: (SecurityAlert, alert_to_model),
+}
+
+ES_INDEX_PREFIXES = {
+    FLOWS_TOPIC: "network-flows",
+    ALERTS_TOPIC: "security-alerts",
+}
+
+# Events shipped by the Logstash pipeline carry these tags; Logstash indexes
+# them into Elasticsearch itself, so the consumer must not index them again.
+LOGSTASH_TAGS = frozenset({"network_flow", "security_alert"})
+
+
+def single_writer_enabled() -> bool:
+    """True when sensors publish only to Kafka and the consumer writes."""
+    return getattr(settings, "INGEST_SINGLE_WRITER", False)
+
+
+def es_index_name(topic: str, payload: dict) -> str:
+    """Daily index for ``payload``, dated by its own ``@timestamp``."""
+    ts = payload.get("@timestamp") if isinstance(payload, dict) else None
+    try:
+        day = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        day = datetime.utcnow()
+    return f"{ES_INDEX_PREFIXES[topic]}-{day:%Y.%m.%d}"
+
+
+def with_db_id(document: dict, obj) -> dict:
+    """``document`` plus the primary key of its database row, as ``db_id``.
+
+    The traffic search loads its result page by these ids, so ES hits and
+    ORM rows are the same objects.
+    """
+    if obj.pk is None:
+        return document
+    return {**document, "db_id": obj.pk}
+
+
+class EsIndexer:
+    """``BatchWriter.on_written`` hook that bulk-indexes persisted payloads.
+
+    Only records that made it into the database are indexed, with their
+    ``db_id``, so the two stores stay in step.  Indexing errors are logged, never raised: ES is
+    the analytics copy and the database row is already committed.
+    """
+
+    def __init__(self, es):
+        self.es = es
+
+    def record(self, topic: str, objects, payloads) -> None:
+        from elasticsearch.helpers import bulk
+
+        actions = [
+            {"_index": es_index_name(topic, payload), "_source": with_db_id(payload, obj)}
+            for obj, payload in zip(objects, payloads)
+            if not LOGSTASH_TAGS.intersection(payload.get("tags") or ())
+        ]
+        if not actions:
+            return
+        try:
+            _ok, errors = bulk(self.es, actions, raise_on_error=False)
+            if errors:
+                logger.warning("ES bulk index: %d %s documents rejected", len(errors), topic)
+        except Exception as exc:
+            logger.warning("ES bulk index of %d %s documents failed: %s", len(actions), topic, exc)
+
+
+class DeadLetterDeliveryError(Exception):
+    """Dead letters were not confirmed by the broker; offsets must not be committed."""
+
+
+class DeadLetterPublisher:
+    """Publish records that could not be persisted to ``<topic>_dlq``.
+
+    Each DLQ message is a JSON envelope carrying the original payload plus
+    the error, the number of write attempts and how many times the record
+    has already been replayed.  Without a producer the envelope is logged so
+    the record is at least recoverable from the logs.
+
+    ``publish`` only queues the message: call ``ensure_delivered()`` before
+    committing the offsets of dead-lettered records.
+    """
+
+    def __init__(self, producer=None):
+        self.producer = producer
+        self.published = 0
+        self.pending = 0
+        self._failed = 0
+
+    def publish(self, topic: str, payload, exc: Exception, attempts: int, replays: int = 0) -> None:
+        envelope = {
+            "source_topic": topic,
+            "error": str(exc)[:1000],
+            "error_type": type(exc).__name__,
+            "attempts": attempts,
+            "replays": replays,
+            "failed_at": timezone.now().isoformat(),
+            "payload": payload,
+        }
+        self.published += 1
+        if self.producer is None:
+            logger.error("Dead-lettered %s record (no DLQ producer): %s", topic, json.dumps(envelope, default=str))
+            return
+        try:
+            self.producer.produce(
+                dlq_topic(topic),
+                json.dumps(envelope, default=str).encode("utf-8"),
+                callback=self._delivery_report,
+            )
+            self.pending += 1
+            self.producer.poll(0)
+        except Exception as produce_exc:
+            logger.error(
+                "DLQ produce to %s failed (%s); record: %s",
+                dlq_topic(topic), produce_exc, json.dumps(envelope, default=str),
+            )
+            self._failed += 1
+
+    def _delivery_report(self, err, msg):
+        if err is not None:
+            logger.error("DLQ delivery failed: %s", err)
+            self._failed += 1
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait for queued dead letters; True if every one since the last flush arrived."""
+        if self.producer is not None and self.pending:
+            remaining = self.producer.flush(timeout)
+            if remaining:
+                logger.error("%d dead letters still queued after %.0fs", remaining, timeout)
+                return False
+            self.pending = 0
+        delivered = not self._failed
+        self._failed = 0
+        return delivered
+
+    def ensure_delivered(self, timeout: float = 10.0) -> None:
+        if not self.flush(timeout):
+            raise DeadLetterDeliveryError(
+                "Dead letters were not delivered; offsets left uncommitted so the records are replayed"
+            )
+
+
+class BatchWriter:
+    """Bulk-insert a batch of payloads with retry, split and dead-lettering.
+
+    ``write()`` never raises: every payload ends up either persisted or on
+    the dead-letter topic, so the caller can commit its Kafka offsets after
+    each call once ``dead_letters.ensure_delivered()`` has returned.
+    ``on_written(topic, objects, payloads)`` is called for every chunk that
+    was actually committed; if it raises, the error is logged and the
+    chunk is not written again.
+    """
+
+    def __init__(
+        self,
+        dead_letters: DeadLetterPublisher,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE_SECS,
+        backoff_max: float = BACKOFF_MAX_SECS,
+        sleep=time.sleep,
+        on_written=None,
+    ):
+        self.dead_letters = dead_letters
+        self.on_written = on_written
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+
+    def write(self, topic: str, payloads: list, replays: int = 0) -> int:
+        """Persist ``payloads`` for ``topic`` and return how many were written."""
+        model, builder = MODEL_BUILDERS[topic]
+        objects = []
+        rows = []
+        for payload in payloads:
+            try:
+                objects.append(builder(payload))
+                rows.append(payload)
+            except Exception as exc:
+                self.dead_letters.publish(topic, payload, exc, attempts=0, replays=replays)
+        if not objects:
+            return 0
+        return self._write_chunk(model, topic, objects, rows, replays)
+
+    def _write_chunk(self, model, topic, objects, payloads, replays) -> int:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with transaction.atomic():
+                    # Without ignore_conflicts (neither table has a unique
+                    # constraint) the primary keys are set on ``objects``,
+                    # so EsIndexer can index them as ``db_id``.
+                    model.objects.bulk_create(objects)
+            except TRANSIENT_DB_ERRORS as exc:
+                close_old_connections()
+                if attempt > self.max_retries:
+                    # The database is unavailable rather than the records
+                    # being bad, so splitting would only multiply the wait.
+                    logger.error(
+                        "%s write failed after %d attempts, dead-lettering %d records: %s",
+                        model.__name__, attempt, len(payloads), exc,
+                    )
+                    for payload in payloads:
+                        self.dead_letters.publish(topic, payload, exc, attempt, replays)
+                    return 0
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                logger.warning(
+                    "%s write failed (attempt %d/%d), retrying in %.1fs: %s",
+                    model.__name__, attempt, self.max_retries + 1, delay, exc,
+                )
+                self.sleep(delay)
+            except Exception as exc:
+                if len(objects) == 1:
+                    logger.warning("Poison %s record dead-lettered: %s", model.__name__, exc)
+                    self.dead_letters.publish(topic, payloads[0], exc, attempt, replays)
+                    return 0
+                mid = len(objects) // 2
+                return (
+                    self._write_chunk(model, topic, objects[:mid], payloads[:mid], replays)
+                    + self._write_chunk(model, topic, objects[mid:], payloads[mid:], replays)
+                )
+            else:
+                self._after_write(model, topic, objects, payloads)
+                return len(objects)
+
+    def _after_write(self, model, topic, objects, payloads) -> None:
+        """Post-commit hooks.  The rows are stored, so a failure is logged, never retried."""
+        try:
+            watermarks.touch_model(model)
+        except Exception as exc:
+            logger.warning("Touching the %s watermark failed: %s", model.__name__, exc)
+        if self.on_written is None:
+            return
+        try:
+            self.on_written(topic, objects, payloads)
+        except Exception as exc:
+            logger.error("on_written failed for %d committed %s records: %s", len(objects), model.__name__, exc)
+
+
+class AdaptiveBatchController:
+    """Pick the next batch size and flush timeout from lag and write latency.
+
+    Multiplicative decrease when a flush takes longer than the latency
+    target, multiplicative increase while the consumer is falling behind,
+    and a slow additive decay back towards the minimum once it has caught
+    up.  With no backlog the timeout drops to ``min_timeout`` so trickles
+    of events reach the dashboard quickly.
+    """
+
+    def __init__(
+        self,
+        initial_size: int,
+        min_size: int = 20,
+        max_size: int = 5000,
+        target_latency: float = 0.5,
+        min_timeout: float = 0.5,
+        max_timeout: float = 2.0,
+    ):
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.batch_size = max(self.min_size, min(self.max_size, initial_size))
+        self.target_latency = target_latency
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout = max_timeout
+        self.last_decision = "hold"
+
+    def observe(self, write_latency: float, backlog: int) -> str:
+        """Update size/timeout after a flush and return the decision taken.
+
+        ``backlog`` is the consumer lag plus anything already buffered.
+        """
+        if write_latency > self.target_latency:
+            self.batch_size = max(self.min_size, self.batch_size // 2)
+            decision = "shrink_latency"
+        elif backlog > self.batch_size:
+            self.batch_size = min(self.max_size, self.batch_size * 2)
+            decision = "grow_backlog"
+        elif backlog < self.batch_size // 4 and self.batch_size > self.min_size:
+            step = max(1, self.batch_size // 10)
+            self.batch_size = max(self.min_size, self.batch_size - step)
+            decision = "shrink_idle"
+        else:
+            decision = "hold"
+
+        self.timeout = self.max_timeout if backlog else self.min_timeout
+        self.last_decision = decision
+        return decision
+
+
+def partition_lag(consumer) -> dict:
+    """Return ``{(topic, partition): lag}`` for the consumer's assignment.
+
+    Uses the watermarks cached from the last fetch response, so this does
+    not add a broker round-trip per call.
+    """
+    lag = {}
+    try:
+        assignment = consumer.assignment()
+        if not assignment:
+            return lag
+        for tp in consumer.position(assignment):
+            _low, high = consumer.get_watermark_offsets(tp, cached=True)
+            if high < 0 or tp.offset < 0:
+                continue
+            lag[(tp.topic, tp.partition)] = max(0, high - tp.offset)
+    except Exception as exc:
+        logger.debug("Partition lag lookup failed: %s", exc)
+    return lag
@@ -1,36 +1,42 @@
+import asyncio
 import json
 import logging
+import signal
 import time
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from decouple import config
-from confluent_kafka import Consumer
+from confluent_kafka import Consumer, Producer
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
-from apps.network.models import NetworkTraffic
-from apps.alerts.models import SecurityAlert
+from apps.system import consumer_metrics
+from apps.system import rollups
+from apps.system.rollups import FLUSH_INTERVAL_SECS as ROLLUP_FLUSH_SECS
+from apps.system.ingest import (
+    ALERTS_TOPIC,
+    FLOWS_TOPIC,
+    MAX_RETRIES,
+    AdaptiveBatchController,
+    BatchWriter,
+    DeadLetterPublisher,
+    EsIndexer,
+    map_severity,
+    partition_lag,
+    single_writer_enabled,
+)
 
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 100
 BATCH_TIMEOUT_SECS = 2.0
+TARGET_WRITE_MS = 500
 
 
 class Command(BaseCommand):
     help = "Consume normalized events from Kafka and persist into Django models."
 
-    CATEGORY_TO_TYPE = {
-        "Attempted Information Leak": "port_scan",
-        "Potentially Bad Traffic": "suspicious_traffic",
-        "A Network Trojan was Detected": "malware",
-        "Attempted Administrator Privilege Gain": "brute_force",
-        "Web Application Attack": "intrusion",
-        "Attempted Denial of Service": "ddos",
-        "Misc activity": "suspicious_traffic",
-    }
-
     def add_arguments(self, parser):
         parser.add_argument(
             "--group-id",
@@ -49,6 +55,56 @@ class Command(BaseCommand):
             default=BATCH_SIZE,
             help="Max records per bulk write batch",
         )
+        parser.add_argument(
+            "--max-retries",
+            type=int,
+            default=MAX_RETRIES,
+            help="Retries with exponential backoff for transient DB errors "
+                 "before a batch is sent to the dead-letter topic",
+        )
+        parser.add_argument(
+            "--adaptive",
+            action="store_true",
+            help="Grow the batch size with consumer lag and shrink it when "
+                 "DB writes exceed --target-write-ms (--batch-size is the start value)",
+        )
+        parser.add_argument(
+            "--min-batch-size",
+            type=int,
+            default=20,
+            help="Lower bound for the adaptive batch size",
+        )
+        parser.add_argument(
+            "--max-batch-size",
+            type=int,
+            default=5000,
+            help="Upper bound for the adaptive batch size",
+        )
+        parser.add_argument(
+            "--target-write-ms",
+            type=int,
+            default=TARGET_WRITE_MS,
+            help="DB write latency per flush above which the adaptive batch size shrinks",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            help="Serve Prometheus metrics (batch decisions, partition lag) on this port",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Run the asyncio pipeline (aiokafka fetch, decode, DB write and "
+                 "WebSocket fan-out as concurrent stages)",
+        )
+        parser.add_argument(
+            "--no-rollups",
+            action="store_false",
+            dest="rollups",
+            help="Do not fold new rows into the traffic/alert rollup tables "
+                 "(run update_rollups separately instead)",
+        )
 
     def handle(self, *args, **options):
         bootstrap_servers = options.get("bootstrap") or config(
@@ -57,75 +113,209 @@ class Command(BaseCommand):
         group_id = options["group_id"]
         batch_size = options["batch_size"]
 
+        dead_letters = DeadLetterPublisher(Producer({"bootstrap.servers": bootstrap_servers}))
+        self.rollups = options["rollups"]
+        self.es_indexer = None
+        if single_writer_enabled():
+            from apps.system.elasticsearch_client import get_es_client
+            self.es_indexer = EsIndexer(get_es_client())
+            self.stdout.write("Single-writer mode: indexing persisted events into Elasticsearch")
+        self.writer = BatchWriter(
+            dead_letters,
+            max_retries=options["max_retries"],
+            on_written=self._on_written,
+        )
+
+        if options.get("metrics_port"):
+            if consumer_metrics.start_metrics_server(options["metrics_port"]):
+                self.stdout.write(f"Serving consumer metrics on :{options['metrics_port']}")
+
+        if options["use_async"]:
+            if options["adaptive"]:
+                self.stderr.write("--adaptive is not supported with --async; using a fixed batch size")
+            self._handle_async(bootstrap_servers, group_id, batch_size)
+            return
+
+        # Offsets are committed only after a batch has been persisted or
+        # dead-lettered, so a crash mid-flush replays rather than loses data.
         consumer_conf = {
             "bootstrap.servers": bootstrap_servers,
             "group.id": group_id,
             "auto.offset.reset": "latest",
+            "enable.auto.commit": False,
         }
 
         consumer = Consumer(consumer_conf)
-        topics = ["network_flows", "security_alerts"]
+        topics = [FLOWS_TOPIC, ALERTS_TOPIC]
         consumer.subscribe(topics)
 
+        controller = None
+        if options["adaptive"]:
+            controller = AdaptiveBatchController(
+                initial_size=batch_size,
+                min_size=options["min_batch_size"],
+                max_size=options["max_batch_size"],
+                target_latency=options["target_write_ms"] / 1000.0,
+                max_timeout=BATCH_TIMEOUT_SECS,
+            )
+        batch_timeout = BATCH_TIMEOUT_SECS
+
         self.stdout.write(
             self.style.SUCCESS(
                 f"Consuming from Kafka topics {topics} on {bootstrap_servers} "
-                f"(batch_size={batch_size})"
+                f"(batch_size={batch_size}{', adaptive' if controller else ''})"
             )
         )
 
         flow_batch: list[dict] = []
         alert_batch: list[dict] = []
-        last_flush = time.monotonic()
+        last_flush = last_rollup_flush = time.monotonic()
 
         try:
             while True:
                 msg = consumer.poll(0.5)
 
                 if msg is not None and not msg.error():
+                    topic = msg.topic()
                     try:
                         payload = json.loads(msg.value().decode("utf-8"))
                     except Exception as exc:
                         self.stderr.write(f"Failed to decode Kafka message: {exc}")
+                        dead_letters.publish(
+                            topic, msg.value().decode("utf-8", errors="replace"), exc, attempts=0
+                        )
                         payload = None
 
                     if payload is not None:
-                        topic = msg.topic()
-                        if topic == "network_flows":
+                        if topic == FLOWS_TOPIC:
                             flow_batch.append(payload)
-                        elif topic == "security_alerts":
+                        elif topic == ALERTS_TOPIC:
                             alert_batch.append(payload)
                 elif msg is not None and msg.error():
                     self.stderr.write(f"Kafka error: {msg.error()}")
 
                 batch_full = (len(flow_batch) + len(alert_batch)) >= batch_size
-                timed_out = (time.monotonic() - last_flush) >= BATCH_TIMEOUT_SECS
+                timed_out = (time.monotonic() - last_flush) >= batch_timeout
                 has_data = flow_batch or alert_batch
 
                 if has_data and (batch_full or timed_out):
-                    self._flush_batches(flow_batch, alert_batch)
+                    write_latency = self._flush_batches(flow_batch, alert_batch)
                     flow_batch.clear()
                     alert_batch.clear()
+                    self._commit(consumer)
                     last_flush = time.monotonic()
 
+                    lag = partition_lag(consumer)
+                    consumer_metrics.record_partition_lag(lag)
+                    if controller is not None:
+                        decision = controller.observe(write_latency, sum(lag.values()))
+                        batch_size = controller.batch_size
+                        batch_timeout = controller.timeout
+                        consumer_metrics.record_batch_decision(
+                            decision, batch_size, batch_timeout, write_latency
+                        )
+                        if decision != "hold":
+                            logger.info(
+                                "Adaptive batch: %s -> size=%d timeout=%.1fs (write %.0fms, lag %d)",
+                                decision, batch_size, batch_timeout,
+                                write_latency * 1000, sum(lag.values()),
+                            )
+
+                if time.monotonic() - last_rollup_flush >= ROLLUP_FLUSH_SECS:
+                    self._flush_rollups()
+                    last_rollup_flush = time.monotonic()
+
         except KeyboardInterrupt:
             self.stdout.write("Stopping Kafka consumer...")
         finally:
-            if flow_batch or alert_batch:
-                self._flush_batches(flow_batch, alert_batch)
-            consumer.close()
+            try:
+                if flow_batch or alert_batch:
+                    self._flush_batches(flow_batch, alert_batch)
+                    self._commit(consumer)
+                self._flush_rollups()
+            finally:
+                dead_letters.flush()
+                consumer.close()
+
+    def _handle_async(self, bootstrap_servers: str, group_id: str, batch_size: int) -> None:
+        from apps.system.async_ingest import AsyncIngestPipeline
+
+        def report(written_flows, written_alerts, write_secs):
+            if written_flows or written_alerts:
+                self.stdout.write(
+                    f"  Flushed {written_flows} flows + {written_alerts} alerts "
+                    f"({write_secs * 1000:.0f}ms)"
+                )
+
+        pipeline = AsyncIngestPipeline(
+            bootstrap_servers=bootstrap_servers,
+            group_id=group_id,
+            writer=self.writer,
+            channel_layer=get_channel_layer(),
+            batch_size=batch_size,
+            batch_timeout=BATCH_TIMEOUT_SECS,
+            on_flush=report,
+            rollups=self.rollups,
+        )
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, pipeline.stop)
+            await pipeline.run()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Consuming from Kafka topics {[FLOWS_TOPIC, ALERTS_TOPIC]} on "
+                f"{bootstrap_servers} (batch_size={batch_size}, async pipeline)"
+            )
+        )
+        try:
+            asyncio.run(main())
+        finally:
+            self.stdout.write("Stopping Kafka consumer...")
+            self.writer.dead_letters.flush()
+
+    def _on_written(self, topic: str, objects, payloads) -> None:
+        if self.es_indexer is not None:
+            self.es_indexer.record(topic, objects, payloads)
+
+    def _flush_rollups(self) -> None:
+        if not self.rollups:
+            return
+        try:
+            # Bounded so a backfill never stalls ingestion for long.
+            rollups.roll_up_new_rows(max_rows=rollups.BATCH_SIZE)
+        except Exception as exc:
+            # The high-water mark did not move; the rows are retried next time.
+            logger.warning("Rollup update failed: %s", exc)
+
+    def _commit(self, consumer) -> None:
+        # Dead letters must be on the DLQ topic before the offsets that skip
+        # their records are; otherwise a crash in between loses them.
+        # DeadLetterDeliveryError stops the consumer with the offsets
+        # uncommitted, so the batch is replayed on restart.
+        self.writer.dead_letters.ensure_delivered()
+        try:
+            consumer.commit(asynchronous=False)
+        except Exception as exc:
+            # Nothing consumed since the last commit, or a rebalance is in
+            # progress; the records will simply be redelivered.
+            logger.debug("Kafka offset commit skipped: %s", exc)
 
     def _flush_batches(
         self, flows: list[dict], alerts: list[dict]
-    ) -> None:
+    ) -> float:
+        """Persist and announce a batch; return the time spent in DB writes."""
         channel_layer = get_channel_layer()
+        dead_before = self.writer.dead_letters.published
+        written_flows = written_alerts = 0
+        write_secs = 0.0
 
         if flows:
-            objects = [self._flow_to_model(d) for d in flows]
-            try:
-                NetworkTraffic.objects.bulk_create(objects, ignore_conflicts=True)
-            except Exception as exc:
-                self.stderr.write(f"Failed to bulk_create NetworkTraffic: {exc}")
+            t0 = time.monotonic()
+            written_flows = self.writer.write(FLOWS_TOPIC, flows)
+            write_secs += time.monotonic() - t0
 
             try:
                 async_to_sync(channel_layer.group_send)(
@@ -134,7 +324,7 @@ class Command(BaseCommand):
                         "type": "network_update",
                         "data": {
                             "event": "batch_update",
-                            "count": len(flows),
+                            "count": written_flows,
                             "timestamp": str(timezone.now()),
                         },
                     },
@@ -143,11 +333,9 @@ class Command(BaseCommand):
                 logger.warning("WS push (network) failed: %s", ws_exc)
 
         if alerts:
-            objects = [self._alert_to_model(d) for d in alerts]
-            try:
-                SecurityAlert.objects.bulk_create(objects, ignore_conflicts=True)
-            except Exception as exc:
-                self.stderr.write(f"Failed to bulk_create SecurityAlert: {exc}")
+            t0 = time.monotonic()
+            written_alerts = self.writer.write(ALERTS_TOPIC, alerts)
+            write_secs += time.monotonic() - t0
 
             try:
                 async_to_sync(channel_layer.group_send)(
@@ -156,11 +344,11 @@ class Command(BaseCommand):
                         "type": "alert_notification",
                         "data": {
                             "event": "batch_alerts",
-                            "count": len(alerts),
+                            "count": written_alerts,
                             "alerts": [
                                 {
                                     "title": d.get("alert", {}).get("signature", "Alert"),
-                                    "severity": self._map_severity(
+                                    "severity": map_severity(
                                         d.get("alert", {}).get("severity")
                                     ),
                                     "source_ip": d.get("source_ip"),
@@ -176,60 +364,9 @@ class Command(BaseCommand):
 
         total = len(flows) + len(alerts)
         if total:
-            self.stdout.write(f"  Flushed {len(flows)} flows + {len(alerts)} alerts")
-
-    def _flow_to_model(self, data: dict) -> NetworkTraffic:
-        return NetworkTraffic(
-            timestamp=data.get("@timestamp", timezone.now()),
-            source_ip=data.get("source_ip"),
-            destination_ip=data.get("destination_ip"),
-            source_port=data.get("source_port") or 0,
-            destination_port=data.get("destination_port") or 0,
-            protocol=data.get("proto", "TCP"),
-            bytes_sent=data.get("orig_bytes", 0),
-            bytes_received=data.get("resp_bytes", 0),
-            packets_sent=data.get("packets_sent", 0),
-            packets_received=data.get("packets_received", 0),
-            connection_state=data.get("conn_state", "ESTABLISHED"),
-            duration=data.get("duration", 0.0),
-            application=data.get("service"),
-            country_code=data.get("geoip", {}).get("country_code2"),
-        )
-
-    def _alert_to_model(self, data: dict) -> SecurityAlert:
-        alert = data.get("alert", {})
-        category = alert.get("category", "")
-        alert_type = self.CATEGORY_TO_TYPE.get(category, "intrusion")
-
-        return SecurityAlert(
-            title=alert.get("signature", "Security Alert"),
-            description=category or "N/A",
-            severity=self._map_severity(alert.get("severity")),
-            alert_type=alert_type,
-            status="new",
-            source_ip=data.get("source_ip"),
-            destination_ip=data.get("destination_ip"),
-            source_port=data.get("source_port"),
-            destination_port=data.get("destination_port"),
-            protocol=data.get("proto"),
-            signature=alert.get("signature"),
-            rule_id=str(alert.get("signature_id", "")),
-            country_code=data.get("geoip", {}).get("country_code2"),
-            timestamp=data.get("@timestamp", timezone.now()),
-        )
-
-    @staticmethod
-    def _map_severity(suricata_severity) -> str:
-        if suricata_severity is None:
-            return "medium"
-        try:
-            level = int(suricata_severity)
-        except (TypeError, ValueError):
-            return "medium"
-        if level == 1:
-            return "critical"
-        if level == 2:
-            return "high"
-        if level == 3:
-            return "medium"
-        return "low"
+            dead = self.writer.dead_letters.published - dead_before
+            self.stdout.write(
+                f"  Flushed {written_flows} flows + {written_alerts} alerts"
+                + (f" ({dead} dead-lettered)" if dead else "")
+            )
+        return write_secs
@@ -0,0 +1,55 @@
+"""
+Manage the continuous ES transforms behind the hourly summary indices.
+
+Usage:
+    python manage.py es_transforms setup     # create missing transforms and start them
+    python manage.py es_transforms status
+    python manage.py es_transforms stop
+    python manage.py es_transforms reset     # delete transforms + summaries, recreate
+    python manage.py es_transforms delete [--delete-summaries]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.system import es_transforms
+from apps.system.elasticsearch_client import get_es_client
+
+
+class Command(BaseCommand):
+    help = "Create, inspect or remove the hourly summary ES transforms."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["setup", "status", "stop", "reset", "delete"],
+            help="What to do with the transforms",
+        )
+        parser.add_argument(
+            "--delete-summaries",
+            action="store_true",
+            help="With delete: also drop the summary indices",
+        )
+
+    def handle(self, *args, **options):
+        es = get_es_client()
+        action = options["action"]
+        try:
+            if action in ("reset", "delete"):
+                es_transforms.delete_transforms(
+                    es, delete_dest=action == "reset" or options["delete_summaries"]
+                )
+                self.stdout.write(self.style.WARNING("Transforms deleted"))
+            if action == "stop":
+                es_transforms.stop_transforms(es)
+                self.stdout.write(self.style.WARNING("Transforms stopped"))
+            if action in ("setup", "reset"):
+                for transform_id, result in es_transforms.ensure_transforms(es).items():
+                    self.stdout.write(self.style.SUCCESS(f"  {transform_id}: {result}"))
+            if action in ("setup", "status", "reset"):
+                for row in es_transforms.transform_status(es):
+                    self.stdout.write(
+                        f"  {row['id']}: {row['state']} checkpoint={row['checkpoint']} "
+                        f"processed={row['processed']} indexed={row['indexed']}"
+                        + (f" ({row['reason']})" if row["reason"] else "")
+                    )
+        except Exception as exc:
+            raise CommandError(f"Transform {action} failed: {exc}")
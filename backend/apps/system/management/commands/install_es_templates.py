@@ -0,0 +1,24 @@
+"""
+Install the Elasticsearch index templates and flow ingest pipeline.
+
+Idempotent; run it before the first document is indexed (docker-compose
+does so on backend start-up) and after changing ``apps.system.es_templates``.
+
+Usage:
+    python manage.py install_es_templates
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.system.elasticsearch_client import get_es_client
+from apps.system.es_templates import install_index_templates
+
+
+class Command(BaseCommand):
+    help = "Install index templates for network-flows-* and security-alerts-*."
+
+    def handle(self, *args, **options):
+        try:
+            installed = install_index_templates(get_es_client())
+        except Exception as exc:
+            raise CommandError(f"Could not install index templates: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"Installed {', '.join(installed)}"))
@@ -0,0 +1,98 @@
+"""
+Rewrite flow and alert indices created before the index templates.
+
+An existing index keeps the mappings it was created with, so old daily
+indices still hold text IPs and no numeric ``bytes`` field.  Each outdated
+index is copied to a temporary index outside the ``*-*`` search patterns,
+deleted, and recreated from the copy, so the new copy picks up the current
+template and the flow ingest pipeline.  Today's index is skipped unless
+``--include-current`` is given, because writers may still be adding to it.
+
+Usage:
+    python manage.py reindex_es_indices --dry-run
+    python manage.py reindex_es_indices
+    python manage.py reindex_es_indices --index "network-flows-2026.01.*" --include-current
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.system.elasticsearch_client import get_es_client
+from apps.system.es_templates import (
+    INDEX_TEMPLATES,
+    install_index_templates,
+    outdated_indices,
+    template_for,
+)
+
+TMP_PREFIX = "reindex-tmp-"
+
+
+class Command(BaseCommand):
+    help = "Reindex flow/alert indices whose mappings predate the index templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--index",
+            type=str,
+            default=",".join(f"{name}-*" for name in INDEX_TEMPLATES),
+            help="Index pattern(s) to check, comma-separated",
+        )
+        parser.add_argument(
+            "--include-current",
+            action="store_true",
+            help="Also reindex today's indices (may drop documents written meanwhile)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the outdated indices without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        es = get_es_client()
+        try:
+            install_index_templates(es)
+            outdated = outdated_indices(es, options["index"])
+        except Exception as exc:
+            raise CommandError(f"Elasticsearch unavailable: {exc}")
+
+        today = datetime.utcnow().strftime("%Y.%m.%d")
+        if not options["include_current"]:
+            outdated = {i: f for i, f in outdated.items() if not i.endswith(today)}
+
+        if not outdated:
+            self.stdout.write(self.style.SUCCESS("All indices match the templates"))
+            return
+
+        for index, fields in sorted(outdated.items()):
+            found = ", ".join(f"{f}={t or 'missing'}" for f, t in fields.items())
+            if options["dry_run"]:
+                self.stdout.write(f"  {index}: {found}")
+                continue
+            self.stdout.write(f"  Reindexing {index} ({found})")
+            self._rebuild(es, index)
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(outdated)} indices would be reindexed"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reindexed {len(outdated)} indices"))
+
+    def _rebuild(self, es, index: str) -> None:
+        tmp = f"{TMP_PREFIX}{index}"
+        template = INDEX_TEMPLATES[template_for(index)]["template"]
+        expected = es.count(index=index)["count"]
+
+        # The temporary copy gets the template by hand: its name is outside
+        # the template pattern so searches never see the data twice.
+        es.options(ignore_status=404).indices.delete(index=tmp)
+        es.indices.create(index=tmp, **template)
+        es.reindex(source={"index": index}, dest={"index": tmp}, refresh=True, wait_for_completion=True)
+        copied = es.count(index=tmp)["count"]
+        if copied != expected:
+            es.indices.delete(index=tmp)
+            raise CommandError(f"{index}: copied {copied} of {expected} documents, left unchanged")
+
+        es.indices.delete(index=index)
+        es.reindex(source={"index": tmp}, dest={"index": index}, refresh=True, wait_for_completion=True)
+        es.indices.delete(index=tmp)
@@ -0,0 +1,189 @@
+"""
+Re-ingest records parked on the ``*_dlq`` dead-letter topics.
+
+Reads DLQ envelopes written by ``consume_kafka``, and writes the original
+payloads through the same retry / split path.  Records that fail again go
+back to the DLQ with their replay counter incremented; records that have
+already been replayed ``--max-replays`` times are skipped.
+
+Usage:
+    python manage.py replay_dlq
+    python manage.py replay_dlq --topic network_flows_dlq --max-messages 1000
+    python manage.py replay_dlq --dry-run
+"""
+import json
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from decouple import config
+from confluent_kafka import Consumer, Producer
+
+from apps.system.ingest import (
+    ALERTS_TOPIC,
+    FLOWS_TOPIC,
+    MODEL_BUILDERS,
+    BatchWriter,
+    DeadLetterPublisher,
+    dlq_topic,
+)
+
+
+class Command(BaseCommand):
+    help = "Replay dead-lettered Kafka records into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--topic",
+            action="append",
+            dest="topics",
+            help="DLQ topic to replay (repeatable). Defaults to all DLQ topics.",
+        )
+        parser.add_argument(
+            "--bootstrap",
+            type=str,
+            help="Bootstrap servers override (e.g. localhost:9092)",
+        )
+        parser.add_argument(
+            "--group-id",
+            type=str,
+            default="campus-security-dlq-replay",
+            help="Kafka consumer group id used to track replay progress",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Max records per bulk write batch",
+        )
+        parser.add_argument(
+            "--max-messages",
+            type=int,
+            default=0,
+            help="Stop after this many DLQ messages (0 = until the topic is drained)",
+        )
+        parser.add_argument(
+            "--idle-timeout",
+            type=float,
+            default=10.0,
+            help="Stop after this many seconds without new DLQ messages",
+        )
+        parser.add_argument(
+            "--max-replays",
+            type=int,
+            default=3,
+            help="Skip records that have already been replayed this many times",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Read and summarise the DLQ without writing or committing offsets",
+        )
+
+    def handle(self, *args, **options):
+        bootstrap_servers = options.get("bootstrap") or config(
+            "KAFKA_BOOTSTRAP_SERVERS", default="localhost:9092"
+        )
+        topics = options["topics"] or [dlq_topic(FLOWS_TOPIC), dlq_topic(ALERTS_TOPIC)]
+        batch_size = options["batch_size"]
+        max_messages = options["max_messages"]
+        max_replays = options["max_replays"]
+        dry_run = options["dry_run"]
+
+        consumer = Consumer({
+            "bootstrap.servers": bootstrap_servers,
+            "group.id": options["group_id"],
+            "auto.offset.reset": "earliest",
+            "enable.auto.commit": False,
+        })
+        consumer.subscribe(topics)
+
+        dead_letters = DeadLetterPublisher(
+            None if dry_run else Producer({"bootstrap.servers": bootstrap_servers})
+        )
+        writer = BatchWriter(dead_letters)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Replaying {topics} from {bootstrap_servers}"
+            + (" (dry run)" if dry_run else "")
+        ))
+
+        # (source_topic, replays) -> payloads, so re-failures keep their count
+        pending: dict[tuple[str, int], list] = defaultdict(list)
+        pending_count = 0
+        seen = replayed = skipped = 0
+        errors: dict[str, int] = defaultdict(int)
+        last_message = time.monotonic()
+
+        try:
+            while True:
+                if max_messages and seen >= max_messages:
+                    break
+                msg = consumer.poll(1.0)
+                if msg is None:
+                    if time.monotonic() - last_message >= options["idle_timeout"]:
+                        break
+                    continue
+                if msg.error():
+                    self.stderr.write(f"Kafka error: {msg.error()}")
+                    continue
+
+                seen += 1
+                last_message = time.monotonic()
+                try:
+                    envelope = json.loads(msg.value().decode("utf-8"))
+                except Exception as exc:
+                    self.stderr.write(f"Unreadable DLQ envelope at offset {msg.offset()}: {exc}")
+                    skipped += 1
+                    continue
+
+                source_topic = envelope.get("source_topic")
+                payload = envelope.get("payload")
+                replays = int(envelope.get("replays", 0))
+                errors[envelope.get("error_type", "unknown")] += 1
+
+                if source_topic not in MODEL_BUILDERS or not isinstance(payload, dict):
+                    skipped += 1
+                    continue
+                if replays >= max_replays:
+                    skipped += 1
+                    continue
+
+                pending[(source_topic, replays + 1)].append(payload)
+                pending_count += 1
+                if pending_count >= batch_size:
+                    replayed += self._replay(writer, pending, dry_run)
+                    pending_count = 0
+                    if not dry_run:
+                        dead_letters.ensure_delivered()
+                        consumer.commit(asynchronous=False)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping DLQ replay...")
+        finally:
+            try:
+                if pending_count:
+                    replayed += self._replay(writer, pending, dry_run)
+                    if not dry_run:
+                        dead_letters.ensure_delivered()
+                        consumer.commit(asynchronous=False)
+            finally:
+                dead_letters.flush()
+                consumer.close()
+
+        summary = ", ".join(f"{k}={v}" for k, v in sorted(errors.items())) or "none"
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {seen} DLQ records: {replayed} re-ingested, "
+            f"{dead_letters.published} dead-lettered again, {skipped} skipped "
+            f"(errors: {summary})"
+        ))
+
+    @staticmethod
+    def _replay(writer: BatchWriter, pending: dict, dry_run: bool) -> int:
+        written = 0
+        for (source_topic, replays), payloads in pending.items():
+            if dry_run:
+                written += len(payloads)
+            else:
+                written += writer.write(source_topic, payloads, replays=replays)
+        pending.clear()
+        return written
@@ -0,0 +1,45 @@
+"""
+Run the host metrics sampler as its own process.
+
+Use this instead of the in-process thread (SYSTEM_METRICS_SAMPLER=False)
+when the web workers should not sample, e.g. several daphne replicas.  The
+samples only reach the web workers through Redis, so USE_REDIS must be on.
+
+Usage:
+    python manage.py sample_system_metrics
+    python manage.py sample_system_metrics --interval 2
+"""
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.system.metrics_sampler import MetricsSampler
+
+
+class Command(BaseCommand):
+    help = "Sample CPU, memory, disk and network metrics into the Redis ring buffer."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.SYSTEM_METRICS_INTERVAL,
+            help="Seconds between samples",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.USE_REDIS:
+            self.stderr.write(self.style.WARNING(
+                "USE_REDIS is off: samples stay in this process and the API will not see them"
+            ))
+        sampler = MetricsSampler(interval=options["interval"])
+        signal.signal(signal.SIGTERM, lambda *_: sampler.stop())
+        self.stdout.write(self.style.SUCCESS(
+            f"Sampling system metrics every {sampler.interval}s"
+        ))
+        try:
+            sampler.run()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Stopping system metrics sampler...")
@@ -0,0 +1,70 @@
+"""
+Fold new network_traffic / security_alerts rows into the rollup tables.
+
+Each run picks up from the per-table high-water mark, so it is cheap to
+call often; the first run backfills everything already in the database.
+``consume_kafka`` does the same on its flush timer, so this command is only
+needed when the consumer runs with ``--no-rollups`` or is not deployed.
+
+Usage:
+    python manage.py update_rollups --once
+    python manage.py update_rollups --interval 30
+    python manage.py update_rollups --rebuild --once
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.system import rollups
+
+
+class Command(BaseCommand):
+    help = "Maintain the minute/hour traffic and alert rollups from a high-water mark."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Catch up once and exit instead of running forever",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=rollups.FLUSH_INTERVAL_SECS,
+            help="Seconds between runs",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=rollups.BATCH_SIZE,
+            help="Raw rows folded in per transaction",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop all rollups and high-water marks and recount from scratch",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            rollups.rebuild_rollups()
+            self.stdout.write(self.style.WARNING("Rollups cleared; recounting from scratch"))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Updating rollups" + ("" if options["once"] else f" every {options['interval']}s")
+        ))
+        try:
+            while True:
+                started = time.monotonic()
+                folded = rollups.roll_up_new_rows(batch_size=options["batch_size"])
+                pruned = rollups.prune_minute_rollups()
+                if folded or pruned:
+                    self.stdout.write(
+                        f"  Folded {folded} rows in {time.monotonic() - started:.1f}s"
+                        + (f", pruned {pruned} minute buckets" if pruned else "")
+                    )
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping rollup updates...")
@@ -0,0 +1,167 @@
+"""
+Background host metrics sampler.
+
+``MetricsSampler`` records CPU, memory, disk and network throughput every
+``SYSTEM_METRICS_INTERVAL`` seconds into a ring buffer, so request handlers
+read the latest sample instead of blocking in ``psutil.cpu_percent``.
+
+The buffer is a Redis list (``LPUSH`` + ``LTRIM``) when ``USE_REDIS`` is on,
+shared by every worker; otherwise an in-process deque.  The sampler runs as
+a daemon thread in the ASGI process (``SYSTEM_METRICS_SAMPLER``) or as
+``manage.py sample_system_metrics``.  When several processes run one, a
+cache lease elects a single writer.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import psutil
+from decouple import config
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "campus:system_metrics"
+LEADER_KEY = "system_metrics_sampler"
+
+
+class _RedisRing:
+    def __init__(self, size: int):
+        import redis
+
+        self.size = size
+        self.client = redis.Redis(
+            host=config("REDIS_HOST", default="127.0.0.1"),
+            port=config("REDIS_PORT", default=6379, cast=int),
+            db=1,
+        )
+
+    def push(self, sample: dict) -> None:
+        pipe = self.client.pipeline()
+        pipe.lpush(BUFFER_KEY, json.dumps(sample))
+        pipe.ltrim(BUFFER_KEY, 0, self.size - 1)
+        pipe.execute()
+
+    def recent(self, count: int) -> list[dict]:
+        """Newest first."""
+        return [json.loads(raw) for raw in self.client.lrange(BUFFER_KEY, 0, count - 1)]
+
+
+class _LocalRing:
+    def __init__(self, size: int):
+        self.samples: deque = deque(maxlen=size)
+
+    def push(self, sample: dict) -> None:
+        self.samples.appendleft(sample)
+
+    def recent(self, count: int) -> list[dict]:
+        return list(self.samples)[:count]
+
+
+_ring = None
+_ring_lock = threading.Lock()
+
+
+def get_ring():
+    global _ring
+    with _ring_lock:
+        if _ring is None:
+            size = settings.SYSTEM_METRICS_HISTORY
+            _ring = _RedisRing(size) if settings.USE_REDIS else _LocalRing(size)
+        return _ring
+
+
+def take_sample(previous: dict | None = None) -> dict:
+    """One non-blocking sample; network rates are relative to ``previous``.
+
+    ``cpu_percent(interval=None)`` reports usage since this process's last
+    call, so it is only meaningful when called periodically.
+    """
+    now = time.time()
+    net = psutil.net_io_counters()
+    sample = {
+        "ts": now,
+        "cpu": round(psutil.cpu_percent(interval=None), 1),
+        "memory": round(psutil.virtual_memory().percent, 1),
+        "disk": round(psutil.disk_usage("/").percent, 1),
+        "net_bytes_sent": net.bytes_sent,
+        "net_bytes_recv": net.bytes_recv,
+        "net_sent_bps": 0.0,
+        "net_recv_bps": 0.0,
+        "boot_time": psutil.boot_time(),
+    }
+    if previous and now > previous["ts"]:
+        elapsed = now - previous["ts"]
+        sample["net_sent_bps"] = round(max(0, net.bytes_sent - previous["net_bytes_sent"]) / elapsed, 1)
+        sample["net_recv_bps"] = round(max(0, net.bytes_recv - previous["net_bytes_recv"]) / elapsed, 1)
+    return sample
+
+
+def latest_sample() -> dict:
+    """Most recent sample, or a fresh non-blocking one if the sampler is not running."""
+    interval = settings.SYSTEM_METRICS_INTERVAL
+    try:
+        recent = get_ring().recent(1)
+    except Exception as exc:
+        logger.debug("Metrics buffer unavailable: %s", exc)
+        recent = []
+    if recent and time.time() - recent[0]["ts"] <= 3 * interval:
+        return recent[0]
+    return take_sample()
+
+
+def history(seconds: float) -> list[dict]:
+    """Samples from the last ``seconds``, oldest first."""
+    count = max(1, int(seconds / settings.SYSTEM_METRICS_INTERVAL) + 1)
+    cutoff = time.time() - seconds
+    samples = [s for s in get_ring().recent(count) if s["ts"] >= cutoff]
+    samples.reverse()
+    return samples
+
+
+class MetricsSampler:
+    """Periodically pushes ``take_sample()`` into the ring buffer."""
+
+    def __init__(self, interval: float | None = None):
+        self.interval = interval or settings.SYSTEM_METRICS_INTERVAL
+        self.identity = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _is_leader(self) -> bool:
+        """Hold a lease of three intervals; renew it while we are the holder."""
+        lease = int(self.interval * 3) + 1
+        if cache.add(LEADER_KEY, self.identity, lease):
+            return True
+        if cache.get(LEADER_KEY) == self.identity:
+            cache.touch(LEADER_KEY, lease)
+            return True
+        return False
+
+    def run(self) -> None:
+        ring = get_ring()
+        previous = None
+        psutil.cpu_percent(interval=None)  # prime the CPU counter
+        while not self._stop.wait(self.interval):
+            try:
+                if not self._is_leader():
+                    previous = None
+                    continue
+                sample = take_sample(previous)
+                ring.push(sample)
+                previous = sample
+            except Exception as exc:
+                logger.warning("System metrics sample failed: %s", exc)
+
+    def start_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, name="system-metrics-sampler", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0002_rollupwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('period', models.IntegerField()),
+                ('window', models.BigIntegerField(default=0)),
+                ('used', models.IntegerField(default=0)),
+                ('paused_until', models.FloatField(default=0)),
+            ],
+            options={
+                'db_table': 'rate_limit_windows',
+                'ordering': ['name', 'period'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ratelimitwindow',
+            constraint=models.UniqueConstraint(fields=('name', 'period'), name='rate_limit_window_unique'),
+        ),
+    ]
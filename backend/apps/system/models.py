@@ -18,3 +18,48 @@ class SystemSettings(models.Model):
     
     def __str__(self):
         return f"{self.category}.{self.key}"
+
+
+class RollupWatermark(models.Model):
+    """High-water mark of raw rows already folded into the rollup tables.
+
+    One row per source table.  ``last_id`` only moves forward, in the same
+    transaction as the rollup upserts it accounts for.
+    """
+
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    caught_up_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+        ordering = ['source']
+
+    def __str__(self):
+        return f"{self.source}@{self.last_id}"
+
+
+class RateLimitWindow(models.Model):
+    """Calls made in the current window of a shared rate limit.
+
+    One row per limit name and window length (``period`` seconds).
+    ``window`` is the window number, epoch seconds // ``period``; ``used``
+    restarts from 0 when it moves on.  See ``apps.system.rate_limit``.
+    """
+
+    name = models.CharField(max_length=50)
+    period = models.IntegerField()
+    window = models.BigIntegerField(default=0)
+    used = models.IntegerField(default=0)
+    paused_until = models.FloatField(default=0)
+
+    class Meta:
+        db_table = 'rate_limit_windows'
+        ordering = ['name', 'period']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'period'], name='rate_limit_window_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}/{self.period}s: {self.used}"
@@ -0,0 +1,31 @@
+"""
+IPv4 network matching on text columns.
+
+Addresses stored as text (``GenericIPAddressField``, IOC values) have no
+range operator shared by every backend, but an IPv4 network is a handful
+of dotted prefixes: ``172.16.0.0/12`` is ``172.16.`` to ``172.31.``.
+Those are ``LIKE 'prefix%'`` lookups an ordinary b-tree index serves.
+IPv6 text forms do not share prefixes reliably, so only IPv4 is handled.
+"""
+
+from django.db.models import Q
+
+
+def ipv4_network_q(network, field: str) -> Q:
+    """``field`` holds an address inside the IPv4 ``network``."""
+    octets = str(network.network_address).split(".")
+    whole, rest = divmod(network.prefixlen, 8)
+    if whole == 4:
+        return Q(**{field: str(network.network_address)})
+    if rest == 0:
+        heads = [octets[:whole]]
+    else:
+        first = int(octets[whole])
+        heads = [octets[:whole] + [str(v)] for v in range(first, first + 2 ** (8 - rest))]
+    if len(heads[0]) == 4:
+        # /25 to /31: the spanned values are whole addresses
+        return Q(**{f"{field}__in": [".".join(head) for head in heads]})
+    condition = Q()
+    for head in heads:
+        condition |= Q(**{f"{field}__startswith": ".".join(head) + "." if head else ""})
+    return condition
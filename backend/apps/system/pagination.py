@@ -0,0 +1,150 @@
+"""
+Keyset (seek) pagination for the large time-series list endpoints.
+
+Pages are selected with ``WHERE (timestamp, id) < (last_timestamp, last_id)``
+on the ``(timestamp, id)`` index instead of ``OFFSET``, so page 10 000 costs
+the same as page 1, and ``count`` comes from ``counting.count_rows``:
+an estimate on large tables, flagged by ``"approximate": true``.  Cursors
+are opaque base64 tokens carrying the boundary row's key; ``next`` /
+``previous`` links are built from them.
+
+The key is the queryset's first ordering field (``?ordering=`` still works
+for the viewset's ``ordering_fields``) with ``id`` as tie-breaker in the
+same direction; only ``timestamp`` is backed by the composite index.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.system.counting import count_rows
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    default_ordering = "-timestamp"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _decode(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return data["v"], int(data["id"]), bool(data.get("r"))
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode(self, row, reverse: bool) -> str:
+        value = getattr(row, self.field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data = {"v": value, "id": row.pk, "r": reverse}
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+    def _seek(self, value, pk: int, forward: bool) -> Q:
+        """Rows after ``(value, pk)`` in the walking direction."""
+        after = "gt" if forward != self.descending else "lt"
+        on_or_after = "gte" if after == "gt" else "lte"
+        return Q(**{f"{self.field}__{on_or_after}": value}) & (
+            Q(**{f"{self.field}__{after}": value}) | Q(**{self.field: value, f"pk__{after}": pk})
+        )
+
+    def _model_field(self, queryset):
+        """The key's model field, ``None`` for an annotation such as a search rank."""
+        try:
+            return queryset.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size_value = self.get_page_size(request)
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or [self.default_ordering]
+        first = ordering[0]
+        self.descending = first.startswith("-")
+        self.field = first.lstrip("-")
+        if self.field == "pk":
+            self.field = "id"
+
+        cursor = self._decode(request)
+        backwards = bool(cursor and cursor[2])
+        walk_desc = self.descending != backwards
+        prefix = "-" if walk_desc else ""
+        qs = queryset.order_by(f"{prefix}{self.field}", f"{prefix}id")
+        if cursor is not None:
+            value, pk, _ = cursor
+            if isinstance(self._model_field(queryset), DateTimeField):
+                value = parse_datetime(value)
+                if value is None:
+                    raise NotFound(self.invalid_cursor_message)
+            qs = qs.filter(self._seek(value, pk, forward=not backwards))
+
+        rows = list(qs[: self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+        if backwards:
+            rows.reverse()
+
+        # A cursor means there is a page on the side we came from.
+        self.has_next = has_more if not backwards else cursor is not None
+        self.has_previous = has_more if backwards else cursor is not None
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        self.count, self.approximate = count_rows(queryset)
+        return rows
+
+    def _link(self, row, reverse: bool):
+        if row is None:
+            return None
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self._encode(row, reverse))
+
+    def get_next_link(self):
+        return self._link(self.last_row, reverse=False) if self.has_next else None
+
+    def get_previous_link(self):
+        return self._link(self.first_row, reverse=True) if self.has_previous else None
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.count,
+            "approximate": self.approximate,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer"},
+                "approximate": {"type": "boolean"},
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
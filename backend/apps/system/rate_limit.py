@@ -0,0 +1,88 @@
+"""
+Rate limit for quota-limited external APIs, shared by every process.
+
+The daphne workers, the management commands and the Kafka consumer all
+draw from one quota.  The state is therefore kept in the database, which
+every process shares, unlike the default (per-process) cache: one
+``RateLimitWindow`` row per limit and window length, counting the calls
+made in the current fixed window.  A call is allowed only if every window
+has room.  Each count is taken with a conditional ``UPDATE``, so
+concurrent callers never overspend, and a restart does not reset it.
+
+``acquire`` waits at most ``timeout`` seconds for room, so a caller on the
+request path gives up quickly instead of queueing behind the quota.
+``pause`` blocks every window for a while, for when the API itself
+answers 429 with a ``Retry-After``.
+"""
+
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import F
+
+from apps.system.models import RateLimitWindow
+
+logger = logging.getLogger(__name__)
+
+
+class SharedRateLimit:
+    """At most ``calls`` per ``period`` seconds for each ``(period, calls)`` in ``limits``."""
+
+    def __init__(self, name: str, limits):
+        self.name = name
+        self.limits = tuple(limits)
+        self._rows_ready = False
+
+    def _rows(self):
+        if not self._rows_ready:
+            for period, _ in self.limits:
+                RateLimitWindow.objects.get_or_create(name=self.name, period=period)
+            self._rows_ready = True
+        return RateLimitWindow.objects.filter(name=self.name)
+
+    def _take(self, now: float) -> float:
+        """Count one call in every window; 0 if allowed, else seconds to wait."""
+        rows = self._rows()
+        with transaction.atomic():
+            for period, calls in self.limits:
+                window = int(now // period)
+                rows.filter(period=period, window__lt=window).update(window=window, used=0)
+                taken = rows.filter(period=period, used__lt=calls, paused_until__lte=now).update(
+                    used=F("used") + 1
+                )
+                if not taken:
+                    row = rows.filter(period=period).first()
+                    transaction.set_rollback(True)
+                    if row is None:
+                        # Deleted (from the admin, say); recreate it and retry.
+                        self._rows_ready = False
+                        return 0.01
+                    if row.paused_until > now:
+                        return row.paused_until - now
+                    return (window + 1) * period - now
+        return 0.0
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take a call, waiting up to ``timeout`` seconds; False if none came."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                wait = self._take(time.time())
+            except Exception as exc:
+                # Fail closed: without the shared count the quota cannot be honoured.
+                logger.warning("Rate limit %s unavailable: %s", self.name, exc)
+                return False
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Allow no calls for ``seconds``, in every process."""
+        until = time.time() + seconds
+        try:
+            self._rows().filter(paused_until__lt=until).update(paused_until=until)
+        except Exception as exc:
+            logger.warning("Pausing rate limit %s failed: %s", self.name, exc)
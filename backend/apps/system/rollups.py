@@ -0,0 +1,319 @@
+"""
+Minute and hour traffic and alert rollups.
+
+Raw ``network_traffic`` / ``security_alerts`` rows are folded into
+``traffic_rollups`` / ``alert_rollups`` incrementally: ``roll_up_new_rows``
+reads the rows above a per-table high-water mark (``RollupWatermark``),
+counts each one at minute and hour grain, and upserts the counters and the
+new mark in one transaction.  It runs from ``update_rollups`` and from
+``consume_kafka``; rows written by any path (consumer, sensors, seeding)
+are counted exactly once.
+
+The read helpers below let the dashboard and network views answer from a
+few hundred pre-aggregated rows instead of scanning raw ``network_traffic``:
+whole hours come from the hour grain, the partial hours at either end of a
+window from the minute grain.
+"""
+
+import ipaddress
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from apps.alerts.models import AlertRollup, SecurityAlert
+from apps.network.models import NetworkTraffic, TrafficRollup
+from apps.system.models import RollupWatermark
+from apps.system import watermarks
+
+logger = logging.getLogger(__name__)
+
+MINUTE = "minute"
+HOUR = "hour"
+FLUSH_INTERVAL_SECS = 10.0
+BATCH_SIZE = 5000
+# Rows younger than this are left for the next run, so a transaction that
+# took a lower id but commits late is not skipped by the high-water mark.
+SETTLE_SECS = 5.0
+# Minute rows are only read for the partial hours at the edges of a window.
+MINUTE_RETENTION = timedelta(days=2)
+# Reads fall back to raw rows when no run has caught up for this long.
+STALE_AFTER = timedelta(minutes=5)
+
+FLOW_FIELDS = (
+    "id", "timestamp", "created_at", "source_ip", "destination_ip", "protocol",
+    "connection_state", "bytes_sent", "bytes_received", "packets_sent", "packets_received",
+)
+ALERT_FIELDS = ("id", "timestamp", "created_at", "severity", "alert_type")
+
+
+def minute_bucket(value: datetime) -> datetime:
+    return value.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+
+
+def hour_bucket(value: datetime) -> datetime:
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def flow_direction(source_ip: str, destination_ip: str) -> str:
+    try:
+        src_internal = ipaddress.ip_address(source_ip).is_private
+        dst_internal = ipaddress.ip_address(destination_ip).is_private
+    except ValueError:
+        return "unknown"
+    if src_internal and not dst_internal:
+        return "outbound"
+    if dst_internal and not src_internal:
+        return "inbound"
+    return "internal"
+
+
+class RollupAccumulator:
+    """In-memory ``(grain, bucket, dimension, key)`` counters awaiting flush."""
+
+    def __init__(self):
+        self._traffic: dict[tuple, list[int]] = defaultdict(lambda: [0, 0, 0])
+        self._alerts: dict[tuple, int] = defaultdict(int)
+
+    def __len__(self):
+        return len(self._traffic) + len(self._alerts)
+
+    def add_flows(self, rows) -> None:
+        """Count ``NetworkTraffic`` rows given as ``.values(*FLOW_FIELDS)`` dicts."""
+        for row in rows:
+            nbytes = int(row["bytes_sent"] or 0) + int(row["bytes_received"] or 0)
+            npackets = int(row["packets_sent"] or 0) + int(row["packets_received"] or 0)
+            keys = {
+                "total": "",
+                "protocol": row["protocol"] or "",
+                "source_ip": row["source_ip"] or "",
+                "direction": flow_direction(row["source_ip"], row["destination_ip"]),
+                "connection_state": row["connection_state"] or "",
+            }
+            for grain, bucket in ((MINUTE, minute_bucket(row["timestamp"])),
+                                  (HOUR, hour_bucket(row["timestamp"]))):
+                for dimension, key in keys.items():
+                    counters = self._traffic[(grain, bucket, dimension, key)]
+                    counters[0] += nbytes
+                    counters[1] += npackets
+                    counters[2] += 1
+
+    def add_alerts(self, rows) -> None:
+        """Count ``SecurityAlert`` rows given as ``.values(*ALERT_FIELDS)`` dicts."""
+        for row in rows:
+            for grain, bucket in ((MINUTE, minute_bucket(row["timestamp"])),
+                                  (HOUR, hour_bucket(row["timestamp"]))):
+                self._alerts[(grain, bucket, "total", "")] += 1
+                self._alerts[(grain, bucket, "severity", row["severity"] or "")] += 1
+                self._alerts[(grain, bucket, "alert_type", row["alert_type"] or "")] += 1
+
+    def flush(self) -> int:
+        """Upsert accumulated counters and reset; return rows written.
+
+        Call inside the caller's transaction so the counters commit together
+        with whatever they account for.
+        """
+        if not self:
+            return 0
+        now = timezone.now()
+        _upsert(
+            TrafficRollup, ("bytes", "packets", "flows"),
+            [(*k, *v, now) for k, v in self._traffic.items()],
+        )
+        _upsert(
+            AlertRollup, ("count",),
+            [(*k, v, now) for k, v in self._alerts.items()],
+        )
+        written = len(self)
+        self._traffic.clear()
+        self._alerts.clear()
+        return written
+
+
+def _upsert(model, counter_fields, rows) -> None:
+    """``INSERT ... ON CONFLICT DO UPDATE`` that adds to existing counters.
+
+    Works on both SQLite (3.24+) and PostgreSQL.
+    """
+    if not rows:
+        return
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    key_cols = [qn(c) for c in ("grain", "bucket", "dimension", "key")]
+    counter_cols = [qn(c) for c in counter_fields]
+    columns = key_cols + counter_cols + [qn("updated_at")]
+    updates = ", ".join(f"{c} = {table}.{c} + excluded.{c}" for c in counter_cols)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET {updates}, "
+        f"{qn('updated_at')} = excluded.{qn('updated_at')}"
+    )
+    adapt = connection.ops.adapt_datetimefield_value
+    params = [
+        (grain, adapt(bucket), dimension, key, *counters, adapt(updated_at))
+        for grain, bucket, dimension, key, *counters, updated_at in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+# -- Maintenance -------------------------------------------------------------
+
+# source table -> (model, fields read, accumulator method)
+SOURCES = {
+    NetworkTraffic._meta.db_table: (NetworkTraffic, FLOW_FIELDS, RollupAccumulator.add_flows),
+    SecurityAlert._meta.db_table: (SecurityAlert, ALERT_FIELDS, RollupAccumulator.add_alerts),
+}
+
+
+def _roll_up_batch(source: str, batch_size: int) -> tuple[int, bool]:
+    """Fold the next batch above ``source``'s mark; return (rows, caught_up)."""
+    model, fields, add = SOURCES[source]
+    RollupWatermark.objects.get_or_create(source=source)
+    settled = timezone.now() - timedelta(seconds=SETTLE_SECS)
+
+    with transaction.atomic():
+        mark = RollupWatermark.objects.select_for_update().get(source=source)
+        rows = list(
+            model.objects.filter(id__gt=mark.last_id)
+            .order_by("id")
+            .values(*fields)[:batch_size]
+        )
+        caught_up = len(rows) < batch_size
+        # Stop at the first unsettled row rather than skipping past it.
+        for i, row in enumerate(rows):
+            if row["created_at"] > settled:
+                rows, caught_up = rows[:i], True
+                break
+        if rows:
+            accumulator = RollupAccumulator()
+            add(accumulator, rows)
+            accumulator.flush()
+            mark.last_id = rows[-1]["id"]
+        if caught_up:
+            mark.caught_up_at = timezone.now()
+        mark.save()
+    return len(rows), caught_up
+
+
+def roll_up_new_rows(max_rows: int | None = None, batch_size: int = BATCH_SIZE) -> int:
+    """Fold raw rows above the high-water marks into the rollups.
+
+    ``max_rows`` bounds the work per source and call (the consumer uses it
+    so a large backfill does not stall ingestion); ``None`` runs until
+    caught up.  Returns the number of raw rows folded in.
+    """
+    total = 0
+    for source in SOURCES:
+        done = 0
+        while max_rows is None or done < max_rows:
+            size = batch_size if max_rows is None else min(batch_size, max_rows - done)
+            rows, caught_up = _roll_up_batch(source, size)
+            done += rows
+            if caught_up:
+                break
+        total += done
+    if total:
+        # The dashboard reads the rollups, so its data changed too.
+        watermarks.touch(watermarks.FLOWS, watermarks.ALERTS)
+    return total
+
+
+def prune_minute_rollups(retention: timedelta = MINUTE_RETENTION) -> int:
+    """Delete minute rows older than ``retention``; hour rows are kept."""
+    cutoff = timezone.now() - retention
+    deleted = 0
+    for model in (TrafficRollup, AlertRollup):
+        deleted += model.objects.filter(grain=MINUTE, bucket__lt=cutoff).delete()[0]
+    return deleted
+
+
+def rebuild_rollups() -> None:
+    """Drop all rollups and marks so the next run recounts from scratch."""
+    with transaction.atomic():
+        TrafficRollup.objects.all().delete()
+        AlertRollup.objects.all().delete()
+        RollupWatermark.objects.filter(source__in=SOURCES).delete()
+
+
+# -- Read side ---------------------------------------------------------------
+
+def rollups_cover(model, since: datetime) -> bool:
+    """True when the rollups can answer for the window starting at ``since``.
+
+    The source table must have been caught up recently, and ``since`` must
+    fall within the minute-grain retention (its partial hour is read there).
+    """
+    if since < timezone.now() - MINUTE_RETENTION:
+        return False
+    return caught_up(model)
+
+
+def caught_up(model) -> bool:
+    """True when ``model``'s source table was rolled up within ``STALE_AFTER``."""
+    source = {TrafficRollup: NetworkTraffic, AlertRollup: SecurityAlert}[model]._meta.db_table
+    return RollupWatermark.objects.filter(
+        source=source, caught_up_at__gte=timezone.now() - STALE_AFTER
+    ).exists()
+
+
+def _window(since: datetime, until: datetime | None = None) -> Q:
+    """Hour rows for whole hours in ``[since, until)``, minute rows for the rest."""
+    until = until or timezone.now() + timedelta(minutes=1)
+    first_hour = hour_bucket(since)
+    if first_hour < since:
+        first_hour += timedelta(hours=1)
+    last_hour = hour_bucket(until)
+    if first_hour >= last_hour:
+        return Q(grain=MINUTE, bucket__gte=since, bucket__lt=until)
+    return (
+        Q(grain=HOUR, bucket__gte=first_hour, bucket__lt=last_hour)
+        | Q(grain=MINUTE, bucket__gte=since, bucket__lt=first_hour)
+        | Q(grain=MINUTE, bucket__gte=last_hour, bucket__lt=until)
+    )
+
+
+def traffic_by(dimension: str, since: datetime, until: datetime | None = None):
+    """``[{key, bytes, packets, flows}, ...]`` for ``dimension`` since ``since``."""
+    return (
+        TrafficRollup.objects.filter(_window(since, until), dimension=dimension)
+        .values("key")
+        .annotate(bytes=Sum("bytes"), packets=Sum("packets"), flows=Sum("flows"))
+        .order_by()
+    )
+
+
+def traffic_hourly(since: datetime):
+    """Hourly ``{hour, bytes, flows}`` series from the ``total`` dimension."""
+    return (
+        TrafficRollup.objects.filter(grain=HOUR, dimension="total", bucket__gte=hour_bucket(since))
+        .values(hour=F("bucket"))
+        .annotate(bytes=Sum("bytes"), flows=Sum("flows"))
+        .order_by("hour")
+    )
+
+
+def alerts_by(dimension: str, since: datetime):
+    """``[{key, count}, ...]`` for ``dimension`` since ``since``."""
+    return (
+        AlertRollup.objects.filter(_window(since), dimension=dimension)
+        .values("key")
+        .annotate(count=Sum("count"))
+        .order_by()
+    )
+
+
+def alerts_series(dimension: str, since: datetime, grain: str):
+    """``[{bucket, key, count}, ...]`` at ``grain`` for ``dimension`` since ``since``.
+
+    Hour rows are kept indefinitely; minute rows only for ``MINUTE_RETENTION``.
+    """
+    return (
+        AlertRollup.objects.filter(grain=grain, dimension=dimension, bucket__gte=since)
+        .values("bucket", "key", "count")
+        .order_by("bucket")
+    )
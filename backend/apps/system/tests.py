@@ -0,0 +1,442 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.alerts.models import AlertRollup, SecurityAlert
+from apps.authentication.models import User
+from apps.network.models import NetworkTraffic, TrafficRollup
+from apps.system import caching, rollups
+from apps.system.circuit_breaker import CircuitBreaker, CircuitOpenError
+from apps.system.ingest import (
+    ALERTS_TOPIC,
+    FLOWS_TOPIC,
+    BatchWriter,
+    DeadLetterDeliveryError,
+    DeadLetterPublisher,
+    dlq_topic,
+)
+from apps.system.models import RateLimitWindow
+from apps.system.pagination import KeysetPagination
+from apps.system.rate_limit import SharedRateLimit
+from apps.system.wazuh_client import WazuhClient
+
+
+def flow(source_ip="10.0.0.1", **extra):
+    return {
+        "@timestamp": "2026-01-01T00:00:00+00:00",
+        "source_ip": source_ip,
+        "destination_ip": "10.0.0.2",
+        "proto": "TCP",
+        **extra,
+    }
+
+
+class FakeProducer:
+    """Just enough of ``confluent_kafka.Producer`` for ``DeadLetterPublisher``."""
+
+    def __init__(self, error=None, stuck=0):
+        self.error = error
+        self.stuck = stuck
+        self.queued = []
+        self.delivered = []
+
+    def produce(self, topic, value, callback):
+        self.queued.append((topic, value, callback))
+
+    def poll(self, timeout):
+        return 0
+
+    def flush(self, timeout):
+        for topic, value, callback in self.queued:
+            callback(self.error, None)
+            if self.error is None:
+                self.delivered.append((topic, json.loads(value)))
+        self.queued = []
+        return self.stuck
+
+
+class BatchWriterTests(TestCase):
+    def setUp(self):
+        self.producer = FakeProducer()
+        self.writer = BatchWriter(DeadLetterPublisher(self.producer), sleep=lambda secs: None)
+
+    def test_poison_record_is_isolated_and_dead_lettered(self):
+        batch = [flow(), flow(), flow(source_ip=None), flow(), flow()]
+
+        written = self.writer.write(FLOWS_TOPIC, batch)
+
+        self.assertEqual(written, 4)
+        self.assertEqual(NetworkTraffic.objects.count(), 4)
+        self.writer.dead_letters.ensure_delivered()
+        [(topic, envelope)] = self.producer.delivered
+        self.assertEqual(topic, dlq_topic(FLOWS_TOPIC))
+        self.assertIsNone(envelope["payload"]["source_ip"])
+        self.assertEqual(envelope["source_topic"], FLOWS_TOPIC)
+
+    def test_unbuildable_record_is_dead_lettered_without_a_write(self):
+        written = self.writer.write(FLOWS_TOPIC, [flow(geoip="not-a-dict"), flow()])
+
+        self.assertEqual(written, 1)
+        self.writer.dead_letters.ensure_delivered()
+        [(_, envelope)] = self.producer.delivered
+        self.assertEqual(envelope["attempts"], 0)
+
+    def test_written_rows_have_primary_keys(self):
+        written = []
+        writer = BatchWriter(DeadLetterPublisher(), on_written=lambda topic, objects, payloads: written.extend(objects))
+
+        writer.write(FLOWS_TOPIC, [flow(), flow()])
+
+        self.assertEqual(sorted(o.pk for o in written), sorted(NetworkTraffic.objects.values_list("id", flat=True)))
+
+    def test_failing_hook_does_not_rewrite_the_chunk(self):
+        def on_written(topic, objects, payloads):
+            raise RuntimeError("indexer down")
+
+        writer = BatchWriter(DeadLetterPublisher(self.producer), sleep=lambda secs: None, on_written=on_written)
+
+        self.assertEqual(writer.write(FLOWS_TOPIC, [flow(), flow(), flow()]), 3)
+        self.assertEqual(NetworkTraffic.objects.count(), 3)
+        writer.dead_letters.ensure_delivered()
+        self.assertEqual(self.producer.delivered, [])
+
+
+class DeadLetterPublisherTests(TestCase):
+    def test_failed_delivery_blocks_the_commit(self):
+        dead_letters = DeadLetterPublisher(FakeProducer(error="broker down"))
+        dead_letters.publish(FLOWS_TOPIC, flow(), ValueError("bad"), attempts=1)
+
+        with self.assertRaises(DeadLetterDeliveryError):
+            dead_letters.ensure_delivered()
+
+    def test_undelivered_messages_block_the_commit(self):
+        dead_letters = DeadLetterPublisher(FakeProducer(stuck=1))
+        dead_letters.publish(FLOWS_TOPIC, flow(), ValueError("bad"), attempts=1)
+
+        self.assertFalse(dead_letters.flush())
+
+    def test_nothing_pending_is_delivered(self):
+        self.assertTrue(DeadLetterPublisher(FakeProducer()).flush())
+        self.assertTrue(DeadLetterPublisher().flush())
+
+
+class RollUpNewRowsTests(TestCase):
+    def add_alerts(self, n, age_secs=rollups.SETTLE_SECS + 60):
+        now = timezone.now()
+        alerts = SecurityAlert.objects.bulk_create([
+            SecurityAlert(
+                title="scan", description="scan", severity="high", alert_type="intrusion",
+                source_ip="10.0.0.1", timestamp=now,
+            )
+            for _ in range(n)
+        ])
+        SecurityAlert.objects.filter(id__in=[a.id for a in alerts]).update(
+            created_at=now - timedelta(seconds=age_secs)
+        )
+
+    def counted(self, dimension="total", key=""):
+        rows = AlertRollup.objects.filter(grain=rollups.HOUR, dimension=dimension, key=key)
+        return rows.aggregate(total=Sum("count"))["total"] or 0
+
+    def test_rows_are_counted_exactly_once(self):
+        self.add_alerts(5)
+
+        self.assertEqual(rollups.roll_up_new_rows(batch_size=2), 5)
+        self.assertEqual(rollups.roll_up_new_rows(batch_size=2), 0)
+
+        self.assertEqual(self.counted(), 5)
+        self.assertEqual(self.counted("severity", "high"), 5)
+        self.assertTrue(rollups.caught_up(AlertRollup))
+
+    def test_unsettled_rows_wait_for_the_next_run(self):
+        self.add_alerts(2)
+        self.add_alerts(1, age_secs=0)
+
+        self.assertEqual(rollups.roll_up_new_rows(), 2)
+        self.assertEqual(self.counted(), 2)
+
+        SecurityAlert.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(rollups.roll_up_new_rows(), 1)
+        self.assertEqual(self.counted(), 3)
+
+    def test_max_rows_bounds_each_call(self):
+        self.add_alerts(5)
+
+        self.assertEqual(rollups.roll_up_new_rows(max_rows=3, batch_size=2), 3)
+        self.assertEqual(rollups.roll_up_new_rows(max_rows=3, batch_size=2), 2)
+        self.assertEqual(self.counted(), 5)
+
+    def test_flows_count_bytes_once(self):
+        NetworkTraffic.objects.bulk_create([
+            NetworkTraffic(
+                timestamp=timezone.now(), source_ip="10.0.0.1", destination_ip="8.8.8.8",
+                source_port=1, destination_port=53, protocol="DNS", bytes_sent=100, bytes_received=50,
+            )
+            for _ in range(3)
+        ])
+        NetworkTraffic.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+
+        rollups.roll_up_new_rows()
+        rollups.roll_up_new_rows()
+
+        total = TrafficRollup.objects.get(grain=rollups.HOUR, dimension="total", key="")
+        self.assertEqual((total.flows, total.bytes), (3, 450))
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = timezone.now()
+        # Pairs of alerts share a timestamp, so pages split on the id tie-breaker.
+        SecurityAlert.objects.bulk_create([
+            SecurityAlert(
+                title=f"alert {i}", description="scan", alert_type="intrusion",
+                source_ip="10.0.0.1", timestamp=start - timedelta(minutes=i // 2),
+            )
+            for i in range(11)
+        ])
+
+    def page(self, cursor=None, queryset=None):
+        params = {"page_size": 3}
+        if cursor:
+            params["cursor"] = cursor
+        request = Request(APIRequestFactory().get("/api/alerts/", params))
+        paginator = KeysetPagination()
+        queryset = queryset if queryset is not None else SecurityAlert.objects.order_by("-timestamp")
+        rows = paginator.paginate_queryset(queryset, request)
+        return [row.pk for row in rows], paginator.get_paginated_response([]).data
+
+    def cursor(self, link):
+        return parse_qs(urlparse(link).query)["cursor"][0] if link else None
+
+    def walk(self, queryset=None):
+        pages, links = [], []
+        ids, data = self.page(queryset=queryset)
+        while True:
+            pages.append(ids)
+            links.append(data)
+            if not data["next"]:
+                return pages, links
+            ids, data = self.page(self.cursor(data["next"]), queryset)
+
+    def test_forward_walk_has_no_gaps_or_overlap(self):
+        pages, links = self.walk()
+
+        expected = list(SecurityAlert.objects.order_by("-timestamp", "-id").values_list("id", flat=True))
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+        self.assertIsNone(links[0]["previous"])
+        self.assertEqual(links[0]["count"], 11)
+
+    def test_backward_walk_returns_the_same_pages(self):
+        pages, links = self.walk()
+
+        back, data = [pages[-1]], links[-1]
+        while data["previous"]:
+            ids, data = self.page(self.cursor(data["previous"]))
+            back.append(ids)
+
+        self.assertEqual(back[::-1], pages)
+
+    def test_ascending_ordering(self):
+        pages, _ = self.walk(SecurityAlert.objects.order_by("timestamp"))
+
+        expected = list(SecurityAlert.objects.order_by("timestamp", "id").values_list("id", flat=True))
+        self.assertEqual([pk for page in pages for pk in page], expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        with self.assertRaises(NotFound):
+            self.page("not-a-cursor")
+
+
+class SharedRateLimitTests(TestCase):
+    def test_every_window_must_have_room(self):
+        limit = SharedRateLimit("test", ((86400, 5), (60, 2)))
+
+        self.assertEqual([limit.acquire() for _ in range(3)], [True, True, False])
+        self.assertEqual(RateLimitWindow.objects.get(name="test", period=86400).used, 2)
+
+    def test_instances_share_the_quota(self):
+        first = SharedRateLimit("test", ((60, 3),))
+        second = SharedRateLimit("test", ((60, 3),))
+
+        self.assertTrue(first.acquire())
+        self.assertTrue(second.acquire())
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+
+    def test_a_new_window_resets_the_count(self):
+        limit = SharedRateLimit("test", ((60, 1),))
+        self.assertTrue(limit.acquire())
+        self.assertFalse(limit.acquire())
+
+        RateLimitWindow.objects.update(window=F("window") - 1)
+
+        self.assertTrue(limit.acquire())
+
+    def test_pause_blocks_every_instance(self):
+        SharedRateLimit("test", ((60, 10),)).pause(30)
+
+        self.assertFalse(SharedRateLimit("test", ((60, 10),)).acquire())
+
+    def test_deleted_rows_are_recreated(self):
+        limit = SharedRateLimit("test", ((60, 10),))
+        self.assertTrue(limit.acquire())
+
+        RateLimitWindow.objects.all().delete()
+
+        self.assertTrue(limit.acquire(timeout=1))
+
+
+@override_settings(CACHES={
+    **settings.CACHES,
+    "watermarks": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-watermarks"},
+})
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="analyst", password="x"))
+
+    def add_alert(self):
+        SecurityAlert.objects.create(
+            title="scan", description="scan", alert_type="intrusion",
+            source_ip="10.0.0.1", timestamp=timezone.now(),
+        )
+
+    def test_unchanged_list_is_not_modified(self):
+        self.add_alert()
+        response = self.client.get("/api/alerts/")
+
+        again = self.client.get("/api/alerts/", HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(again.status_code, 304)
+        self.assertIn("no-cache", again["Cache-Control"])
+
+    def test_not_modified_reads_only_the_watermarks(self):
+        etag = self.client.get("/api/alerts/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/alerts/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_both_validators(self):
+        first = self.client.get("/api/alerts/")
+        time.sleep(1)  # Last-Modified has whole-second resolution
+
+        # Writers in other processes touch the shared watermark; no signal fires.
+        BatchWriter(DeadLetterPublisher()).write(ALERTS_TOPIC, [
+            {"source_ip": "10.0.0.9", "alert": {"signature": "scan", "severity": 1}},
+        ])
+
+        by_etag = self.client.get("/api/alerts/", HTTP_IF_NONE_MATCH=first["ETag"])
+        by_date = self.client.get("/api/alerts/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual((by_etag.status_code, by_date.status_code), (200, 200))
+        self.assertEqual(by_etag["ETag"], by_date["ETag"])
+
+    def test_etag_depends_on_the_query(self):
+        first = self.client.get("/api/alerts/")["ETag"]
+
+        response = self.client.get("/api/alerts/", {"severity": "high"}, HTTP_IF_NONE_MATCH=first)
+
+        self.assertEqual(response.status_code, 200)
+
+
+class TimeBucketedTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.answers = []
+
+    def view(self, request):
+        self.calls += 1
+        return self.answers.pop(0)
+
+    def get(self):
+        view = caching.time_bucketed("test", lambda query: {}, lambda params: 60)(self.view)
+        return view(Request(APIRequestFactory().get("/api/stats/test")))
+
+    def test_ok_responses_are_cached_for_the_bucket(self):
+        self.answers = [Response({"n": 1})]
+
+        self.assertEqual(self.get()["X-Cache"], caching.MISS)
+        self.assertEqual(self.get()["X-Cache"], caching.FRESH)
+        self.assertEqual(self.calls, 1)
+
+    def test_errors_are_not_cached(self):
+        self.answers = [Response({"detail": "boom"}, status=500), Response({"n": 1})]
+
+        self.assertEqual(self.get().status_code, 500)
+        self.assertEqual(self.get().data, {"n": 1})
+        self.assertEqual(self.calls, 2)
+
+    def test_degraded_responses_revalidate_soon(self):
+        self.answers = [caching.mark_degraded(Response({"n": 0})), Response({"n": 1})]
+
+        with mock.patch.object(caching, "DEGRADED_TTL", 0):
+            self.get()
+            stale = self.get()
+        for thread in threading.enumerate():
+            if thread.name.startswith("swr-refresh:"):
+                thread.join()
+
+        self.assertEqual((stale["X-Cache"], stale.data), (caching.STALE, {"n": 0}))
+        fresh = self.get()
+        self.assertEqual((fresh["X-Cache"], fresh.data), (caching.FRESH, {"n": 1}))
+
+
+class FakeSession:
+    """Answers ``post`` with ``status`` or raises ``error``."""
+
+    def __init__(self, status=200, error=None):
+        self.status = status
+        self.error = error
+
+    def post(self, url, timeout, **kwargs):
+        if self.error is not None:
+            raise self.error
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'{"hits": {"hits": []}}'
+        response.url = url
+        return response
+
+
+class WazuhClientBreakerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = WazuhClient("https://indexer:9200", ("admin", "x"), breaker=CircuitBreaker("test", 2))
+
+    def search(self, session, n=0):
+        self.client.session = session
+        return self.client.search({"query": {"term": {"n": n}}})
+
+    def test_client_errors_do_not_trip_the_breaker(self):
+        for n, status in enumerate((400, 401, 404)):
+            with self.assertRaises(requests.HTTPError):
+                self.search(FakeSession(status), n)
+
+        self.assertEqual(self.search(FakeSession(), 9), {"hits": {"hits": []}})
+
+    def test_outages_trip_the_breaker(self):
+        for n, session in enumerate((FakeSession(503), FakeSession(error=requests.ConnectionError()))):
+            with self.assertRaises(requests.RequestException):
+                self.search(session, n)
+
+        with self.assertRaises(CircuitOpenError):
+            self.search(FakeSession(), 9)
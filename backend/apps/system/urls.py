@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('health/', views.system_health, name='system_health'),
+    path('metrics/history/', views.system_metrics_history, name='system_metrics_history'),
     path('settings/', views.system_settings, name='system_settings'),
+    path('cache/stats/', views.cache_stats, name='system_cache_stats'),
 ]
 
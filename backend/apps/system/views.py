@@ -1,8 +1,11 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
 from .models import SystemSettings
 from .health import check_database, check_cache, check_elasticsearch
+from .metrics_sampler import history, latest_sample
+from .caching import hit_rates
 from apps.authentication.permissions import IsAdminRole
 
 
@@ -10,12 +13,9 @@ from apps.authentication.permissions import IsAdminRole
 @permission_classes([IsAuthenticated])
 def system_health(request):
     """Get system health status."""
-    import psutil
     import time
 
-    cpu = psutil.cpu_percent(interval=0.5)
-    mem = psutil.virtual_memory()
-    disk = psutil.disk_usage("/")
+    sample = latest_sample()
 
     t0 = time.monotonic()
     db_result = check_database()
@@ -46,14 +46,49 @@ def system_health(request):
             'elasticsearch': {'status': _to_online(es_result['status']), 'response_time': es_ms},
         },
         'resources': {
-            'cpu_usage': round(cpu, 1),
-            'memory_usage': round(mem.percent, 1),
-            'disk_usage': round(disk.percent, 1),
+            'cpu_usage': sample['cpu'],
+            'memory_usage': sample['memory'],
+            'disk_usage': sample['disk'],
+            'net_sent_bps': sample['net_sent_bps'],
+            'net_recv_bps': sample['net_recv_bps'],
+            'sampled_at': sample['ts'],
         },
         'uptime': 99.9,
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def system_metrics_history(request):
+    """Recent host metric samples for sparklines (``?minutes=``, default 15, max 60)."""
+    try:
+        minutes = min(max(float(request.query_params.get('minutes', 15)), 1), 60)
+    except ValueError:
+        minutes = 15
+    samples = history(minutes * 60)
+    return Response({
+        'interval': settings.SYSTEM_METRICS_INTERVAL,
+        'samples': [
+            {
+                'ts': s['ts'],
+                'cpu': s['cpu'],
+                'memory': s['memory'],
+                'disk': s['disk'],
+                'net_sent_bps': s['net_sent_bps'],
+                'net_recv_bps': s['net_recv_bps'],
+            }
+            for s in samples
+        ],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def cache_stats(request):
+    """Hit / stale / miss counts and hit rate per cached API view."""
+    return Response(hit_rates())
+
+
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAdminRole])
 def system_settings(request):
@@ -0,0 +1,164 @@
+"""
+Per-dataset validators for conditional GETs.
+
+Every writer records when it changed a dataset: ``touch`` after bulk
+writes (``BatchWriter``, ``capture_traffic``, the rollups ...) and the
+``post_save`` / ``post_delete`` signals for the ORM.  The marks live in
+the ``watermarks`` cache, which every process shares (Redis, or a
+directory without it), so a conditional request is answered from them
+alone: a 304 touches neither the database nor Elasticsearch.
+
+ETag and Last-Modified are derived from the same value, the newest of the
+marks and the start of the current time bucket, ``bucket_secs(params)``
+wide (``BUCKET_SECS`` by default).  The bucket bounds how long a change no
+writer recorded is served, such as documents Logstash writes straight to
+Elasticsearch, and moves sliding windows ("last 24h") on.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import time
+
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+FLOWS, ALERTS, THREATS = "flows", "alerts", "threats"
+
+MODEL_DATASETS = {
+    "network.NetworkTraffic": FLOWS,
+    "alerts.SecurityAlert": ALERTS,
+    "threats.ThreatIntelligence": THREATS,
+}
+
+CACHE = "watermarks"
+KEY = "watermark:{}"
+# Default time bucket: the longest a change the watermarks missed goes unserved.
+BUCKET_SECS = 60
+
+
+def touch(*datasets: str) -> None:
+    """Record that ``datasets`` changed now; never fails the write it follows."""
+    now = time.time()
+    try:
+        caches[CACHE].set_many({KEY.format(d): now for d in datasets}, None)
+    except Exception as exc:
+        logger.warning("Watermark update for %s failed: %s", ", ".join(datasets), exc)
+
+
+def touch_model(model) -> None:
+    dataset = MODEL_DATASETS.get(model._meta.label)
+    if dataset:
+        touch(dataset)
+
+
+def versions(datasets) -> dict[str, float]:
+    """Cache watermark per dataset; 0 for one never touched or evicted."""
+    keys = {KEY.format(d): d for d in datasets}
+    try:
+        found = caches[CACHE].get_many(list(keys))
+    except Exception as exc:
+        logger.warning("Watermark read failed: %s", exc)
+        found = {}
+    return {d: found.get(k, 0.0) for k, d in keys.items()}
+
+
+def _default_key(query) -> dict:
+    return {k: query.get(k) for k in query}
+
+
+def _default_bucket(params) -> int:
+    return BUCKET_SECS
+
+
+class Conditional:
+    """Answer ``If-None-Match`` / ``If-Modified-Since`` for ``datasets``.
+
+    The ETag covers the path, the user, ``key_params(query_params)`` and
+    the last-modified time: the newest watermark or the start of the current
+    ``bucket_secs(params)`` time bucket.  Responses are marked ``private, no-cache`` so browsers keep
+    them but revalidate on every poll.  Build one per view, at import time;
+    ``respond`` runs the view only when the client's copy is out of date.
+    """
+
+    def __init__(self, datasets, key_params=_default_key, bucket_secs=_default_bucket):
+        self.datasets = tuple(datasets)
+        self.key_params = key_params
+        self.bucket_secs = bucket_secs
+
+    def validators(self, request) -> tuple[str, float]:
+        params = self.key_params(request.query_params)
+        width = self.bucket_secs(params)
+        modified = max(time.time() // width * width, *versions(self.datasets).values())
+        parts = [request.path, request.user.pk, params, modified]
+        etag = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+        return etag, modified
+
+    def respond(self, request, view, *args, **kwargs):
+        etag, modified = self.validators(request)
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag, last_modified=int(modified))
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if not response.has_header("ETag"):
+                    response.headers["ETag"] = etag
+                if not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def __call__(self, view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return self.respond(request, view, *args, **kwargs)
+
+        return wrapper
+
+
+def conditional(datasets, key_params=_default_key, bucket_secs=_default_bucket):
+    """Decorator form of ``Conditional``.
+
+    Place it inside ``@api_view`` so authentication runs before a 304 is
+    returned.
+    """
+    return Conditional(datasets, key_params, bucket_secs)
+
+
+class ConditionalListMixin:
+    """ETag / Last-Modified on a viewset's ``list`` and ``retrieve``.
+
+    Set ``watermark_datasets`` to the datasets the viewset reads.
+    """
+
+    watermark_datasets: tuple[str, ...] = ()
+    watermark_bucket_secs = BUCKET_SECS
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        width = cls.watermark_bucket_secs
+        cls._conditional = Conditional(cls.watermark_datasets, bucket_secs=lambda params: width)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional.respond(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional.respond(request, super().retrieve, *args, **kwargs)
+
+
+def _on_change(sender, **kwargs) -> None:
+    touch_model(sender)
+
+
+def connect_signals() -> None:
+    from django.apps import apps
+
+    for label in MODEL_DATASETS:
+        model = apps.get_model(label)
+        post_save.connect(_on_change, sender=model, dispatch_uid=f"watermark-save-{label}")
+        post_delete.connect(_on_change, sender=model, dispatch_uid=f"watermark-delete-{label}")
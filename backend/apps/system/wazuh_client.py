@@ -0,0 +1,141 @@
+"""
+Client for the Wazuh Indexer (OpenSearch) used by the SIEM endpoints.
+
+One ``requests.Session`` per process keeps TLS connections to the indexer
+alive between requests.  Search responses are cached for
+``WAZUH_CACHE_TTL`` seconds keyed by a hash of the index and query, and a
+circuit breaker makes calls fail fast while the indexer is down instead of
+each one waiting for the timeout.  Only outages (``is_outage``) trip it; a
+malformed query or rejected credentials raise to the caller.  ``msearch`` answers several queries in a
+single ``_msearch`` round-trip, sending only those not already cached.
+"""
+
+import functools
+import hashlib
+import json
+
+import requests
+from decouple import config
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+
+from apps.system.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+
+WAZUH_INDEX = "wazuh-alerts-4.x-*"
+CACHE_PREFIX = "wazuh:"
+
+
+def is_outage(exc: Exception) -> bool:
+    """Connection errors, timeouts and 5xx/429 mean the indexer is unhealthy; a 4xx does not."""
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+class WazuhClient:
+    def __init__(
+        self,
+        url: str,
+        auth: tuple[str, str],
+        verify: bool = False,
+        timeout: tuple[float, float] = (2.0, 10.0),
+        cache_ttl: int = 15,
+        pool_size: int = 10,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.breaker = breaker or CircuitBreaker("wazuh-indexer")
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.verify = verify
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def _cache_key(index: str, body: dict) -> str:
+        digest = hashlib.sha1(
+            json.dumps([index, body], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return CACHE_PREFIX + digest
+
+    def _post(self, path: str, **kwargs) -> dict:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.breaker.name} circuit is open")
+        try:
+            r = self.session.post(f"{self.url}/{path}", timeout=self.timeout, **kwargs)
+            r.raise_for_status()
+            result = r.json()
+        except Exception as exc:
+            if is_outage(exc):
+                self.breaker.record_failure()
+            else:
+                # The indexer answered; the request itself was wrong.
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def search(self, body: dict, index: str = WAZUH_INDEX) -> dict:
+        """Run one search; raises ``CircuitOpenError`` while the breaker is open."""
+        key = self._cache_key(index, body)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        resp = self._post(f"{index}/_search", json=body)
+        cache.set(key, resp, self.cache_ttl)
+        return resp
+
+    def msearch(self, searches: list[tuple[str, dict]]) -> list[dict]:
+        """Run ``[(index, body), ...]`` in one ``_msearch``; responses in order.
+
+        A failed search comes back as ``{"error": ...}`` like any
+        ``_msearch`` item; a transport failure raises for the whole batch.
+        """
+        keys = [self._cache_key(index, body) for index, body in searches]
+        cached = cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            lines = []
+            for i in missing:
+                index, body = searches[i]
+                lines.append(json.dumps({"index": index}))
+                lines.append(json.dumps(body))
+            responses = self._post(
+                "_msearch",
+                data="\n".join(lines) + "\n",
+                headers={"Content-Type": "application/x-ndjson"},
+            )["responses"]
+            fresh = {}
+            for i, resp in zip(missing, responses):
+                cached[keys[i]] = resp
+                if "error" not in resp:
+                    fresh[keys[i]] = resp
+            if fresh:
+                cache.set_many(fresh, self.cache_ttl)
+        return [cached[key] for key in keys]
+
+
+@functools.lru_cache(maxsize=1)
+def get_wazuh_client() -> WazuhClient:
+    """Process-wide ``WazuhClient``, like ``get_es_client``."""
+    return WazuhClient(
+        url=config("WAZUH_INDEXER_URL", default="https://host.docker.internal:9201"),
+        auth=(
+            config("WAZUH_INDEXER_USER", default="admin"),
+            config("WAZUH_INDEXER_PASS", default="SecretPassword"),
+        ),
+        verify=config("WAZUH_INDEXER_VERIFY", default=False, cast=bool),
+        cache_ttl=config("WAZUH_CACHE_TTL", default=15, cast=int),
+        breaker=CircuitBreaker(
+            "wazuh-indexer",
+            failure_threshold=config("WAZUH_BREAKER_FAILURES", default=3, cast=int),
+            reset_timeout=config("WAZUH_BREAKER_RESET_SECS", default=30, cast=float),
+        ),
+    )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ThreatIntelligence
+from .models import IPReputation, ThreatIntelligence
 
 
 @admin.register(ThreatIntelligence)
@@ -10,3 +10,10 @@ class ThreatIntelligenceAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
     date_hierarchy = 'last_seen'
 
+
+
+@admin.register(IPReputation)
+class IPReputationAdmin(admin.ModelAdmin):
+    list_display = ['ip', 'abuse_confidence_score', 'country_code', 'isp', 'total_reports', 'checked_at']
+    search_fields = ['ip', 'isp']
+    readonly_fields = ['checked_at']
@@ -8,6 +8,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from apps.threats.models import ThreatIntelligence
+from apps.system import watermarks
 from config.settings import BASE_DIR
 
 
@@ -82,6 +83,7 @@ class Command(BaseCommand):
           unique_fields=["ioc_type", "ioc_value"],
           update_fields=update_fields,
       )
+      watermarks.touch_model(ThreatIntelligence)
 
       self.stdout.write(self.style.SUCCESS(f"Upserted {len(objects)} threat intel records"))
 
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:15
+
+from django.db import migrations, models
+
+# Trigram index for ``icontains`` lookups; the expression matches the
+# UPPER(...) Django compiles icontains to on PostgreSQL.
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS threat_intel_ioc_value_trgm ON threat_intelligence "
+    "USING gin ((UPPER(ioc_value::text)) gin_trgm_ops)",
+]
+POSTGRES_REMOVE = ["DROP INDEX IF EXISTS threat_intel_ioc_value_trgm"]
+
+
+def install(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRES_INSTALL:
+            schema_editor.execute(sql)
+
+
+def remove(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRES_REMOVE:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='threatintelligence',
+            name='ioc_value',
+            field=models.CharField(db_index=True, max_length=500),
+        ),
+        migrations.RunPython(install, remove),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threats', '0002_ioc_value_lookup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IPReputation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip', models.GenericIPAddressField(unique=True)),
+                ('abuse_confidence_score', models.IntegerField(default=0)),
+                ('country_code', models.CharField(blank=True, default='', max_length=2)),
+                ('isp', models.CharField(blank=True, default='', max_length=200)),
+                ('is_public', models.BooleanField(default=True)),
+                ('total_reports', models.IntegerField(default=0)),
+                ('last_reported_at', models.DateTimeField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'ip_reputation',
+                'ordering': ['-checked_at'],
+            },
+        ),
+    ]
@@ -24,7 +24,7 @@ class ThreatIntelligence(models.Model):
     ]
     
     ioc_type = models.CharField(max_length=20, choices=IOC_TYPE_CHOICES)
-    ioc_value = models.CharField(max_length=500)
+    ioc_value = models.CharField(max_length=500, db_index=True)
     threat_type = models.CharField(max_length=50, choices=THREAT_TYPE_CHOICES)
     description = models.TextField()
     reputation_score = models.IntegerField(default=0)  # 0-100, higher = more malicious
@@ -53,3 +53,28 @@ class ThreatIntelligence(models.Model):
     def __str__(self):
         return f"{self.ioc_type.upper()}: {self.ioc_value} ({self.threat_type})"
 
+
+
+class IPReputation(models.Model):
+    """Last AbuseIPDB answer per IP address.
+
+    Second-level store behind the reputation cache: lookups are served
+    from here while ``checked_at`` is within ``ABUSEIPDB_MAX_AGE_HOURS``, so
+    a cache flush or restart does not spend API quota again.
+    """
+
+    ip = models.GenericIPAddressField(unique=True)
+    abuse_confidence_score = models.IntegerField(default=0)
+    country_code = models.CharField(max_length=2, blank=True, default='')
+    isp = models.CharField(max_length=200, blank=True, default='')
+    is_public = models.BooleanField(default=True)
+    total_reports = models.IntegerField(default=0)
+    last_reported_at = models.DateTimeField(blank=True, null=True)
+    checked_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'ip_reputation'
+        ordering = ['-checked_at']
+
+    def __str__(self):
+        return f"{self.ip}: {self.abuse_confidence_score}"
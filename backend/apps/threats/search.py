@@ -0,0 +1,135 @@
+"""
+Indexed indicator (IOC) lookup.
+
+``/api/threats/search/?q=`` used to run ``ioc_value__icontains`` over the
+whole feed and return every match.  ``lookup`` instead picks an index-backed
+match for the query:
+
+* ``exact`` – ``ioc_value = q``.
+* ``prefix`` – ``ioc_value LIKE 'q%'``; ``ioc_value`` is ``db_index``-ed,
+  which on PostgreSQL also creates the ``varchar_pattern_ops`` index LIKE
+  needs.
+* ``cidr`` – IPv4 indicators inside a network, as the handful of dotted
+  prefixes it spans (``apps.system.networks``), which use the same index.
+* ``contains`` – ``icontains``, served on PostgreSQL by a ``pg_trgm`` GIN
+  index over ``UPPER(ioc_value::text)``, the expression Django's
+  ``icontains`` compares (installed by ``0002_ioc_value_lookup``).  Other
+  backends scan.
+
+``auto`` (the default) uses ``cidr`` for a network, otherwise ``prefix``
+with the exact match first, and ``contains`` only when nothing starts with
+the query.  ``LookupPagination`` pages the results and caps them at
+``MAX_RESULTS``.
+"""
+
+import ipaddress
+import re
+
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from apps.system.networks import ipv4_network_q
+
+MATCH_MODES = ("auto", "exact", "prefix", "cidr", "contains")
+MAX_RESULTS = 1000
+# Shorter queries only match exactly; a one-letter prefix would match most of the feed.
+MIN_PARTIAL_LENGTH = 3
+
+_HASH = re.compile(r"^[0-9a-fA-F]{32}$|^[0-9a-fA-F]{40}$|^[0-9a-fA-F]{64}$")
+# Case-insensitive indicator types, stored lower-case by the feeds.
+_LOWERCASE_TYPES = ("hash", "domain", "email")
+
+
+def classify(value: str) -> str | None:
+    """Best guess of ``value``'s IOC type, ``None`` if it could be anything."""
+    try:
+        ipaddress.ip_address(value)
+        return "ip"
+    except ValueError:
+        pass
+    if _HASH.match(value):
+        return "hash"
+    if "://" in value:
+        return "url"
+    if "@" in value:
+        return "email"
+    if "." in value and not value.replace(".", "").isdigit():
+        return "domain"
+    return None
+
+
+def ipv4_network(value: str):
+    if "/" not in value:
+        return None
+    try:
+        network = ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+    return network if network.version == 4 else None
+
+
+def lookup(queryset, query: str, match: str = "auto", ioc_type: str | None = None):
+    """``(queryset, match)`` for ``query``; ``match`` is the mode actually used."""
+    query = query.strip()
+    if ioc_type:
+        queryset = queryset.filter(ioc_type=ioc_type)
+    guessed = ioc_type or classify(query)
+    if guessed in _LOWERCASE_TYPES:
+        query = query.lower()
+
+    network = ipv4_network(query)
+    if match == "auto":
+        if network is not None:
+            match = "cidr"
+        elif len(query) < MIN_PARTIAL_LENGTH:
+            match = "exact"
+        elif queryset.filter(ioc_value__startswith=query).exists():
+            match = "prefix"
+        else:
+            match = "contains"
+    elif match in ("prefix", "contains") and len(query) < MIN_PARTIAL_LENGTH:
+        match = "exact"
+
+    if match == "cidr":
+        if network is None:
+            return queryset.none(), match
+        queryset = queryset.filter(ipv4_network_q(network, "ioc_value"), ioc_type="ip")
+    elif match == "exact":
+        queryset = queryset.filter(ioc_value=query)
+    elif match == "prefix":
+        queryset = queryset.filter(ioc_value__startswith=query)
+    else:
+        queryset = queryset.filter(ioc_value__icontains=query)
+
+    exact_first = Case(When(ioc_value=query, then=Value(0)), default=Value(1), output_field=IntegerField())
+    return (
+        queryset.annotate(exact_match=exact_first)
+        .order_by("exact_match", "-reputation_score", "-last_seen", "id"),
+        match,
+    )
+
+
+class LookupPagination(PageNumberPagination):
+    """Page numbers over at most ``max_results`` matches.
+
+    ``capped`` tells the client that more indicators matched than are listed.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    max_results = MAX_RESULTS
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset[: self.max_results], request, view)
+
+    def get_paginated_response(self, data, match: str | None = None):
+        return Response({
+            "count": self.page.paginator.count,
+            "capped": self.page.paginator.count >= self.max_results,
+            "match": match,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
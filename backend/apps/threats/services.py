@@ -1,93 +1,246 @@
 """
 AbuseIPDB reputation lookup service.
 
-Checks external IPs against the AbuseIPDB API and caches results.
-Uses ABUSEIPDB_API_KEY from environment (mock key is fine for dev).
+Checks external IPs against the AbuseIPDB API.  Uses ABUSEIPDB_API_KEY
+from environment (mock key is fine for dev).
+
+``ReputationClient`` answers from three places, cheapest first:
+
+1. the cache, read with one ``get_many`` per batch;
+2. the ``IPReputation`` table, for answers younger than
+   ``ABUSEIPDB_MAX_AGE_HOURS``, so a cache flush or restart costs no quota;
+3. the API, through one pooled session and at most
+   ``ABUSEIPDB_CONCURRENCY`` lookups at a time.  Each lookup first counts
+   against a rate limit shared by all processes: the plan's daily quota
+   (``ABUSEIPDB_DAILY_QUOTA``, per UTC day like AbuseIPDB's own) and at
+   most ``ABUSEIPDB_BURST`` a minute.  A 429 pauses it for the
+   ``Retry-After`` the API asks for.
+
+A lookup that fails or is over the limit is answered with the last stored row
+(``"stale": true``) or the mock data (``"unavailable": true``) and cached
+for only ``ABUSEIPDB_NEGATIVE_TTL`` seconds, so it is retried soon without
+hammering the API.
 """
 
+import functools
 import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from typing import Iterable
 
 import requests
 from decouple import config
 from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from requests.adapters import HTTPAdapter
+
+from apps.system.rate_limit import SharedRateLimit
+from .models import IPReputation
 
 logger = logging.getLogger(__name__)
 
-ABUSEIPDB_API_KEY = config("ABUSEIPDB_API_KEY", default="mock-api-key-for-development")
+MOCK_API_KEY = "mock-api-key-for-development"
+ABUSEIPDB_API_KEY = config("ABUSEIPDB_API_KEY", default=MOCK_API_KEY)
 ABUSEIPDB_URL = "https://api.abuseipdb.com/api/v2/check"
 ABUSEIPDB_BULK_URL = "https://api.abuseipdb.com/api/v2/bulk-report"
 CACHE_TTL = 60 * 60  # 1 hour
 REQUEST_TIMEOUT = 3  # seconds (reduced from 10)
+REPUTATION_FIELDS = (
+    "abuse_confidence_score", "country_code", "isp", "is_public", "total_reports", "last_reported_at",
+)
 
 
-def check_ip_reputation(ip_address: str) -> dict:
-    """Look up a single IP's reputation via AbuseIPDB.
+def _cache_key(ip_address: str) -> str:
+    return f"abuseipdb:{ip_address}"
 
-    Results are cached for 1 hour per IP.  When the API key is a mock
-    value or the request fails, a synthetic fallback is returned.
-    """
-    cache_key = f"abuseipdb:{ip_address}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
-
-    if ABUSEIPDB_API_KEY == "mock-api-key-for-development":
-        result = _mock_lookup(ip_address)
-        cache.set(cache_key, result, CACHE_TTL)
-        return result
-
-    try:
-        resp = requests.get(
-            ABUSEIPDB_URL,
-            headers={
-                "Key": ABUSEIPDB_API_KEY,
-                "Accept": "application/json",
-            },
-            params={"ipAddress": ip_address, "maxAgeInDays": 90},
-            timeout=REQUEST_TIMEOUT,
-        )
-        resp.raise_for_status()
-        data = resp.json().get("data", {})
-        result = {
+
+def _row_result(row: IPReputation) -> dict:
+    return {
+        "ip": row.ip,
+        "abuse_confidence_score": row.abuse_confidence_score,
+        "country_code": row.country_code,
+        "isp": row.isp,
+        "is_public": row.is_public,
+        "total_reports": row.total_reports,
+        "last_reported_at": row.last_reported_at.isoformat() if row.last_reported_at else None,
+    }
+
+
+class ReputationClient:
+    def __init__(
+        self,
+        api_key: str,
+        limiter: SharedRateLimit,
+        concurrency: int = 4,
+        timeout: float = REQUEST_TIMEOUT,
+        acquire_timeout: float = 0.5,
+        cache_ttl: int = CACHE_TTL,
+        negative_ttl: int = 300,
+        max_age: timedelta = timedelta(hours=24),
+    ):
+        self.api_key = api_key
+        self.limiter = limiter
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.cache_ttl = cache_ttl
+        self.negative_ttl = negative_ttl
+        self.max_age = max_age
+        self.session = requests.Session()
+        self.session.headers.update({"Key": api_key, "Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="abuseipdb")
+
+    def lookup(self, ip_address: str) -> dict:
+        return self.lookup_many([ip_address])[ip_address]
+
+    def lookup_many(self, ip_addresses: Iterable[str]) -> dict[str, dict]:
+        """``{ip: reputation_dict}`` for every distinct, non-empty address."""
+        keys = {_cache_key(ip): ip for ip in dict.fromkeys(ip for ip in ip_addresses if ip)}
+        results = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+        misses = [ip for ip in keys.values() if ip not in results]
+        if not misses:
+            return results
+
+        if self.api_key == MOCK_API_KEY:
+            mocked = {ip: _mock_lookup(ip) for ip in misses}
+            self._cache(mocked, self.cache_ttl)
+            results.update(mocked)
+            return results
+
+        stored = self._stored(misses)
+        cutoff = timezone.now() - self.max_age
+        fresh = {ip: _row_result(row) for ip, row in stored.items() if row.checked_at >= cutoff}
+        self._cache(fresh, self.cache_ttl)
+        results.update(fresh)
+
+        to_fetch = [ip for ip in misses if ip not in results]
+        # Counted here, on the caller's thread and DB connection, before fanning out.
+        permitted = []
+        for ip in to_fetch:
+            if not self.limiter.acquire(self.acquire_timeout):
+                logger.info("AbuseIPDB rate limit reached, %d lookups skipped", len(to_fetch) - len(permitted))
+                break
+            permitted.append(ip)
+        fetched = dict.fromkeys(to_fetch)
+        retry_after = 0.0
+        for ip, (result, wait) in zip(permitted, self._executor.map(self._fetch, permitted)):
+            fetched[ip] = result
+            retry_after = max(retry_after, wait)
+        if retry_after:
+            logger.warning("AbuseIPDB quota exhausted, pausing lookups for %.0fs", retry_after)
+            self.limiter.pause(retry_after)
+        answered = {ip: result for ip, result in fetched.items() if result is not None}
+        self._cache(answered, self.cache_ttl)
+        self._store(answered)
+
+        fallback = {
+            ip: {**_row_result(stored[ip]), "stale": True} if ip in stored
+            else {**_mock_lookup(ip), "unavailable": True}
+            for ip, result in fetched.items() if result is None
+        }
+        self._cache(fallback, self.negative_ttl)
+        results.update(answered)
+        results.update(fallback)
+        return results
+
+    def _fetch(self, ip_address: str) -> tuple[dict | None, float]:
+        """One API lookup: ``(result or None if it failed, Retry-After seconds)``."""
+        try:
+            resp = self.session.get(
+                ABUSEIPDB_URL,
+                params={"ipAddress": ip_address, "maxAgeInDays": 90},
+                timeout=self.timeout,
+            )
+            if resp.status_code == 429:
+                return None, float(resp.headers.get("Retry-After") or 60)
+            resp.raise_for_status()
+            data = resp.json().get("data", {})
+        except Exception as exc:
+            logger.warning("AbuseIPDB lookup failed for %s: %s", ip_address, exc)
+            return None, 0.0
+        return {
             "ip": ip_address,
-            "abuse_confidence_score": data.get("abuseConfidenceScore", 0),
-            "country_code": data.get("countryCode", ""),
-            "isp": data.get("isp", ""),
-            "is_public": data.get("isPublic", True),
-            "total_reports": data.get("totalReports", 0),
+            "abuse_confidence_score": data.get("abuseConfidenceScore") or 0,
+            "country_code": data.get("countryCode") or "",
+            "isp": data.get("isp") or "",
+            "is_public": data.get("isPublic") is not False,
+            "total_reports": data.get("totalReports") or 0,
             "last_reported_at": data.get("lastReportedAt"),
-        }
-    except Exception as exc:
-        logger.warning("AbuseIPDB lookup failed for %s: %s", ip_address, exc)
-        result = _mock_lookup(ip_address)
+        }, 0.0
 
-    cache.set(cache_key, result, CACHE_TTL)
-    return result
+    @staticmethod
+    def _cache(results: dict, ttl: int) -> None:
+        if results:
+            cache.set_many({_cache_key(ip): value for ip, value in results.items()}, ttl)
 
+    @staticmethod
+    def _stored(ip_addresses: list[str]) -> dict[str, IPReputation]:
+        try:
+            return {row.ip: row for row in IPReputation.objects.filter(ip__in=ip_addresses)}
+        except Exception as exc:
+            logger.warning("Reading stored IP reputations failed: %s", exc)
+            return {}
 
-def check_ip_reputation_batch(ip_addresses: Iterable[str]) -> dict[str, dict]:
-    """Look up multiple IPs, returning ``{ip: reputation_dict}``.
+    @staticmethod
+    def _store(results: dict) -> None:
+        if not results:
+            return
+        now = timezone.now()
+        rows = [
+            IPReputation(
+                ip=ip,
+                checked_at=now,
+                **{
+                    field: parse_datetime(value) if field == "last_reported_at" and value else value
+                    for field, value in result.items() if field in REPUTATION_FIELDS
+                },
+            )
+            for ip, result in results.items()
+        ]
+        try:
+            IPReputation.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["ip"],
+                update_fields=[*REPUTATION_FIELDS, "checked_at"],
+            )
+        except Exception as exc:
+            logger.warning("Storing IP reputations failed: %s", exc)
 
-    Checks the cache first; only uncached IPs are fetched individually
-    (AbuseIPDB's bulk endpoint is report-oriented, so we iterate).
-    """
-    results: dict[str, dict] = {}
-    to_fetch: list[str] = []
 
-    for ip in ip_addresses:
-        cache_key = f"abuseipdb:{ip}"
-        cached = cache.get(cache_key)
-        if cached is not None:
-            results[ip] = cached
-        else:
-            to_fetch.append(ip)
+@functools.lru_cache(maxsize=1)
+def get_reputation_client() -> ReputationClient:
+    """Process-wide ``ReputationClient``, like ``get_wazuh_client``."""
+    return ReputationClient(
+        api_key=ABUSEIPDB_API_KEY,
+        limiter=SharedRateLimit(
+            "abuseipdb",
+            limits=(
+                (86400, config("ABUSEIPDB_DAILY_QUOTA", default=1000, cast=int)),
+                (60, config("ABUSEIPDB_BURST", default=20, cast=int)),
+            ),
+        ),
+        concurrency=config("ABUSEIPDB_CONCURRENCY", default=4, cast=int),
+        negative_ttl=config("ABUSEIPDB_NEGATIVE_TTL", default=300, cast=int),
+        max_age=timedelta(hours=config("ABUSEIPDB_MAX_AGE_HOURS", default=24, cast=int)),
+    )
 
-    for ip in to_fetch:
-        results[ip] = check_ip_reputation(ip)
 
-    return results
+def check_ip_reputation(ip_address: str) -> dict:
+    """Look up a single IP's reputation via AbuseIPDB.
+
+    Results are cached for 1 hour per IP.  When the API key is a mock
+    value or the request fails, a synthetic fallback is returned.
+    """
+    return get_reputation_client().lookup(ip_address)
+
+
+def check_ip_reputation_batch(ip_addresses: Iterable[str]) -> dict[str, dict]:
+    """Look up multiple IPs, returning ``{ip: reputation_dict}``."""
+    return get_reputation_client().lookup_many(ip_addresses)
 
 
 _MOCK_COUNTRIES = ["US", "RU", "CN", "DE", "GB", "FR", "KR", "JP", "BR", "IN", "NL", "AU"]
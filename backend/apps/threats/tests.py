@@ -0,0 +1,34 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.threats.models import ThreatIntelligence
+from apps.threats.search import lookup
+
+
+class LookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        ThreatIntelligence.objects.bulk_create([
+            ThreatIntelligence(
+                ioc_type=ioc_type, ioc_value=value, threat_type="malware", description="",
+                source="test", first_seen=now, last_seen=now,
+            )
+            for ioc_type, value in [
+                ("ip", "172.16.4.1"), ("ip", "172.31.0.9"), ("ip", "172.32.0.1"),
+                ("ip", "10.0.0.1"), ("domain", "172.16.evil.example"),
+            ]
+        ])
+
+    def values(self, query, match="auto"):
+        queryset, used = lookup(ThreatIntelligence.objects.all(), query, match)
+        return used, sorted(queryset.values_list("ioc_value", flat=True))
+
+    def test_cidr_matches_ip_indicators_inside_the_network(self):
+        self.assertEqual(self.values("172.16.0.0/12"), ("cidr", ["172.16.4.1", "172.31.0.9"]))
+        self.assertEqual(self.values("10.0.0.1/32"), ("cidr", ["10.0.0.1"]))
+        self.assertEqual(self.values("10.0.0.0/31"), ("cidr", ["10.0.0.1"]))
+
+    def test_prefix_and_exact(self):
+        self.assertEqual(self.values("172.16."), ("prefix", ["172.16.4.1", "172.16.evil.example"]))
+        self.assertEqual(self.values("10"), ("exact", []))
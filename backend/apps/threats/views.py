@@ -4,12 +4,14 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from apps.system.watermarks import THREATS, ConditionalListMixin
 from .models import ThreatIntelligence
+from .search import MATCH_MODES, LookupPagination, lookup
 from .serializers import ThreatIntelligenceSerializer
 from .services import check_ip_reputation
 
 
-class ThreatIntelligenceViewSet(viewsets.ReadOnlyModelViewSet):
+class ThreatIntelligenceViewSet(ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for threat intelligence data."""
     
     queryset = ThreatIntelligence.objects.filter(is_active=True)
@@ -19,20 +21,30 @@ class ThreatIntelligenceViewSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ['ioc_value', 'description']
     ordering_fields = ['reputation_score', 'last_seen', 'first_seen']
     ordering = ['-reputation_score', '-last_seen']
+    watermark_datasets = (THREATS,)
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search threats by IP, domain, or hash."""
-        query = request.query_params.get('q', '')
+        """
+        Search threats by IP, network, domain, or hash.
+
+        ``?match=exact|prefix|cidr|contains`` forces a lookup (default ``auto``),
+        ``?type=`` restricts the IOC type; results are paginated and capped.
+        """
+        query = request.query_params.get('q', '').strip()
         if not query:
             return Response({'error': 'Query parameter required'}, status=400)
-        
-        threats = ThreatIntelligence.objects.filter(
-            ioc_value__icontains=query
-        ).order_by('-reputation_score')
-        
-        serializer = self.get_serializer(threats, many=True)
-        return Response(serializer.data)
+        match = request.query_params.get('match', 'auto')
+        if match not in MATCH_MODES:
+            return Response({'error': f"match must be one of {', '.join(MATCH_MODES)}"}, status=400)
+
+        threats, match = lookup(
+            ThreatIntelligence.objects.all(), query, match, request.query_params.get('type')
+        )
+        paginator = LookupPagination()
+        page = paginator.paginate_queryset(threats, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data, match)
 
     @action(detail=False, methods=["get"], url_path="ip-reputation")
     def ip_reputation(self, request):
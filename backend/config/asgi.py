@@ -12,6 +12,11 @@ django_asgi_app = get_asgi_application()
 
 from config import routing
 from config.ws_auth import JWTAuthMiddleware
+from django.conf import settings
+
+if settings.SYSTEM_METRICS_SAMPLER:
+    from apps.system.metrics_sampler import MetricsSampler
+    MetricsSampler().start_thread()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
@@ -215,7 +215,12 @@ if USE_REDIS:
             'BACKEND': 'django.core.cache.backends.redis.RedisCache',
             'LOCATION': f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379)}/1",
             'KEY_PREFIX': 'campus',
-        }
+        },
+        'watermarks': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379)}/1",
+            'KEY_PREFIX': 'campus',
+        },
     }
 else:
     CACHES = {
@@ -223,10 +228,25 @@ else:
             'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
             'LOCATION': 'unique-snowflake',
             'KEY_PREFIX': 'campus',
-        }
+        },
+        # Change watermarks for conditional GETs (apps.system.watermarks) must
+        # be seen by every process: the web workers, consume_kafka,
+        # capture_traffic ...  Without Redis they share a directory instead.
+        'watermarks': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('WATERMARK_CACHE_DIR', default=str(BASE_DIR / 'var' / 'watermarks')),
+            'KEY_PREFIX': 'campus',
+        },
     }
 
 
+# Host metrics sampler (apps.system.metrics_sampler). Samples every
+# SYSTEM_METRICS_INTERVAL seconds, keeps SYSTEM_METRICS_HISTORY of them
+# (1h by default), and runs as a thread in the ASGI process unless disabled
+# here in favour of `manage.py sample_system_metrics`.
+SYSTEM_METRICS_INTERVAL = config('SYSTEM_METRICS_INTERVAL', default=5.0, cast=float)
+SYSTEM_METRICS_HISTORY = config('SYSTEM_METRICS_HISTORY', default=720, cast=int)
+SYSTEM_METRICS_SAMPLER = config('SYSTEM_METRICS_SAMPLER', default=True, cast=bool)
 
 # Celery Configuration
 CELERY_BROKER_URL = f"redis://{config('REDIS_HOST', default='127.0.0.1')}:{config('REDIS_PORT', default=6379)}/0"
@@ -240,10 +260,19 @@ CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 
 # Elasticsearch
 ELASTICSEARCH_HOST = config('ELASTICSEARCH_HOST', default='http://localhost:9200')
+# Stats ranges longer than this are read from the hourly summary indices
+# maintained by `manage.py es_transforms setup` instead of raw documents.
+ES_SUMMARY_HORIZON_HOURS = config('ES_SUMMARY_HORIZON_HOURS', default=48, cast=int)
 
 # Kafka
 KAFKA_BOOTSTRAP_SERVERS = config('KAFKA_BOOTSTRAP_SERVERS', default='localhost:9092')
 
+# Ingest topology. When True, sensors (capture_traffic, simulate_pipeline)
+# only publish to Kafka and consume_kafka is the single writer to the
+# database and Elasticsearch. When False, sensors also write directly and
+# every flow consumed from Kafka is stored a second time (check system.W001).
+INGEST_SINGLE_WRITER = config('INGEST_SINGLE_WRITER', default=False, cast=bool)
+
 # AbuseIPDB (mock key by default)
 ABUSEIPDB_API_KEY = config('ABUSEIPDB_API_KEY', default='mock-api-key-for-development')
 
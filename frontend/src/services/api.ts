@@ -133,8 +133,8 @@ class ApiService {
     return response.data;
   }
 
-  async getAlertTimeline() {
-    const response = await this.api.get('/alerts/timeline/');
+  async getAlertTimeline(params?: { interval?: string; range?: string; source?: 'auto' | 'es' }) {
+    const response = await this.api.get('/alerts/timeline/', { params });
     return response.data;
   }
 
@@ -155,13 +155,18 @@ class ApiService {
   }
 
   // Stats endpoints (Elasticsearch-backed)
-  async getProtocolStats(): Promise<ProtocolStat[]> {
-    const response = await this.api.get('/stats/protocols/');
+  async getProtocolStats(range?: string): Promise<ProtocolStat[]> {
+    const response = await this.api.get('/stats/protocols/', { params: range ? { range } : undefined });
     return response.data;
   }
 
-  async getTrafficStats(): Promise<TrafficTimePoint[]> {
-    const response = await this.api.get('/stats/traffic/');
+  async getTrafficStats(range?: string): Promise<TrafficTimePoint[]> {
+    const response = await this.api.get('/stats/traffic/', { params: range ? { range } : undefined });
+    return response.data;
+  }
+
+  async getAlertTrends(range?: string) {
+    const response = await this.api.get('/stats/alerts/trends/', { params: range ? { range } : undefined });
     return response.data;
   }
 
@@ -170,6 +175,18 @@ class ApiService {
     return response.data;
   }
 
+  // Streaming exports (?fmt=ndjson|csv, ?gzip=1); filters as on the list endpoints
+  async exportData(path: '/network/traffic/export/' | '/alerts/export/' | '/stats/export/', params?: any) {
+    const response = await this.api.get(path, { params, responseType: 'blob' });
+    return response.data as Blob;
+  }
+
+  // Several stats panels in one request: { panels: { name: data }, errors: { name: message } }
+  async getStatsBundle(panels: string[], params?: { range?: string; limit?: number; severity?: string }) {
+    const response = await this.api.get('/stats/bundle/', { params: { ...params, panels: panels.join(',') } });
+    return response.data;
+  }
+
   // Threat intel
   async getIPReputation(ip: string) {
     const response = await this.api.get('/threats/ip-reputation/', { params: { ip } });
@@ -182,6 +199,11 @@ class ApiService {
     return response.data;
   }
 
+  async getSystemMetricsHistory(minutes = 15) {
+    const response = await this.api.get('/system/metrics/history/', { params: { minutes } });
+    return response.data;
+  }
+
   async getSystemSettings() {
     const response = await this.api.get('/system/settings/');
     return response.data;
@@ -235,7 +257,8 @@ export const alertsService = {
   getAlert: (id: number) => apiService.getAlert(id),
   acknowledgeAlert: (id: number) => apiService.acknowledgeAlert(id),
   resolveAlert: (id: number, notes?: string) => apiService.resolveAlert(id, notes),
-  getTimeline: () => apiService.getAlertTimeline(),
+  getTimeline: (params?: { interval?: string; range?: string; source?: 'auto' | 'es' }) =>
+    apiService.getAlertTimeline(params),
 };
 
 export const threatsService = {
@@ -248,6 +271,7 @@ export const statsService = {
   getProtocols: () => apiService.getProtocolStats(),
   getTraffic: () => apiService.getTrafficStats(),
   getAlerts: (params?: any) => apiService.getESAlerts(params),
+  getBundle: (panels: string[], params?: any) => apiService.getStatsBundle(panels, params),
   getIPReputation: (ip: string) => apiService.getIPReputation(ip),
 };
 
@@ -292,10 +316,22 @@ export const siemService = {
     }).get('/stats/siem/fim/');
     return r.data;
   },
+  // overview, alerts, mitre and fim in one request: { panels, errors }
+  getBundle: async (panels: string[], params?: any) => {
+    const r = await axios.create({
+      baseURL: API_BASE_URL,
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${localStorage.getItem('access_token')}`,
+      },
+    }).get('/stats/siem/bundle/', { params: { ...params, panels: panels.join(',') } });
+    return r.data;
+  },
 };
 
 export const systemService = {
   getHealth: () => apiService.getSystemHealth(),
+  getMetricsHistory: (minutes?: number) => apiService.getSystemMetricsHistory(minutes),
   getSettings: () => apiService.getSystemSettings(),
   updateSettings: (settings: Record<string, any>) => apiService.updateSystemSettings(settings),
 };